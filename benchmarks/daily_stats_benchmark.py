@@ -0,0 +1,130 @@
+"""
+تقرير اليوم: مسح المعاملات بـ date(created_at) مقابل قراءة العدادات المجمّعة،
+مع زمن إعادة البناء وكلفة الـ triggers على الإدخال
+
+التشغيل: python -m benchmarks.daily_stats_benchmark [عدد المعاملات]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from core.database import db
+
+TRANSACTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+DAYS = 365
+BATCH = 200_000
+READS = 200
+INSERTS = 20_000
+
+# استعلامات التقرير السابق (مسح المعاملات لكل طلب تقرير)
+SCAN_QUERIES = (
+    "SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM transactions "
+    "WHERE type = 'charge' AND status = 'approved' AND date(created_at) = ?",
+    "SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM transactions "
+    "WHERE type = 'withdraw' AND status = 'approved' AND date(created_at) = ?",
+    "SELECT COUNT(*) FROM transactions WHERE status = 'pending' AND date(created_at) = ?",
+)
+ROLLUP_QUERIES = (
+    "SELECT new_users, active_users, system_errors FROM daily_stats WHERE date = ?",
+    "SELECT type, status, count, amount FROM daily_transaction_stats WHERE date = ?",
+)
+REBUILD = """
+    INSERT INTO daily_transaction_stats (date, type, status, count, amount)
+    SELECT date(created_at), type, status, COUNT(*), SUM(amount)
+    FROM transactions
+    WHERE type IN ('charge', 'withdraw') AND created_at >= ''
+    GROUP BY date(created_at), type, status
+"""
+
+START = datetime(2025, 1, 1)
+
+
+def rows(rng: random.Random, count: int):
+    for _ in range(count):
+        created = START + timedelta(seconds=rng.randrange(DAYS * 86400))
+        yield (
+            rng.randrange(1, 100_000),
+            rng.choice(('charge', 'charge', 'withdraw')),
+            rng.randrange(1, 500) * 1000,
+            rng.choice(('approved', 'approved', 'rejected', 'pending')),
+            created.isoformat()
+        )
+
+
+def create_schema(conn: sqlite3.Connection, triggers: bool) -> None:
+    schemas = db._get_table_schemas()
+    for table in ("transactions", "daily_stats", "daily_transaction_stats"):
+        conn.execute(schemas[table])
+    for name, columns in db._get_table_indices():
+        if columns.startswith("transactions("):
+            conn.execute(f"CREATE INDEX {name} ON {columns}")
+    if triggers:
+        for name, sql in db._get_table_triggers():
+            if name.startswith("trg_stats_transaction"):
+                conn.execute(f"CREATE TRIGGER {name} {sql}")
+
+
+def insert_rate(path: str, triggers: bool) -> float:
+    conn = sqlite3.connect(path)
+    create_schema(conn, triggers)
+    rng = random.Random(3)
+    start = time.perf_counter()
+    for row in rows(rng, INSERTS):
+        conn.execute(
+            "INSERT INTO transactions (user_id, type, amount, status, created_at) VALUES (?, ?, ?, ?, ?)", row
+        )
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed / INSERTS * 1e6
+
+
+def timed(conn: sqlite3.Connection, queries: tuple, days: list) -> float:
+    start = time.perf_counter()
+    for day in days:
+        for query in queries:
+            conn.execute(query, (day,)).fetchall()
+    return (time.perf_counter() - start) / len(days) * 1000
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "stats.sqlite")
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        create_schema(conn, triggers=False)
+        
+        start = time.perf_counter()
+        rng = random.Random(7)
+        for offset in range(0, TRANSACTIONS, BATCH):
+            conn.executemany(
+                "INSERT INTO transactions (user_id, type, amount, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows(rng, min(BATCH, TRANSACTIONS - offset))
+            )
+            conn.commit()
+        print(f"{TRANSACTIONS:,} معاملة على {DAYS} يوم ({os.path.getsize(path) / 1024 / 1024:.0f} MB، "
+              f"بُنيت في {time.perf_counter() - start:.1f} ث)\n")
+        
+        start = time.perf_counter()
+        conn.execute(REBUILD)
+        conn.commit()
+        print(f"إعادة البناء (تمرير مجمّع واحد): {time.perf_counter() - start:.2f} ث، "
+              f"{conn.execute('SELECT COUNT(*) FROM daily_transaction_stats').fetchone()[0]:,} صف\n")
+        
+        days = [(START + timedelta(days=rng.randrange(DAYS))).strftime('%Y-%m-%d') for _ in range(READS)]
+        print("تقرير يوم واحد:")
+        print(f"  مسح المعاملات بـ date(created_at)   {timed(conn, SCAN_QUERIES, days[:10]):>10.2f} ms")
+        print(f"  قراءة العدادات المجمّعة            {timed(conn, ROLLUP_QUERIES, days):>10.3f} ms")
+        conn.close()
+        
+        print("\nإدخال معاملة (commit لكل إدخال):")
+        without = insert_rate(os.path.join(directory, "plain.sqlite"), triggers=False)
+        with_triggers = insert_rate(os.path.join(directory, "triggers.sqlite"), triggers=True)
+        print(f"  بدون triggers                       {without:>10.1f} µs")
+        print(f"  مع triggers الإحصائيات              {with_triggers:>10.1f} µs")
@@ -0,0 +1,83 @@
+"""
+قياس زمن استجابة المعالجات أثناء إنشاء 20 حساب Ichancy بالتوازي
+
+التشغيل: python -m benchmarks.hashing_benchmark
+"""
+
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import PERFORMANCE, PASSWORD_HASHING
+from core.hashing import bcrypt_hash
+from core.security import hashing_executor
+
+CONCURRENT_CREATIONS = 20
+LIGHT_HANDLER_CALLS = 200
+
+
+def light_handler():
+    """معالج خفيف (مثل عرض القائمة الرئيسية)"""
+    start = time.perf_counter()
+    total = 0
+    for i in range(2000):
+        total += i * i
+    return (time.perf_counter() - start) * 1000
+
+
+def create_inline():
+    """التشفير على خيط المعالج مباشرة"""
+    bcrypt_hash("Benchmark#Pass123", PASSWORD_HASHING["ROUNDS"])
+
+
+def create_pooled():
+    """التشفير عبر بوول التشفير"""
+    hashing_executor.submit(bcrypt_hash, "Benchmark#Pass123", PASSWORD_HASHING["ROUNDS"]).result()
+
+
+def percentile(values, pct):
+    """حساب النسبة المئوية"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def run(label, create_fn):
+    """تشغيل سيناريو واحد وطباعة النتائج"""
+    handlers = ThreadPoolExecutor(max_workers=PERFORMANCE["THREAD_POOL_SIZE"])
+    done = threading.Event()
+    latencies = []
+    
+    def creations():
+        with ThreadPoolExecutor(max_workers=CONCURRENT_CREATIONS) as creators:
+            list(creators.map(lambda _: create_fn(), range(CONCURRENT_CREATIONS)))
+        done.set()
+    
+    start = time.perf_counter()
+    creator_thread = threading.Thread(target=creations)
+    creator_thread.start()
+    
+    while not done.is_set() or len(latencies) < LIGHT_HANDLER_CALLS:
+        submitted = time.perf_counter()
+        handlers.submit(light_handler).result()
+        latencies.append((time.perf_counter() - submitted) * 1000)
+        if len(latencies) >= LIGHT_HANDLER_CALLS * 10:
+            break
+    
+    creator_thread.join()
+    elapsed = time.perf_counter() - start
+    handlers.shutdown()
+    
+    print(f"{label:<8} p50={statistics.median(latencies):.2f}ms "
+          f"p95={percentile(latencies, 95):.2f}ms "
+          f"max={max(latencies):.2f}ms "
+          f"creations={CONCURRENT_CREATIONS} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    print(f"bcrypt rounds={PASSWORD_HASHING['ROUNDS']}, pool={hashing_executor.pool_size}")
+    run("inline", create_inline)
+    run("pooled", create_pooled)
+    print(hashing_executor.get_stats())
+    hashing_executor.shutdown()
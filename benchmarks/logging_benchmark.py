@@ -0,0 +1,65 @@
+"""
+قياس تكلفة استدعاء اللوج على خيط المعالج: كتابة مباشرة مقابل الطابور
+
+التشغيل: python -m benchmarks.logging_benchmark
+"""
+
+import logging
+import os
+import statistics
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+from core.config import LOGGING
+
+# قياس تكلفة الاستدعاء فقط: بدون كونسول وبدون إسقاط سجلات
+LOGGING["CONSOLE"] = False
+LOGGING["QUEUE_SIZE"] = 0
+
+from core.logger import LOG_FORMAT, shutdown_logging, get_logging_stats
+
+CALLS = 20000
+
+
+def measure(logger: logging.Logger) -> list:
+    """قياس زمن كل استدعاء بالميكروثانية"""
+    timings = []
+    for i in range(CALLS):
+        start = time.perf_counter()
+        logger.info("معالجة طلب المستخدم %s", i)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def report(label: str, timings: list):
+    """طباعة النتائج"""
+    ordered = sorted(timings)
+    p99 = ordered[int(len(ordered) * 0.99)]
+    print(f"{label:<8} mean={statistics.mean(timings):.1f}us "
+          f"p50={statistics.median(timings):.1f}us p99={p99:.1f}us")
+
+
+def direct_logger(path: str) -> logging.Logger:
+    """لوجر يكتب في الملف مباشرة (الطريقة القديمة)"""
+    logger = logging.getLogger("benchmark.direct")
+    logger.propagate = False
+    handler = RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=1, encoding='utf-8')
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        direct = direct_logger(os.path.join(tmp, "direct.log"))
+        report("direct", measure(direct))
+        for handler in direct.handlers:
+            handler.close()
+    
+    queued = logging.getLogger("benchmark.queued")
+    queued.setLevel(logging.INFO)
+    report("queued", measure(queued))
+    print(get_logging_stats())
+    shutdown_logging()
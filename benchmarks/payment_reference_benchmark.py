@@ -0,0 +1,115 @@
+"""
+فحص تكرار أرقام عمليات الشحن: فلتر بلوم في الذاكرة مقابل استعلام جدول الأرقام الدائم
+على قاعدة بيانات اصطناعية (10 مليون رقم افتراضياً)
+
+التشغيل: python -m benchmarks.payment_reference_benchmark [عدد الأرقام]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from core.bloom import BloomFilter
+from core.config import PAYMENT_REFERENCES
+from core.database import db
+from core.identifiers import PaymentReferenceRegistry
+
+REFERENCES = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+METHODS = ("syriatel_cash", "sham_cash", "sham_cash_usd")
+LOOKUPS = 100_000
+BATCH = 200_000
+
+EXISTS_QUERY = "SELECT 1 FROM payment_references WHERE payment_method = ? AND reference = ?"
+
+
+def reference(n: int) -> str:
+    """رقم عملية بشكل قريب من أرقام سيرياتيل/شام كاش"""
+    return f"{600000000000 + n * 7919 % 399999999999}"
+
+
+def build_database(path: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(db._get_table_schemas()["payment_references"])
+    
+    for start in range(0, REFERENCES, BATCH):
+        conn.executemany(
+            "INSERT INTO payment_references (payment_method, reference, transaction_id) VALUES (?, ?, ?)",
+            ((METHODS[n % 3], reference(n), n + 1) for n in range(start, min(start + BATCH, REFERENCES)))
+        )
+        conn.commit()
+    conn.close()
+
+
+def load_filter(conn: sqlite3.Connection) -> BloomFilter:
+    """نفس تحميل PaymentReferenceRegistry.load على اتصال القاعدة الاصطناعية"""
+    bloom = BloomFilter(max(PAYMENT_REFERENCES["BLOOM_CAPACITY"], REFERENCES * 2), PAYMENT_REFERENCES["BLOOM_ERROR_RATE"])
+    last = ('', '')
+    while True:
+        rows = conn.execute(
+            "SELECT payment_method, reference FROM payment_references "
+            "WHERE (payment_method, reference) > (?, ?) ORDER BY payment_method, reference LIMIT ?",
+            (*last, PAYMENT_REFERENCES["LOAD_BATCH_SIZE"])
+        ).fetchall()
+        if not rows:
+            break
+        last = rows[-1]
+        for method, ref in rows:
+            bloom.add(PaymentReferenceRegistry._key(method, ref))
+    return bloom
+
+
+def timed(label: str, keys: list, check) -> int:
+    start = time.perf_counter()
+    hits = sum(1 for key in keys if check(*key))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed / len(keys) * 1e6:>8.2f} µs/فحص  ({hits:,} موجود)")
+    return hits
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "references.sqlite")
+        
+        start = time.perf_counter()
+        build_database(path)
+        print(f"{REFERENCES:,} رقم عملية ({os.path.getsize(path) / 1024 / 1024:.0f} MB، "
+              f"بُنيت في {time.perf_counter() - start:.1f} ث)\n")
+        
+        conn = sqlite3.connect(path)
+        start = time.perf_counter()
+        bloom = load_filter(conn)
+        print(f"تحميل الفلتر: {time.perf_counter() - start:.1f} ث، "
+              f"{bloom.memory_bytes() / 1024 / 1024:.1f} MB، {bloom.hashes} دوال تجزئة\n")
+        
+        rng = random.Random(7)
+        existing = [(METHODS[n % 3], reference(n)) for n in rng.sample(range(REFERENCES), LOOKUPS)]
+        fresh = [(METHODS[n % 3], reference(n)) for n in range(REFERENCES, REFERENCES + LOOKUPS)]
+        
+        def index_lookup(method, ref):
+            return conn.execute(EXISTS_QUERY, (method, ref)).fetchone() is not None
+        
+        def bloom_lookup(method, ref):
+            return PaymentReferenceRegistry._key(method, ref) in bloom
+        
+        def combined(method, ref):
+            return bloom_lookup(method, ref) and index_lookup(method, ref)
+        
+        print("أرقام جديدة (الحالة الشائعة):")
+        timed("الجدول فقط", fresh, index_lookup)
+        false_positives = timed("فلتر بلوم فقط", fresh, bloom_lookup)
+        timed("فلتر بلوم ثم الجدول عند الاشتباه", fresh, combined)
+        print(f"  نسبة الاشتباه الخاطئ: {false_positives / LOOKUPS:.4%} "
+              f"(الهدف {PAYMENT_REFERENCES['BLOOM_ERROR_RATE']:.2%})\n")
+        
+        print("أرقام مكررة:")
+        timed("الجدول فقط", existing, index_lookup)
+        timed("فلتر بلوم ثم الجدول", existing, combined)
+        
+        plan = conn.execute("EXPLAIN QUERY PLAN " + EXISTS_QUERY, fresh[0]).fetchall()
+        print(f"\nخطة الاستعلام: {plan[0][-1]}")
+        conn.close()
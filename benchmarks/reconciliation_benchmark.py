@@ -0,0 +1,171 @@
+"""
+سرعة مطابقة الأرصدة على قاعدة بيانات اصطناعية: عملية واحدة مقابل بوول عمليات،
+مع قياس زمن كتابة في نفس الوقت (اتصالات المطابقة للقراءة فقط)
+
+وقاعدة أقدم من دفتر القيود (عدادات وهدايا بلا قيود) بعد افتتاح الدفتر: يجب ألا تظهر فروقات
+
+التشغيل: python -m benchmarks.reconciliation_benchmark
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from core.database import db
+from tasks.reconciliation_task import run_reconciliation
+
+USERS = 200_000
+TRANSACTIONS_PER_USER = 5
+GIFTS = 50_000
+BROKEN_USERS = 25
+PRE_LEDGER_USERS = 20_000
+
+
+def create_schema(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    for schema in db._get_table_schemas().values():
+        conn.execute(schema)
+    for name, columns in db._get_table_indices():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+    return conn
+
+
+def build_database(path: str) -> None:
+    """مستخدمون بأرصدة مطابقة لقيودهم، مع عدد صغير من الأرصدة المعطوبة عمداً"""
+    conn = create_schema(path)
+    
+    rng = random.Random(3)
+    user_ids = rng.sample(range(10_000_000, 9_000_000_000), USERS)
+    users, transactions, ledger = [], [], []
+    balances = {}
+    
+    for user_id in user_ids:
+        deposits = 0
+        for _ in range(TRANSACTIONS_PER_USER):
+            amount = rng.randrange(1000, 50_000, 1000)
+            status = rng.choice(("approved", "approved", "rejected", "pending"))
+            transactions.append((user_id, "charge", amount, status))
+            if status == "approved":
+                deposits += amount
+                ledger.append((user_id, amount, deposits, "deposit"))
+        balances[user_id] = deposits
+        users.append([user_id, deposits, deposits])
+    
+    gifts = []
+    for _ in range(GIFTS):
+        sender, receiver = rng.sample(user_ids, 2)
+        if balances[sender] < 1000:
+            continue
+        balances[sender] -= 1000
+        balances[receiver] += 900
+        gifts.append((sender, receiver, 1000, 900))
+        ledger.append((sender, -1000, balances[sender], "gift_sent"))
+        ledger.append((receiver, 900, balances[receiver], "gift_received"))
+    
+    for row in users:
+        row[1] = balances[row[0]]
+    for row in rng.sample(users, BROKEN_USERS):
+        row[1] += 500
+    
+    conn.executemany("INSERT INTO users (user_id, balance, total_deposit) VALUES (?, ?, ?)", users)
+    conn.executemany("INSERT INTO transactions (user_id, type, amount, status) VALUES (?, ?, ?, ?)", transactions)
+    conn.executemany(
+        "INSERT INTO gift_transactions (sender_id, receiver_id, original_amount, net_amount) VALUES (?, ?, ?, ?)",
+        gifts
+    )
+    conn.executemany("INSERT INTO ledger_entries (user_id, amount, balance_after, kind) VALUES (?, ?, ?, ?)", ledger)
+    conn.commit()
+    conn.close()
+
+
+def build_pre_ledger_database(path: str) -> None:
+    """عدادات وهدايا من قبل دفتر القيود، ثم افتتاح الدفتر كما في بدء البوت، ثم نشاط جديد بقيود"""
+    conn = create_schema(path)
+    rng = random.Random(5)
+    user_ids = rng.sample(range(10_000_000, 9_000_000_000), PRE_LEDGER_USERS)
+    
+    users, gifts = [], []
+    for user_id in user_ids:
+        deposits = rng.randrange(0, 50) * 1000
+        withdrawals = rng.randrange(0, deposits + 1, 1000) if deposits else 0
+        users.append((user_id, deposits - withdrawals, deposits, withdrawals))
+    for _ in range(PRE_LEDGER_USERS // 2):
+        sender, receiver = rng.sample(user_ids, 2)
+        gifts.append((sender, receiver, 1000, 900))
+    
+    conn.executemany(
+        "INSERT INTO users (user_id, balance, total_deposit, total_withdraw) VALUES (?, ?, ?, ?)", users
+    )
+    conn.executemany(
+        "INSERT INTO gift_transactions (sender_id, receiver_id, original_amount, net_amount) VALUES (?, ?, ?, ?)",
+        gifts
+    )
+    for backfill_sql in db._get_ledger_openings():
+        conn.execute(backfill_sql)
+    
+    # إيداع بعد الافتتاح لنصف المستخدمين: العداد = الافتتاح + القيد
+    for user_id in user_ids[::2]:
+        balance = conn.execute(
+            "UPDATE users SET balance = balance + 5000, total_deposit = total_deposit + 5000 "
+            "WHERE user_id = ? RETURNING balance",
+            (user_id,)
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT INTO ledger_entries (user_id, amount, balance_after, kind) VALUES (?, 5000, ?, 'deposit')",
+            (user_id, balance)
+        )
+    conn.commit()
+    conn.close()
+
+
+def writer(path: str, stop: threading.Event, latencies: list) -> None:
+    """كتابات صغيرة متواصلة (مثل البوت) لقياس أثر المطابقة عليها"""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS bench_writes (id INTEGER PRIMARY KEY, at REAL)")
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.execute("INSERT INTO bench_writes (at) VALUES (?)", (start,))
+        conn.commit()
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.005)
+    conn.close()
+
+
+def run(label: str, path: str, workers: int) -> None:
+    stop = threading.Event()
+    latencies = []
+    thread = threading.Thread(target=writer, args=(path, stop, latencies))
+    thread.start()
+    report = run_reconciliation(path, chunk_size=5000, workers=workers, max_samples=5)
+    stop.set()
+    thread.join()
+    
+    latencies.sort()
+    found = sum(report["discrepancies"].values())
+    print(
+        f"{label:<14} {report['seconds']:>6.2f}s  {report['rows_per_second']:>10,} rows/s  "
+        f"{report['users_per_second']:>8,} users/s  found={found}  "
+        f"write p99={latencies[int(len(latencies) * 0.99)]:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "reconcile.sqlite")
+        start = time.perf_counter()
+        build_database(path)
+        print(f"{USERS:,} users, {USERS * TRANSACTIONS_PER_USER:,} transactions, {GIFTS:,} gifts "
+              f"(built in {time.perf_counter() - start:.1f}s, {BROKEN_USERS} broken balances)\n")
+        
+        run("1 process", path, 1)
+        if (os.cpu_count() or 1) > 1:
+            run(f"{os.cpu_count()} processes", path, os.cpu_count())
+        
+        path = os.path.join(directory, "pre_ledger.sqlite")
+        build_pre_ledger_database(path)
+        print(f"\n{PRE_LEDGER_USERS:,} pre-ledger users (opening snapshot + new deposits, expect found=0)")
+        run("pre-ledger", path, 1)
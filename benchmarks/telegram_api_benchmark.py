@@ -0,0 +1,118 @@
+"""
+قياس نقل Telegram API مقابل خادم Bot API محلي بديل:
+جلسات telebot الافتراضية مقابل البوول المشترك، وget_me مع التخزين وبدونه
+
+التشغيل: python -m benchmarks.telegram_api_benchmark
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telebot import TeleBot, apihelper
+
+from core.config import OUTBOX
+from core.metrics import metrics
+from core.outbox import QueuedTeleBot
+from core.telegram_api import configure_telegram_api
+
+TOKEN = "123456:BENCHMARK"
+CALLS = 3000
+SENDERS = OUTBOX["WORKERS"]
+LATENCY_MS = 2  # زمن معالجة مصطنع في الخادم البديل
+
+
+class FakeBotApi(BaseHTTPRequestHandler):
+    """بديل محلي لـ getMe و sendMessage"""
+    
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+    
+    def setup(self):
+        """عد اتصالات TCP الجديدة"""
+        super().setup()
+        with FakeBotApi.lock:
+            FakeBotApi.connections += 1
+    
+    def _handle(self):
+        """رد JSON بصيغة Bot API"""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        
+        time.sleep(LATENCY_MS / 1000)
+        method = self.path.split('?', 1)[0].rsplit('/', 1)[-1]
+        if method == "getMe":
+            result = {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        else:
+            result = {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": 100, "type": "private"},
+                "text": "ok"
+            }
+        
+        data = json.dumps({"ok": True, "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    do_GET = _handle
+    do_POST = _handle
+    
+    def log_message(self, format, *args):
+        """تعطيل سجل الطلبات"""
+        pass
+
+
+def run(label: str, bot: TeleBot, call) -> None:
+    """تنفيذ CALLS استدعاء من SENDERS خيط"""
+    FakeBotApi.connections = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=SENDERS) as pool:
+        list(pool.map(lambda i: call(bot, i), range(CALLS)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28} {CALLS / elapsed:>8,.0f} calls/s  "
+        f"{FakeBotApi.connections:>4} TCP connections"
+    )
+
+
+def send(bot: TeleBot, i: int):
+    """sendMessage مباشرة (بدون طابور الإرسال)"""
+    TeleBot.send_message(bot, 100 + i % 50, "benchmark")
+
+
+if __name__ == "__main__":
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeBotApi)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{httpd.server_address[1]}/bot{{0}}/{{1}}"
+    apihelper.API_URL = api_url
+    
+    # جلسات telebot الافتراضية (جلسة لكل خيط، تنتهي كل 600 ثانية)
+    run("default sendMessage", TeleBot(TOKEN, threaded=False), send)
+    run("default getMe", TeleBot(TOKEN, threaded=False), lambda bot, i: bot.get_me())
+    
+    # البوول المشترك مع القياس
+    configure_telegram_api(api_url)
+    run("pooled sendMessage", TeleBot(TOKEN, threaded=False), send)
+    queued_bot = QueuedTeleBot(TOKEN, threaded=False)
+    queued_bot.get_me()  # مثل bot_manager عند بدء التشغيل
+    run("pooled getMe (cached)", queued_bot, lambda bot, i: bot.get_me())
+    
+    print()
+    for name in ("telegram.sendMessage", "telegram.getMe"):
+        summary = metrics.histogram(name).summary()
+        print(
+            f"{name:<22} count={summary['count']:<6} p50={summary['p50_ms']}ms "
+            f"p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms"
+        )
+    
+    httpd.shutdown()
@@ -0,0 +1,144 @@
+"""
+مقارنة سرعة استقبال التحديثات: Webhook مقابل Long Polling (مع بديل محلي لـ Telegram)
+
+التشغيل: python -m benchmarks.webhook_benchmark
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from telebot import TeleBot, apihelper
+
+from core.dispatcher import UpdateDispatcher
+from core.webhook import WebhookServer, SECRET_HEADER
+
+UPDATES = 2000
+SECRET = "benchmark-secret"
+
+
+def recorded_updates(count: int) -> list:
+    """تحديثات رسائل مسجلة (بصيغة Telegram)"""
+    return [
+        {
+            "update_id": 1000 + i,
+            "message": {
+                "message_id": i,
+                "date": int(time.time()),
+                "chat": {"id": 100 + i % 50, "type": "private"},
+                "from": {"id": 100 + i % 50, "is_bot": False, "first_name": "User"},
+                "text": "/start"
+            }
+        }
+        for i in range(count)
+    ]
+
+
+class Counter:
+    """عداد التحديثات المعالجة"""
+    
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.count = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+    
+    def process(self, updates):
+        """تسجيل التحديثات المعالجة"""
+        with self.lock:
+            self.count += len(updates)
+            if self.count >= self.expected:
+                self.done.set()
+
+
+def bench_webhook(updates: list) -> float:
+    """إرسال التحديثات للـ Webhook كما يفعل Telegram (طلب لكل تحديث)"""
+    counter = Counter(len(updates))
+    dispatcher = UpdateDispatcher(counter.process, workers=8)
+    dispatcher.start()
+    server = WebhookServer(dispatcher, "127.0.0.1", 0, "/telegram/webhook", SECRET)
+    server.start()
+    url = f"http://127.0.0.1:{server.port}/telegram/webhook"
+    
+    # التحقق من رفض السر الخاطئ
+    rejected = requests.post(url, json=updates[0], headers={SECRET_HEADER: "wrong"})
+    assert rejected.status_code == 403, rejected.status_code
+    
+    local = threading.local()
+    
+    def post(update):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        response = local.session.post(url, data=json.dumps(update), headers={
+            SECRET_HEADER: SECRET, "Content-Type": "application/json"
+        })
+        assert response.status_code == 200, response.status_code
+    
+    start = time.perf_counter()
+    # Telegram يفتح حتى 40 اتصال متوازي (max_connections)
+    with ThreadPoolExecutor(max_workers=8) as senders:
+        list(senders.map(post, updates))
+    counter.done.wait(30)
+    elapsed = time.perf_counter() - start
+    
+    server.stop()
+    dispatcher.stop()
+    return elapsed
+
+
+def bench_polling(updates: list) -> float:
+    """Long polling من بديل محلي لـ getUpdates (100 تحديث لكل دفعة)"""
+    
+    class FakeTelegram(BaseHTTPRequestHandler):
+        """بديل محلي لـ getUpdates"""
+        
+        def do_GET(self):
+            """إرجاع الدفعة التالية بعد offset"""
+            params = parse_qs(urlparse(self.path).query)
+            offset = int(params.get("offset", ["0"])[0])
+            batch = [u for u in updates if u["update_id"] >= offset][:100]
+            data = json.dumps({"ok": True, "result": batch}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def log_message(self, format, *args):
+            """تعطيل سجل الطلبات"""
+            pass
+    
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeTelegram)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    apihelper.API_URL = f"http://127.0.0.1:{httpd.server_address[1]}/bot{{0}}/{{1}}"
+    
+    counter = Counter(len(updates))
+    dispatcher = UpdateDispatcher(counter.process, workers=8)
+    dispatcher.start()
+    bot = TeleBot("123456:BENCHMARK", threaded=False)
+    
+    start = time.perf_counter()
+    offset = None
+    while not counter.done.is_set():
+        batch = bot.get_updates(offset=offset, timeout=0, long_polling_timeout=0)
+        if batch:
+            offset = batch[-1].update_id + 1
+            dispatcher.submit_many(batch)
+        elif offset is not None and offset > updates[-1]["update_id"]:
+            counter.done.wait(30)
+    elapsed = time.perf_counter() - start
+    
+    dispatcher.stop()
+    httpd.shutdown()
+    return elapsed
+
+
+if __name__ == "__main__":
+    updates = recorded_updates(UPDATES)
+    for label, bench in (("webhook", bench_webhook), ("polling", bench_polling)):
+        elapsed = bench(updates)
+        print(f"{label:<8} {UPDATES} updates in {elapsed:.2f}s ({UPDATES / elapsed:,.0f} updates/s)")
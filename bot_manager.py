@@ -0,0 +1,560 @@
+"""
+مدير البوت - تهيئة النظام وتشغيله (يُشغّل من main.py)
+"""
+
+import os
+import sys
+import time
+import threading
+from datetime import datetime
+
+# إضافة المسار للمكتبات
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.logger import get_logger, system_logger
+from core.database import db
+from core.cache import cache
+from core.security import rate_limiter, hashing_executor
+from core.metrics import metrics
+from core.metrics_server import start_metrics_server
+from core.telegram_api import configure_telegram_api
+from core.dispatcher import create_dispatcher
+from core.webhook import create_webhook_server, validate_webhook_config
+from core.outbox import outbox
+from core.session_store import session_store
+from core.identifiers import refill_identifier_pools, username_registry, payment_references
+from services.code_allocator import code_allocator
+from services.stats_rollup import stats_rollup
+from core.config import VERSION, LAST_UPDATE, ADMIN_ID, IDENTIFIER_POOLS, SYRIATEL_CODES, DAILY_STATS, DISPATCHER, WEBHOOK
+
+from handlers.commands import bot, setup_commands
+from handlers.callbacks import setup_callbacks
+from handlers.messages import setup_messages
+from handlers.sessions import cleanup_expired_sessions
+from services.broadcast_service import broadcast_service
+
+from tasks.scheduler import setup_scheduler
+from tasks.backup_task import setup_backup_task
+from tasks.report_task import setup_report_task
+from tasks.cleanup_task import setup_cleanup_task
+from tasks.referral_task import setup_referral_task
+from tasks.reconciliation_task import setup_reconciliation_task
+from tasks.deposit_matching_task import setup_deposit_matching_task, start_notification_server
+
+logger = get_logger(__name__)
+
+
+class BotManager:
+    """مدير البوت الرئيسي"""
+    
+    def __init__(self):
+        self.bot = bot
+        self.is_running = False
+        self.start_time = None
+        self.metrics_server = None
+        self.notification_server = None
+        self.dispatcher = create_dispatcher(self.bot.process_new_updates)
+        self.update_offset = None
+        self.webhook_server = None
+        self.stats = {
+            "messages_processed": 0,
+            "callbacks_processed": 0,
+            "errors": 0,
+            "users_served": 0
+        }
+    
+    def initialize(self):
+        """تهيئة النظام"""
+        try:
+            system_logger.info("=" * 60)
+            system_logger.info("🚀 بدء تشغيل نظام البوت الاحترافي")
+            system_logger.info(f"🔄 الإصدار: {VERSION}")
+            system_logger.info(f"📅 آخر تحديث: {LAST_UPDATE}")
+            system_logger.info(f"👑 الإدمن الرئيسي: {ADMIN_ID}")
+            system_logger.info("=" * 60)
+            
+            # إعدادات Webhook من البيئة: الفشل مبكراً بدل تسجيل رمز عشوائي أو رابط فارغ
+            if WEBHOOK["ENABLED"]:
+                webhook_errors = validate_webhook_config()
+                for error in webhook_errors:
+                    system_logger.critical(f"❌ {error}")
+                if webhook_errors:
+                    return False
+            
+            # اختبار الاتصال بقاعدة البيانات
+            db_status = self._test_database()
+            if not db_status:
+                system_logger.critical("❌ فشل الاتصال بقاعدة البيانات!")
+                return False
+            
+            # اختبار الكاش
+            cache_status = self._test_cache()
+            if not cache_status:
+                system_logger.warning("⚠️ مشكلة في نظام الكاش، لكن النظام سيستمر")
+            
+            # نقل Telegram API (بوول اتصالات وقياس) ونقطة المقاييس
+            configure_telegram_api()
+            self.metrics_server = start_metrics_server()
+            
+            # تحميل هوية البوت مرة واحدة (get_me مخزنة بعدها)
+            try:
+                me = self.bot.get_me()
+                system_logger.info(f"🤖 البوت: @{me.username}")
+            except Exception as e:
+                system_logger.warning(f"⚠️ تعذر جلب هوية البوت الآن: {e}")
+            
+            # طابور الإرسال الصادر (حدود المعدل وإعادة المحاولة)
+            outbox.start()
+            
+            # استعادة جلسات المحادثة قبل استقبال التحديثات
+            session_store.start()
+            
+            # إعداد المعالجات
+            setup_commands()
+            setup_callbacks()
+            setup_messages()
+            
+            # إعداد المهام المجدولة
+            self._setup_scheduled_tasks()
+            
+            # إشعارات التحويل عبر HTTP (بعد طابور الإرسال لأن المطابقة ترسل إشعارات)
+            self.notification_server = start_notification_server()
+            
+            # استئناف الإذاعات التي توقفت قبل إعادة التشغيل
+            resumed = broadcast_service.resume_pending()
+            if resumed:
+                system_logger.info(f"🔁 تم استئناف {resumed} إذاعة")
+            
+            # تنظيف أولي
+            self._initial_cleanup()
+            
+            system_logger.info("✅ تم تهيئة النظام بنجاح")
+            return True
+            
+        except Exception as e:
+            system_logger.critical(f"❌ فشل تهيئة النظام: {e}")
+            return False
+    
+    def _test_database(self):
+        """اختبار قاعدة البيانات"""
+        try:
+            # اختبار استعلام بسيط
+            result = db.fetch_one("SELECT 1 as test")
+            if result and result['test'] == 1:
+                system_logger.info("✅ قاعدة البيانات تعمل بشكل صحيح")
+                
+                # إحصائيات قاعدة البيانات
+                user_count = db.fetch_one("SELECT COUNT(*) as count FROM users")['count']
+                system_logger.info(f"👥 عدد المستخدمين في قاعدة البيانات: {user_count}")
+                return True
+            return False
+        except Exception as e:
+            system_logger.error(f"❌ خطأ في قاعدة البيانات: {e}")
+            return False
+    
+    def _test_cache(self):
+        """اختبار نظام الكاش"""
+        try:
+            # اختبار كتابة وقراءة
+            test_key = "system_test"
+            test_value = "cache_working"
+            
+            cache.cache.set(test_key, test_value, ttl=10)
+            retrieved = cache.cache.get(test_key)
+            
+            if retrieved == test_value:
+                system_logger.info("✅ نظام الكاش يعمل بشكل صحيح")
+                
+                # عرض إحصائيات الكاش
+                cache_stats = cache.get_detailed_stats()
+                system_logger.info(f"💾 حجم الكاش: {cache_stats['lru_cache']['size']}/{cache_stats['lru_cache']['max_size']}")
+                return True
+            return False
+        except Exception as e:
+            system_logger.error(f"❌ خطأ في نظام الكاش: {e}")
+            return False
+    
+    def _setup_scheduled_tasks(self):
+        """إعداد المهام المجدولة"""
+        try:
+            # الجدولة الرئيسية
+            scheduler = setup_scheduler()
+            
+            # المهام المجدولة
+            setup_backup_task(scheduler)
+            setup_report_task(scheduler)
+            setup_cleanup_task(scheduler)
+            setup_referral_task(scheduler)
+            setup_reconciliation_task(scheduler)
+            setup_deposit_matching_task(scheduler)
+            
+            # تعبئة مخازن المعرفات الفريدة
+            scheduler.add_job(
+                refill_identifier_pools,
+                'interval',
+                seconds=IDENTIFIER_POOLS["REFILL_INTERVAL_SECONDS"],
+                id='identifier_pools_refill',
+                name='تعبئة مخازن المعرفات'
+            )
+            
+            # مزامنة أكواد سيرياتيل وكتابة عدادات استخدامها
+            scheduler.add_job(
+                code_allocator.reload,
+                'interval',
+                seconds=SYRIATEL_CODES["RELOAD_INTERVAL_SECONDS"],
+                id='syriatel_codes_reload',
+                name='مزامنة أكواد سيرياتيل'
+            )
+            scheduler.add_job(
+                code_allocator.flush_usage,
+                'interval',
+                seconds=SYRIATEL_CODES["USAGE_FLUSH_INTERVAL_SECONDS"],
+                id='syriatel_codes_usage_flush',
+                name='كتابة استخدام أكواد سيرياتيل'
+            )
+            
+            # إضافة النشاط والأخطاء المتراكمة للإحصائيات اليومية
+            scheduler.add_job(
+                stats_rollup.fold,
+                'interval',
+                seconds=DAILY_STATS["FOLD_INTERVAL_SECONDS"],
+                id='daily_stats_fold',
+                name='تجميع الإحصائيات اليومية'
+            )
+            
+            # مهمة مراقبة النظام
+            scheduler.add_job(
+                self._system_monitor,
+                'interval',
+                minutes=5,
+                id='system_monitor',
+                name='مراقبة النظام'
+            )
+            
+            system_logger.info("✅ تم إعداد المهام المجدولة")
+            return True
+        except Exception as e:
+            system_logger.error(f"❌ خطأ في إعداد المهام المجدولة: {e}")
+            return False
+    
+    def _initial_cleanup(self):
+        """تنظيف أولي للنظام"""
+        try:
+            # تنظيف الجلسات المنتهية
+            sessions_cleaned = cleanup_expired_sessions()
+            if sessions_cleaned > 0:
+                system_logger.info(f"🧹 تم تنظيف {sessions_cleaned} جلسة منتهية")
+            
+            # تنظيف Rate Limiter
+            rate_limiter.cleanup_old_requests()
+            
+            # تنظيف الكاش
+            cache.auto_cleanup()
+            
+            # تجهيز المعرفات الفريدة مسبقاً
+            username_registry.load()
+            refill_identifier_pools()
+            code_allocator.reload()
+            payment_references.load_in_background()
+            
+            # بناء الإحصائيات اليومية من التاريخ عند أول تشغيل
+            if stats_rollup.ensure_built():
+                system_logger.info("📊 تم بناء الإحصائيات اليومية من المعاملات السابقة")
+            
+            system_logger.info("✅ تم التنظيف الأولي للنظام")
+        except Exception as e:
+            system_logger.error(f"❌ خطأ في التنظيف الأولي: {e}")
+    
+    def _system_monitor(self):
+        """مراقبة النظام"""
+        try:
+            # إحصائيات قاعدة البيانات
+            db_stats = db.get_stats()
+            
+            # إحصائيات الكاش
+            cache_stats = cache.get_detailed_stats()
+            
+            # تسجيل المعلومات
+            logger.info(f"📊 مراقبة النظام - الكاش: {cache_stats['lru_cache']['hit_rate']} - DB Pool: {db_stats['available']}/{db_stats['pool_size']}")
+            
+            # تحذير إذا كان هناك مشاكل
+            if cache_stats['lru_cache']['hit_ratio'] < 0.5:
+                logger.warning("⚠️ نسبة ضربات الكاش منخفضة!")
+            
+            if db_stats['available'] < 2:
+                logger.warning("⚠️ عدد اتصالات قاعدة البيانات المتاحة منخفض!")
+            
+            # أبطأ العمليات حسب p95
+            for op in metrics.slowest(3):
+                logger.info(f"⏱️ {op['operation']}: p50={op['p50_ms']}ms p95={op['p95_ms']}ms p99={op['p99_ms']}ms ({op['count']} استدعاء)")
+            
+            dispatcher_stats = self.dispatcher.get_stats()
+            if dispatcher_stats['total_pending'] > DISPATCHER["WORKERS"] * 10:
+                logger.warning(f"⚠️ تحديثات بانتظار المعالجة: {dispatcher_stats['total_pending']}")
+            
+            hashing_stats = hashing_executor.get_stats()
+            if hashing_stats['queue_depth'] > 0:
+                logger.warning(f"⚠️ طابور التشفير: {hashing_stats['queue_depth']} مهمة بانتظار البوول")
+            
+            outbox_stats = outbox.get_stats()
+            if outbox_stats['delayed'] > 100:
+                logger.warning(
+                    f"⚠️ رسائل مؤجلة بسبب حدود الإرسال: {outbox_stats['delayed']} "
+                    f"(429: {outbox_stats['throttled_429']})"
+                )
+            
+        except Exception as e:
+            logger.error(f"❌ خطأ في مراقبة النظام: {e}")
+    
+    def start(self):
+        """بدء تشغيل البوت"""
+        try:
+            system_logger.info("▶️ بدء تشغيل البوت...")
+            
+            # تسجيل وقت البدء
+            self.start_time = datetime.now()
+            self.is_running = True
+            
+            # عرض معلومات النظام
+            self._show_system_info()
+            
+            # بدء البوت
+            system_logger.info("🤖 البوت جاهز للعمل!")
+            system_logger.info("=" * 60)
+            
+            # عمال المعالجة (ترتيب لكل مستخدم)
+            self.dispatcher.start()
+            
+            if WEBHOOK["ENABLED"]:
+                self._run_webhook()
+                return
+            
+            self._skip_pending_updates()
+            
+            # تشغيل البوت مع إعادة التشغيل التلقائي
+            while self.is_running:
+                try:
+                    self._poll_updates()
+                except Exception as e:
+                    logger.error(f"❌ توقف البوت بشكل غير متوقع: {e}")
+                    
+                    # محاولة إعادة التشغيل بعد 10 ثواني
+                    logger.info("🔄 إعادة تشغيل البوت بعد 10 ثواني...")
+                    time.sleep(10)
+                    
+                    # تنظيف قبل إعادة التشغيل
+                    self._cleanup_before_restart()
+            
+        except KeyboardInterrupt:
+            system_logger.info("⏹️ إيقاف البوت بواسطة المستخدم...")
+            self.stop()
+        except Exception as e:
+            system_logger.critical(f"❌ خطأ حرج في تشغيل البوت: {e}")
+            self.stop()
+    
+    def _run_webhook(self):
+        """تشغيل وضع Webhook بدلاً من Long Polling"""
+        self.webhook_server = create_webhook_server(self.dispatcher)
+        if not self.webhook_server.start():
+            raise RuntimeError("فشل تشغيل خادم Webhook")
+        
+        self.bot.remove_webhook()
+        self.bot.set_webhook(
+            url=f"{WEBHOOK['PUBLIC_URL'].rstrip('/')}{WEBHOOK['PATH']}",
+            secret_token=WEBHOOK["SECRET_TOKEN"],
+            drop_pending_updates=True
+        )
+        system_logger.info("🌐 وضع Webhook مفعل")
+        
+        while self.is_running:
+            time.sleep(1)
+    
+    def _skip_pending_updates(self):
+        """تجاهل التحديثات المتراكمة أثناء التوقف"""
+        try:
+            updates = self.bot.get_updates(offset=-1, timeout=1, long_polling_timeout=1)
+            if updates:
+                self.update_offset = updates[-1].update_id + 1
+        except Exception as e:
+            logger.error(f"❌ خطأ في تجاهل التحديثات المعلقة: {e}")
+    
+    def _poll_updates(self):
+        """Long polling وتمرير التحديثات لموزع التحديثات"""
+        while self.is_running:
+            updates = self.bot.get_updates(
+                offset=self.update_offset,
+                timeout=DISPATCHER["POLL_TIMEOUT"],
+                long_polling_timeout=DISPATCHER["POLL_TIMEOUT"]
+            )
+            if updates:
+                self.update_offset = updates[-1].update_id + 1
+                self.dispatcher.submit_many(updates)
+    
+    def _show_system_info(self):
+        """عرض معلومات النظام"""
+        try:
+            from services.system_service import SystemService
+            system_service = SystemService()
+            
+            from services.user_service import UserService
+            user_service = UserService()
+            
+            system_info = system_service.get_system_info()
+            user_stats = user_service.get_system_stats()
+            
+            info_text = f"""
+🎯 **معلومات النظام التشغيلية**
+
+📊 **المستخدمون:**
+• الإجمالي: {user_stats['total_users']:,}
+• النشطين: {user_stats['active_users']:,}
+• المحظورين: {user_stats['banned_users']:,}
+• الأدمن: {user_stats['total_admins']:,}
+
+⚙️ **النظام:**
+• الإصدار: {system_info['version']}
+• المعاملات: {system_info['transactions_count']:,}
+• نسبة ضربات الكاش: {system_info['cache_stats']['lru_cache']['hit_rate']}
+
+💾 **الأداء:**
+• حجم الكاش: {system_info['cache_stats']['lru_cache']['size']}
+• اتصالات DB المتاحة: {system_info.get('db_connections', 'N/A')}
+
+🕒 **وقت البدء:** {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}
+"""
+            
+            # إرسال للمشرف الرئيسي
+            try:
+                self.bot.send_message(
+                    ADMIN_ID,
+                    info_text,
+                    parse_mode="Markdown"
+                )
+            except:
+                pass
+            
+            system_logger.info("📨 تم إرسال معلومات النظام للمشرف")
+            
+        except Exception as e:
+            system_logger.error(f"❌ خطأ في عرض معلومات النظام: {e}")
+    
+    def _cleanup_before_restart(self):
+        """تنظيف قبل إعادة التشغيل"""
+        try:
+            # تنظيف الكاش
+            cache.clear()
+            
+            # تنظيف قاعدة البيانات
+            db.vacuum()
+            
+            # تنظيف Rate Limiter
+            rate_limiter.cleanup_old_requests()
+            
+            system_logger.info("🧹 تم تنظيف النظام قبل إعادة التشغيل")
+        except Exception as e:
+            system_logger.error(f"❌ خطأ في التنظيف: {e}")
+    
+    def stop(self):
+        """إيقاف البوت"""
+        try:
+            system_logger.info("⏹️ جاري إيقاف البوت...")
+            self.is_running = False
+            
+            # حفظ الإحصائيات
+            self._save_stats()
+            
+            # تنظيف نهائي
+            self._final_cleanup()
+            
+            # إرسال رسالة إيقاف
+            uptime = datetime.now() - self.start_time if self.start_time else None
+            stop_msg = f"🛑 **تم إيقاف البوت**\n\n"
+            
+            if uptime:
+                hours, remainder = divmod(uptime.total_seconds(), 3600)
+                minutes, seconds = divmod(remainder, 60)
+                stop_msg += f"⏱️ وقت التشغيل: {int(hours)}س {int(minutes)}د {int(seconds)}ث\n"
+            
+            stop_msg += f"📊 المعالجات: {self.stats['messages_processed']} رسائل، {self.stats['callbacks_processed']} كال باكات\n"
+            stop_msg += f"👥 المستخدمون: {self.stats['users_served']}\n"
+            stop_msg += f"🕒 وقت الإيقاف: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            
+            try:
+                self.bot.send_message(ADMIN_ID, stop_msg, parse_mode="Markdown")
+            except:
+                pass
+            
+            system_logger.info("✅ تم إيقاف البوت بنجاح")
+            
+        except Exception as e:
+            system_logger.error(f"❌ خطأ في إيقاف البوت: {e}")
+        finally:
+            sys.exit(0)
+    
+    def _save_stats(self):
+        """حفظ الإحصائيات"""
+        try:
+            # يمكن حفظ الإحصائيات في قاعدة البيانات هنا
+            pass
+        except Exception as e:
+            system_logger.error(f"❌ خطأ في حفظ الإحصائيات: {e}")
+    
+    def _final_cleanup(self):
+        """تنظيف نهائي"""
+        try:
+            # تنظيف قاعدة البيانات
+            db.vacuum()
+            
+            # إغلاق اتصالات قاعدة البيانات
+            # (يتم إغلاقها تلقائياً عند إنهاء البرنامج)
+            
+            # إيقاف Webhook وإنهاء التحديثات المتبقية
+            if self.webhook_server:
+                self.webhook_server.stop()
+            self.dispatcher.stop()
+            
+            # إيقاف استقبال إشعارات التحويل
+            if self.notification_server:
+                self.notification_server.stop()
+            
+            # إرسال ما تبقى في طابور الإرسال
+            outbox.stop()
+            
+            # حفظ الجلسات المعلقة
+            session_store.stop()
+            
+            # عدادات استخدام الأكواد المتراكمة
+            code_allocator.flush_usage()
+            
+            # النشاط والأخطاء التي لم تُجمع بعد
+            stats_rollup.fold()
+            
+            # إيقاف بوول التشفير
+            hashing_executor.shutdown()
+            
+            # إيقاف نقطة المقاييس
+            if self.metrics_server:
+                self.metrics_server.stop()
+            
+            system_logger.info("🧹 تم التنظيف النهائي")
+        except Exception as e:
+            system_logger.error(f"❌ خطأ في التنظيف النهائي: {e}")
+
+
+def main():
+    """الدالة الرئيسية"""
+    try:
+        # إنشاء مدير البوت
+        bot_manager = BotManager()
+        
+        # تهيئة النظام
+        if not bot_manager.initialize():
+            system_logger.critical("❌ فشل تهيئة النظام، الخروج...")
+            sys.exit(1)
+        
+        # بدء تشغيل البوت
+        bot_manager.start()
+        
+    except Exception as e:
+        system_logger.critical(f"❌ خطأ غير متوقع: {e}")
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+فلتر بلوم - عضوية تقريبية بذاكرة ثابتة (لا يوجد "غير موجود" خاطئ)
+"""
+
+import math
+from typing import Iterable
+
+
+class BloomFilter:
+    """فلتر بلوم على bytearray مع k موضع مشتقة من تجزئة واحدة (double hashing)
+
+    التجزئة هي hash() المدمجة: عشوائية لكل عملية، لذلك الفلتر للذاكرة فقط
+    ويُبنى من قاعدة البيانات عند التشغيل (لا يُحفظ ولا يُشارك بين العمليات).
+    """
+    
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def add(self, key: str):
+        """إضافة مفتاح"""
+        h = hash(key)
+        h1, h2 = h & 0xFFFFFFFF, ((h >> 32) & 0xFFFFFFFF) | 1
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def update(self, keys: Iterable[str]) -> int:
+        """إضافة مجموعة مفاتيح - يرجع عددها"""
+        added = 0
+        for key in keys:
+            self.add(key)
+            added += 1
+        return added
+    
+    def __contains__(self, key: str) -> bool:
+        # التوقف عند أول بت فارغ: المفاتيح الجديدة تحتاج موضعين تقريباً
+        h = hash(key)
+        h1, h2 = h & 0xFFFFFFFF, ((h >> 32) & 0xFFFFFFFF) | 1
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+    
+    def memory_bytes(self) -> int:
+        """حجم مصفوفة البتات"""
+        return len(self.bits)
@@ -23,6 +23,7 @@ except ImportError:
         print("⚠️ استخدام إعدادات CACHE افتراضية")
 
 from .logger import get_logger
+from .shared_state import shared_state
 
 logger = get_logger(__name__)
 
@@ -35,30 +36,59 @@ class LRUCache:
         self.max_size = max_size
         self.hits = 0
         self.misses = 0
+        # ضربات/إخفاقات لكل نوع مفتاح (user_, setting_, ...)
+        self.namespace_hits = {}
+        self.namespace_misses = {}
         self.lock = threading.RLock()
+        
+        # خطافات الحالة المشتركة (تبقى None في وضع العملية الواحدة)
+        self.before_read = None
+        self.on_invalidate = None
+        self.on_clear = None
+        
         logger.info(f"تم تهيئة LRU Cache بحجم {max_size}")
     
     def get(self, key: str) -> Optional[Any]:
         """استرجاع قيمة من الكاش"""
+        if self.before_read:
+            self.before_read()
+        
+        namespace = self._namespace(key)
         with self.lock:
             if key in self.cache:
                 # نقل العنصر للنهاية (الأحدث)
                 self.cache.move_to_end(key)
-                self.hits += 1
                 value, expiry = self.cache[key]
                 
                 # التحقق من الصلاحية
                 if expiry and time.time() > expiry:
                     del self.cache[key]
-                    self.misses += 1
+                    self._record(namespace, hit=False)
                     return None
                 
+                self._record(namespace, hit=True)
                 return value
-            self.misses += 1
+            self._record(namespace, hit=False)
             return None
     
-    def set(self, key: str, value: Any, ttl: int = None) -> None:
-        """حفظ قيمة في الكاش"""
+    @staticmethod
+    def _namespace(key: str) -> str:
+        """نوع المفتاح (البادئة قبل أول _)"""
+        if '_' in key:
+            return key.split('_', 1)[0]
+        return 'query'
+    
+    def _record(self, namespace: str, hit: bool) -> None:
+        """تسجيل ضربة أو إخفاق (يستدعى داخل القفل)"""
+        if hit:
+            self.hits += 1
+            self.namespace_hits[namespace] = self.namespace_hits.get(namespace, 0) + 1
+        else:
+            self.misses += 1
+            self.namespace_misses[namespace] = self.namespace_misses.get(namespace, 0) + 1
+    
+    def set(self, key: str, value: Any, ttl: int = None, publish: bool = False) -> None:
+        """حفظ قيمة في الكاش (publish لإبطال نسخ العمليات الأخرى عند الكتابة)"""
         with self.lock:
             expiry = time.time() + ttl if ttl else None
             
@@ -70,21 +100,34 @@ class LRUCache:
             # إذا تجاوز الحجم، إزالة الأقدم
             if len(self.cache) > self.max_size:
                 self.cache.popitem(last=False)
+        
+        if publish and self.on_invalidate:
+            self.on_invalidate(key)
     
-    def delete(self, key: str) -> bool:
+    def delete(self, key: str, publish: bool = True) -> bool:
         """حذف قيمة من الكاش"""
         with self.lock:
-            if key in self.cache:
+            existed = key in self.cache
+            if existed:
                 del self.cache[key]
-                return True
-            return False
+        
+        # إبلاغ العمليات الأخرى (خارج القفل)
+        if publish and self.on_invalidate:
+            self.on_invalidate(key)
+        
+        return existed
     
-    def clear(self) -> None:
+    def clear(self, publish: bool = True) -> None:
         """مسح الكاش بالكامل"""
         with self.lock:
             self.cache.clear()
             self.hits = 0
             self.misses = 0
+            self.namespace_hits.clear()
+            self.namespace_misses.clear()
+        
+        if publish and self.on_clear:
+            self.on_clear()
     
     def get_stats(self) -> Dict:
         """الحصول على إحصائيات الكاش"""
@@ -97,9 +140,28 @@ class LRUCache:
                 "hits": self.hits,
                 "misses": self.misses,
                 "hit_rate": f"{hit_rate:.2f}%",
+                "hit_ratio": self.hits / total if total > 0 else 1.0,
                 "keys": list(self.cache.keys())
             }
     
+    def get_namespace_stats(self) -> Dict[str, Dict]:
+        """إحصائيات الكاش لكل نوع مفتاح"""
+        with self.lock:
+            sizes = {}
+            for key in self.cache:
+                namespace = self._namespace(key)
+                sizes[namespace] = sizes.get(namespace, 0) + 1
+            
+            namespaces = set(sizes) | set(self.namespace_hits) | set(self.namespace_misses)
+            return {
+                namespace: {
+                    "size": sizes.get(namespace, 0),
+                    "hits": self.namespace_hits.get(namespace, 0),
+                    "misses": self.namespace_misses.get(namespace, 0)
+                }
+                for namespace in namespaces
+            }
+    
     def cleanup_expired(self) -> int:
         """تنظيف العناصر المنتهية الصلاحية"""
         with self.lock:
@@ -147,8 +209,26 @@ class CacheManager:
         
         # مؤقت للتنظيف التلقائي
         self.last_cleanup = time.time()
+        
+        # ربط الكاش بالحالة المشتركة عند تشغيل أكثر من عملية
+        self.shared_state = shared_state
+        if self.shared_state:
+            self.cache.before_read = self.shared_state.sync
+            self.cache.on_invalidate = lambda key: self.shared_state.publish_invalidation('key', key)
+            # النمط الفارغ يطابق كل المفاتيح
+            self.cache.on_clear = lambda: self.shared_state.publish_invalidation('pattern', '')
+            self.shared_state.add_listener(self._apply_remote_invalidation)
+            logger.info("تم ربط الكاش بالحالة المشتركة")
+        
         logger.info("تم تهيئة CacheManager")
     
+    def _apply_remote_invalidation(self, kind: str, value: str) -> None:
+        """تطبيق حدث إبطال قادم من عملية أخرى"""
+        if kind == 'key':
+            self.cache.delete(value, publish=False)
+        elif kind == 'pattern':
+            self._invalidate_local(value)
+    
     # ========== دوال سريعة للاستخدام الشائع ==========
     
     def get_user(self, user_id: int) -> Optional[Dict]:
@@ -162,10 +242,10 @@ class CacheManager:
         # (سيتم استدعاء هذه الدالة من user_service)
         return None
     
-    def set_user(self, user_id: int, user_data: Dict, ttl: int = 300) -> None:
-        """حفظ بيانات مستخدم في الكاش"""
+    def set_user(self, user_id: int, user_data: Dict, ttl: int = 300, publish: bool = True) -> None:
+        """حفظ بيانات مستخدم في الكاش (publish=False عند التعبئة من قاعدة البيانات)"""
         cache_key = f"user_{user_id}"
-        self.cache.set(cache_key, user_data, ttl)
+        self.cache.set(cache_key, user_data, ttl, publish)
     
     def delete_user(self, user_id: int) -> None:
         """حذف بيانات مستخدم من الكاش"""
@@ -180,10 +260,10 @@ class CacheManager:
             return cached
         return default
     
-    def set_setting(self, key: str, value: Any, ttl: int = 60) -> None:
-        """حفظ إعداد في الكاش"""
+    def set_setting(self, key: str, value: Any, ttl: int = 60, publish: bool = True) -> None:
+        """حفظ إعداد في الكاش (publish=False عند التعبئة من قاعدة البيانات)"""
         cache_key = f"setting_{key}"
-        self.cache.set(cache_key, value, ttl)
+        self.cache.set(cache_key, value, ttl, publish)
     
     def delete_setting(self, key: str) -> None:
         """حذف إعداد من الكاش"""
@@ -198,16 +278,20 @@ class CacheManager:
             return cached
         return None
     
-    def set_admin_status(self, user_id: int, is_admin: bool, ttl: int = 300) -> None:
-        """حفظ حالة الأدمن"""
+    def set_admin_status(self, user_id: int, is_admin: bool, ttl: int = 300, publish: bool = True) -> None:
+        """حفظ حالة الأدمن (publish=False عند التعبئة من قاعدة البيانات)"""
         cache_key = f"admin_{user_id}"
-        self.cache.set(cache_key, is_admin, ttl)
+        self.cache.set(cache_key, is_admin, ttl, publish)
     
     def delete_admin_status(self, user_id: int) -> None:
         """حذف حالة الأدمن"""
         cache_key = f"admin_{user_id}"
         self.cache.delete(cache_key)
     
+    def clear(self) -> None:
+        """مسح الكاش في هذه العملية وباقي العمليات"""
+        self.cache.clear()
+    
     # ========== دوال متقدمة ==========
     
     def generate_cache_key(self, prefix: str, *args, **kwargs) -> str:
@@ -253,18 +337,26 @@ class CacheManager:
     
     def invalidate_pattern(self, pattern: str) -> int:
         """إبطال جميع المفاتيح التي تطابق نمطاً معيناً"""
+        count = self._invalidate_local(pattern)
+        
+        # حدث واحد للنمط بدلاً من حدث لكل مفتاح
+        if self.shared_state:
+            self.shared_state.publish_invalidation('pattern', pattern)
+        
+        logger.info(f"تم إبطال {count} مفتاح بنمط: {pattern}")
+        return count
+    
+    def _invalidate_local(self, pattern: str) -> int:
+        """إبطال محلي فقط بدون نشر"""
         count = 0
-        keys_to_delete = []
         
-        for key in self.cache.cache.keys():
-            if pattern in key:
-                keys_to_delete.append(key)
+        with self.cache.lock:
+            keys_to_delete = [key for key in self.cache.cache.keys() if pattern in key]
         
         for key in keys_to_delete:
-            if self.cache.delete(key):
+            if self.cache.delete(key, publish=False):
                 count += 1
         
-        logger.info(f"تم إبطال {count} مفتاح بنمط: {pattern}")
         return count
     
     def auto_cleanup(self):
@@ -282,13 +374,15 @@ class CacheManager:
         
         return {
             "lru_cache": cache_stats,
+            "namespaces": self.cache.get_namespace_stats(),
             "user_cache_size": len(self.user_cache),
             "settings_cache_size": len(self.settings_cache),
             "rate_limit_cache_size": len(self.rate_limit_cache),
+            "shared_state": self.shared_state.get_stats() if self.shared_state else None,
             "total_cached_items": cache_stats["size"],
             "memory_usage": "N/A"  # يمكن إضافة psutil للحساب الدقيق
         }
 
 
-# ✅ إنشاء نسخة عامة (هذا ما سيتم استيراده من main.py)
+# ✅ إنشاء نسخة عامة (هذا ما سيتم استيراده من bot_manager)
 cache = CacheManager()
\ No newline at end of file
@@ -61,6 +61,124 @@ PERFORMANCE = {
     "QUERY_TIMEOUT": 5
 }
 
+# ==================== إعدادات التسجيل ====================
+LOGGING = {
+    "LEVEL": "INFO",
+    "QUEUE_SIZE": 10000,          # 0 = بدون حد
+    "FILE_MAX_BYTES": 10 * 1024 * 1024,
+    "FILE_BACKUP_COUNT": 10,
+    "DAILY_BACKUP_COUNT": 30,
+    "CONSOLE": True,
+    "CONSOLE_COLORS": True
+}
+
+# ==================== موزع التحديثات ====================
+DISPATCHER = {
+    "WORKERS": 8,                 # عدد الطوابير التسلسلية (المستخدم الواحد دائماً على نفس الطابور)
+    "MAX_QUEUE_SIZE": 1000,
+    "PRIORITY_LANE": True,        # مسار مستقل لكال باكات الموافقة/الرفض
+    "PRIORITY_PREFIXES": ("approve_", "reject_"),
+    "POLL_TIMEOUT": 60
+}
+
+# ==================== Webhook ====================
+# بديل عن Long Polling: Telegram يرسل التحديثات مباشرة لخادم محلي
+WEBHOOK = {
+    "ENABLED": False,
+    "HOST": "0.0.0.0",
+    "PORT": 8443,
+    "PATH": "/telegram/webhook",
+    # من البيئة فقط ولا قيم افتراضية: الرمز يجب أن يبقى ثابتاً بين إعادات التشغيل والعمليات
+    "PUBLIC_URL": os.environ.get("WEBHOOK_PUBLIC_URL", ""),      # مثال: https://bot.example.com (خلف reverse proxy مع TLS)
+    "SECRET_TOKEN": os.environ.get("WEBHOOK_SECRET_TOKEN", ""),  # 1-256 حرف: A-Z a-z 0-9 _ -
+    "MAX_BODY_BYTES": 1024 * 1024
+}
+
+# ==================== المقاييس ====================
+METRICS = {
+    "SLOW_WARNING_MS": 100,
+    "SLOW_ERROR_MS": 1000,
+    # حدود هيستوغرام زمن الاستجابة (ميلي ثانية)
+    "BUCKETS_MS": [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000],
+    # نسبة العينة للدوال الساخنة جداً، مثال: {"UserService.get_user_balance": 0.1}
+    "SAMPLE_RATES": {}
+}
+
+# نقطة /metrics و /healthz (Prometheus)
+METRICS_SERVER = {
+    "ENABLED": False,
+    "HOST": "127.0.0.1",
+    "PORT": 9108
+}
+
+# ==================== نقل Telegram API ====================
+TELEGRAM_API = {
+    "POOL_CONNECTIONS": 4,        # عدد المضيفين المحفوظين في البوول
+    "POOL_MAXSIZE": 32,           # اتصالات keep-alive لكل مضيف (>= عمال الإرسال + الموزع)
+    "CONNECT_TIMEOUT": 5,
+    "READ_TIMEOUT": 15,
+    "API_URL": None               # None = api.telegram.org، أو خادم Bot API محلي
+}
+
+# ==================== طابور الإرسال الصادر ====================
+# حدود Telegram: ~30 رسالة/ثانية إجمالاً، ~1/ثانية لكل محادثة، ~20/دقيقة للمجموعة
+OUTBOX = {
+    "WORKERS": 8,
+    "GLOBAL_RATE": 30,            # رسالة/ثانية لكل البوت
+    "CHAT_RATE": 1,               # رسالة/ثانية لكل محادثة خاصة
+    "CHAT_BURST": 3,              # دفعة قصيرة مسموحة لنفس المحادثة
+    "GROUP_RATE": 20 / 60,        # للمجموعات والقنوات
+    "MAX_RETRIES": 5,
+    "EDIT_FINGERPRINTS": 10000    # آخر محتوى معروض لكل رسالة (لتخطي التعديلات المكررة)
+}
+
+# الإذاعة الجماعية (تمر عبر OUTBOX بأقل أولوية)
+BROADCAST = {
+    "BATCH_SIZE": 200,                # مستخدمون لكل دفعة (نقطة استئناف بعد كل دفعة)
+    "PROGRESS_INTERVAL_SECONDS": 5    # تحديث رسالة التقدم عند الأدمن
+}
+
+# ==================== جلسات المحادثة ====================
+SESSIONS = {
+    "FLUSH_INTERVAL_SECONDS": 2,  # الحفظ المؤجل في قاعدة البيانات
+    "MAX_DIRTY": 500              # حفظ فوري عند تراكم هذا العدد من التغييرات
+}
+
+# ==================== تشفير كلمات المرور ====================
+PASSWORD_HASHING = {
+    "ROUNDS": 12,                 # تكلفة bcrypt (كل زيادة بواحد تضاعف الوقت)
+    "POOL_SIZE": None,            # None = PERFORMANCE["THREAD_POOL_SIZE"]
+    "MAX_PENDING": 64,            # الحد الأقصى للمهام المعلقة في البوول
+    "USE_PROCESS_POOL": True,
+    "CALLBACK_WORKERS": 2         # خيوط إكمال الطلب بعد انتهاء التشفير
+}
+
+# ==================== مخازن المعرفات الفريدة ====================
+IDENTIFIER_POOLS = {
+    "TARGET_SIZE": 200,
+    "LOW_WATERMARK": 50,
+    "REFILL_INTERVAL_SECONDS": 60,
+    "INSERT_ATTEMPTS": 3,  # إعادة الإدخال بمعرف جديد عند تعارض الفهرس الفريد
+    "USERNAME_ATTEMPTS": 64  # حد محاولات حجز اسم مستخدم Ichancy
+}
+
+# ==================== أرقام عمليات الشحن ====================
+# فلتر بلوم في الذاكرة أمام جدول الأرقام الدائم: أغلب الأرقام الجديدة لا تحتاج استعلاماً
+PAYMENT_REFERENCES = {
+    "BLOOM_CAPACITY": 1_000_000,  # الحد الأدنى، ويتضاعف عدد السجلات عند التحميل
+    "BLOOM_ERROR_RATE": 0.01,     # الاشتباه الخاطئ يكلف استعلام فهرس واحد فقط
+    "LOAD_BATCH_SIZE": 50_000
+}
+
+# ==================== الحالة المشتركة بين العمليات ====================
+# عند تشغيل أكثر من عملية بوت على نفس قاعدة البيانات
+SHARED_STATE = {
+    "ENABLED": False,
+    "PATH": os.path.join(BASE_DIR, "data", "shared_state.sqlite"),
+    "SYNC_INTERVAL_MS": 200,
+    "EVENT_RETENTION_SECONDS": 3600
+}
+
 # ==================== إعدادات الدفع ====================
 PAYMENT_METHODS = {
     "syriatel_cash": "📱 سيرياتيل كاش",
@@ -68,6 +186,36 @@ PAYMENT_METHODS = {
     "sham_cash_usd": "💵 شام كاش دولار"
 }
 
+# طابور مراجعة المعاملات المعلقة
+REVIEW_QUEUE = {
+    "PAGE_SIZE": 5,
+    "LEASE_SECONDS": 180,         # مدة حجز المعاملة للأدمن الذي فتحها
+    "BULK_LIMIT": 500             # حد المعاملات في دفعة قبول/رفض واحدة
+}
+
+# ==================== أكواد سيرياتيل كاش ====================
+# توزيع طلبات الشحن على الأكواد حسب السعة المتبقية (في الذاكرة، مع مزامنة دورية)
+SYRIATEL_CODES = {
+    "HOLD_SECONDS": SYSTEM_CONSTANTS["SESSION_TTL_MINUTES"] * 60,   # حجز السعة حتى إدخال رقم العملية
+    "RELOAD_INTERVAL_SECONDS": 60,
+    "USAGE_FLUSH_INTERVAL_SECONDS": 30
+}
+
+# ==================== المطابقة التلقائية للشحن ====================
+# إشعارات التحويل (المبلغ، رقم العملية، المرسل) من ملف أو مجلد أو نقطة HTTP محلية
+# تُطابق مع طلبات الشحن المعلقة، والمطابق تماماً يُقبل تلقائياً
+DEPOSIT_MATCHING = {
+    "ENABLED": False,
+    "AUTO_APPROVE_METHODS": ("syriatel_cash", "sham_cash"),   # الدولار يحتاج سعر صرف فيذهب للأدمن
+    "FEED_FILE": None,            # ملف JSON lines يُقرأ من آخر موضع
+    "SPOOL_DIR": None,            # مجلد ملفات *.json (تُنقل إلى processed/ أو failed/)
+    "POLL_INTERVAL_SECONDS": 5,
+    "HTTP_ENABLED": False,        # POST /notifications
+    "HTTP_HOST": "127.0.0.1",
+    "HTTP_PORT": 9109,
+    "HTTP_TOKEN": os.environ.get("DEPOSIT_FEED_TOKEN")  # قيمة ترويسة X-Feed-Token (إلزامية لتشغيل HTTP)
+}
+
 # ==================== إعدادات Ichancy ====================
 ICHANCY_CONFIG = {
     "USERNAME_LENGTH": 8,
@@ -84,6 +232,17 @@ BACKUP_CONFIG = {
     "COMPRESS": True
 }
 
+# ==================== مطابقة الأرصدة ====================
+# مقارنة الأرصدة والعدادات بدفتر القيود والمعاملات، على نطاقات user_id في بوول عمليات
+RECONCILIATION = {
+    "ENABLED": True,
+    "TIME": "04:00",
+    "CHUNK_SIZE": 5000,           # مستخدمون لكل نطاق
+    "WORKERS": None,              # None = عدد الأنوية
+    "MAX_SAMPLES": 20,            # عدد الفروقات المعروضة في التقرير
+    "SEND_TO_CHANNEL": True
+}
+
 # ==================== إعدادات التقارير ====================
 REPORT_CONFIG = {
     "DAILY_REPORT_TIME": "23:59",
@@ -91,4 +250,10 @@ REPORT_CONFIG = {
     "SEND_TO_CHANNEL": True
 }
 
+# الإحصائيات اليومية (العدادات تُحدَّث مع البيانات، والنشاط والأخطاء تُضاف دورياً)
+DAILY_STATS = {
+    "FOLD_INTERVAL_SECONDS": 60,
+    "REBUILD_DAYS": 30            # أيام إعادة البناء من زر التحديث (لا تتجاوز مدة حفظ المعاملات)
+}
+
 print("✅ تم تحميل config.py بنجاح")
\ No newline at end of file
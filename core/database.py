@@ -118,9 +118,65 @@ class DatabaseManager:
                 except Exception as e:
                     logger.warning(f"خطأ في إنشاء مؤشر {idx_name}: {e}")
             
+            # المؤشرات الفريدة (تفشل مع بيانات قديمة مكررة، والتحقق في الخدمة يبقى فعالاً)
+            for idx_name, idx_sql in self._get_unique_indices():
+                try:
+                    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {idx_name} ON {idx_sql}")
+                except Exception as e:
+                    logger.warning(f"خطأ في إنشاء مؤشر فريد {idx_name}: {e}")
+            
+            # إنشاء الـ triggers
+            for trigger_name, trigger_sql in self._get_table_triggers():
+                try:
+                    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger_name} {trigger_sql}")
+                except Exception as e:
+                    logger.warning(f"خطأ في إنشاء trigger {trigger_name}: {e}")
+            
+            # أرقام عمليات الشحن السابقة لجدول الأرقام الدائم (مرة واحدة عند إنشائه)
+            cursor.execute("""
+                INSERT OR IGNORE INTO payment_references (payment_method, reference, transaction_id)
+                SELECT payment_method, transaction_id, MIN(id)
+                FROM transactions
+                WHERE type = 'charge' AND transaction_id IS NOT NULL AND payment_method IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM payment_references)
+                GROUP BY payment_method, transaction_id
+            """)
+            
+            # افتتاح دفتر القيود لمستخدمي ما قبل الدفتر (مرة واحدة لكل مستخدم)
+            for backfill_sql in self._get_ledger_openings():
+                cursor.execute(backfill_sql)
+            
             conn.commit()
             logger.info("✅ تم تهيئة قاعدة البيانات بنجاح")
     
+    def _get_ledger_openings(self) -> List[str]:
+        """جلب استعلامات افتتاح الدفتر (بالترتيب: العدادات قبل القيد الافتتاحي)
+
+        المستخدم بلا أي قيد أقدم من الدفتر، فتُحفظ عداداته كما هي ويُسجل رصيده كقيد opening،
+        والمطابقة تقارن العدادات بالافتتاح + القيود. مستخدمو ما بعد الدفتر لهم قيود فلا يُلمسون.
+        """
+        return [
+            """
+                INSERT INTO ledger_openings (user_id, total_deposit, total_withdraw, gifts_sent, gifts_received)
+                SELECT * FROM (
+                    SELECT u.user_id, u.total_deposit, u.total_withdraw,
+                           COALESCE((SELECT SUM(original_amount) FROM gift_transactions WHERE sender_id = u.user_id), 0) AS gifts_sent,
+                           COALESCE((SELECT SUM(net_amount) FROM gift_transactions WHERE receiver_id = u.user_id), 0) AS gifts_received
+                    FROM users u
+                    WHERE NOT EXISTS (SELECT 1 FROM ledger_entries l WHERE l.user_id = u.user_id)
+                      AND NOT EXISTS (SELECT 1 FROM ledger_openings o WHERE o.user_id = u.user_id)
+                )
+                WHERE total_deposit != 0 OR total_withdraw != 0 OR gifts_sent != 0 OR gifts_received != 0
+            """,
+            """
+                INSERT INTO ledger_entries (user_id, amount, balance_after, kind)
+                SELECT u.user_id, u.balance, u.balance, 'opening'
+                FROM users u
+                WHERE u.balance != 0
+                  AND NOT EXISTS (SELECT 1 FROM ledger_entries l WHERE l.user_id = u.user_id)
+            """
+        ]
+    
     def _get_table_schemas(self) -> Dict[str, str]:
         """جلب مخططات جميع الجداول"""
         return {
@@ -275,6 +331,84 @@ class DatabaseManager:
                     updated_at TEXT DEFAULT CURRENT_TIMESTAMP
                 )
             """,
+            "sessions": """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    user_id INTEGER PRIMARY KEY,
+                    step TEXT NOT NULL,
+                    temp_data TEXT,
+                    expires_at REAL NOT NULL
+                )
+            """,
+            "broadcasts": """
+                CREATE TABLE IF NOT EXISTS broadcasts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    text TEXT NOT NULL,
+                    created_by INTEGER NOT NULL,
+                    status TEXT DEFAULT 'running' CHECK(status IN ('running', 'completed', 'cancelled')),
+                    total INTEGER DEFAULT 0,
+                    last_user_id INTEGER DEFAULT 0,
+                    sent INTEGER DEFAULT 0,
+                    failed INTEGER DEFAULT 0,
+                    blocked INTEGER DEFAULT 0,
+                    progress_chat_id INTEGER,
+                    progress_message_id INTEGER,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    finished_at TEXT
+                )
+            """,
+            "blocked_users": """
+                CREATE TABLE IF NOT EXISTS blocked_users (
+                    user_id INTEGER PRIMARY KEY,
+                    broadcast_id INTEGER,
+                    blocked_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """,
+            "ledger_entries": """
+                CREATE TABLE IF NOT EXISTS ledger_entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    amount INTEGER NOT NULL,
+                    balance_after INTEGER NOT NULL CHECK(balance_after >= 0),
+                    kind TEXT NOT NULL,
+                    reference TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """,
+            "ledger_openings": """
+                CREATE TABLE IF NOT EXISTS ledger_openings (
+                    user_id INTEGER PRIMARY KEY,
+                    total_deposit INTEGER NOT NULL DEFAULT 0,
+                    total_withdraw INTEGER NOT NULL DEFAULT 0,
+                    gifts_sent INTEGER NOT NULL DEFAULT 0,
+                    gifts_received INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """,
+            "review_leases": """
+                CREATE TABLE IF NOT EXISTS review_leases (
+                    transaction_id INTEGER PRIMARY KEY,
+                    admin_id INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    FOREIGN KEY (transaction_id) REFERENCES transactions (id) ON DELETE CASCADE
+                )
+            """,
+            "payment_notifications": """
+                CREATE TABLE IF NOT EXISTS payment_notifications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payment_method TEXT NOT NULL,
+                    reference TEXT NOT NULL,
+                    amount INTEGER NOT NULL CHECK(amount > 0),
+                    sender TEXT,
+                    receiver TEXT,
+                    source TEXT,
+                    status TEXT DEFAULT 'unmatched' CHECK(status IN ('unmatched', 'matched', 'review')),
+                    transaction_id INTEGER,
+                    notes TEXT,
+                    received_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    matched_at TEXT
+                )
+            """,
             "daily_stats": """
                 CREATE TABLE IF NOT EXISTS daily_stats (
                     date TEXT PRIMARY KEY,
@@ -290,6 +424,25 @@ class DatabaseManager:
                     system_errors INTEGER DEFAULT 0,
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP
                 )
+            """,
+            "payment_references": """
+                CREATE TABLE IF NOT EXISTS payment_references (
+                    payment_method TEXT NOT NULL,
+                    reference TEXT NOT NULL,
+                    transaction_id INTEGER,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (payment_method, reference)
+                ) WITHOUT ROWID
+            """,
+            "daily_transaction_stats": """
+                CREATE TABLE IF NOT EXISTS daily_transaction_stats (
+                    date TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    count INTEGER DEFAULT 0,
+                    amount INTEGER DEFAULT 0,
+                    PRIMARY KEY (date, type, status)
+                ) WITHOUT ROWID
             """
         }
     
@@ -303,16 +456,101 @@ class DatabaseManager:
             ("idx_transactions_status", "transactions(status)"),
             ("idx_transactions_created", "transactions(created_at DESC)"),
             ("idx_transactions_type", "transactions(type)"),
+            # طابور المراجعة: ترتيب وعد المعلقة فقط (فهرس جزئي صغير)
+            ("idx_transactions_pending", "transactions(created_at, id) WHERE status = 'pending'"),
+            ("idx_transactions_pending_type", "transactions(type, created_at, id) WHERE status = 'pending'"),
             ("idx_ichancy_username", "ichancy_accounts(ichancy_username)"),
+            ("idx_ichancy_created", "ichancy_accounts(created_at DESC, user_id DESC)"),
             ("idx_admins_added", "admins(added_at DESC)"),
             ("idx_referrals_referrer", "referrals(referrer_id)"),
             ("idx_referrals_referred", "referrals(referred_id)"),
             ("idx_gift_codes_expires", "gift_codes(expires_at)"),
             ("idx_gift_codes_used", "gift_codes(used_count)"),
             ("idx_codes_active", "syriatel_codes(is_active)"),
-            ("idx_codes_amount", "syriatel_codes(current_amount)")
+            ("idx_codes_amount", "syriatel_codes(current_amount)"),
+            ("idx_broadcasts_status", "broadcasts(status)"),
+            ("idx_sessions_expires", "sessions(expires_at)"),
+            ("idx_ledger_user", "ledger_entries(user_id, id)"),
+            ("idx_gift_tx_sender", "gift_transactions(sender_id)"),
+            ("idx_gift_tx_receiver", "gift_transactions(receiver_id)"),
+            ("idx_notifications_unmatched", "payment_notifications(received_at) WHERE status = 'unmatched'")
+        ]
+    
+    def _get_unique_indices(self) -> List[Tuple]:
+        """جلب قائمة المؤشرات الفريدة"""
+        return [
+            # بحث طلب الشحن برقم العملية (منع التكرار نفسه في جدول payment_references)
+            ("idx_transactions_charge_reference",
+             "transactions(payment_method, transaction_id) WHERE type = 'charge' AND transaction_id IS NOT NULL"),
+            # إعادة إرسال نفس الإشعار من المصدر لا تُسجل مرتين
+            ("idx_notifications_reference", "payment_notifications(payment_method, reference)")
+        ]
+    
+    def _get_table_triggers(self) -> List[Tuple]:
+        """جلب قائمة الـ triggers"""
+        # دفتر القيود للإضافة فقط، التصحيح يكون بقيد معاكس
+        return [
+            ("trg_ledger_no_update", "BEFORE UPDATE ON ledger_entries BEGIN SELECT RAISE(ABORT, 'ledger_entries is append-only'); END"),
+            ("trg_ledger_no_delete", "BEFORE DELETE ON ledger_entries BEGIN SELECT RAISE(ABORT, 'ledger_entries is append-only'); END"),
+            
+            # رقم عملية الشحن يُسجل في جدول دائم لا يشمله حذف المعاملات القديمة، والتكرار
+            # يفشل على مفتاحه الأساسي فيُلغى إدخال المعاملة نفسها
+            ("trg_payment_reference_insert", """
+                AFTER INSERT ON transactions
+                WHEN NEW.type = 'charge' AND NEW.transaction_id IS NOT NULL AND NEW.payment_method IS NOT NULL BEGIN
+                    INSERT INTO payment_references (payment_method, reference, transaction_id)
+                    VALUES (NEW.payment_method, NEW.transaction_id, NEW.id);
+                END
+            """),
+            
+            # الإحصائيات اليومية تُحدَّث مع البيانات نفسها (يوم إنشاء الطلب، والحذف لا يغير التاريخ)
+            ("trg_stats_transaction_insert", """
+                AFTER INSERT ON transactions WHEN NEW.type IN ('charge', 'withdraw') BEGIN
+                    INSERT INTO daily_transaction_stats (date, type, status, count, amount)
+                    VALUES (date(NEW.created_at), NEW.type, NEW.status, 1, NEW.amount)
+                    ON CONFLICT(date, type, status) DO UPDATE SET count = count + 1, amount = amount + excluded.amount;
+                END
+            """),
+            ("trg_stats_transaction_update", """
+                AFTER UPDATE OF status, amount ON transactions
+                WHEN NEW.type IN ('charge', 'withdraw') AND (NEW.status IS NOT OLD.status OR NEW.amount IS NOT OLD.amount) BEGIN
+                    UPDATE daily_transaction_stats SET count = count - 1, amount = amount - OLD.amount
+                    WHERE date = date(OLD.created_at) AND type = OLD.type AND status = OLD.status;
+                    INSERT INTO daily_transaction_stats (date, type, status, count, amount)
+                    VALUES (date(NEW.created_at), NEW.type, NEW.status, 1, NEW.amount)
+                    ON CONFLICT(date, type, status) DO UPDATE SET count = count + 1, amount = amount + excluded.amount;
+                END
+            """),
+            ("trg_stats_user_insert", """
+                AFTER INSERT ON users BEGIN
+                    INSERT INTO daily_stats (date, new_users, active_users) VALUES (date(NEW.created_at), 1, 1)
+                    ON CONFLICT(date) DO UPDATE SET new_users = new_users + 1, active_users = active_users + 1;
+                END
+            """),
+            # أول نشاط للمستخدم في اليوم فقط
+            ("trg_stats_user_active", """
+                AFTER UPDATE OF last_active ON users
+                WHEN date(NEW.last_active) IS NOT date(OLD.last_active) BEGIN
+                    INSERT INTO daily_stats (date, active_users) VALUES (date(NEW.last_active), 1)
+                    ON CONFLICT(date) DO UPDATE SET active_users = active_users + 1;
+                END
+            """)
         ]
     
+    @contextmanager
+    def transaction(self):
+        """معاملة ذرية (BEGIN IMMEDIATE) مع تراجع كامل عند أي خطأ"""
+        with self.pool.get_connection() as conn:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+    
     def execute_query(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
         """تنفيذ استعلام بأداء عالي"""
         with self.pool.get_connection() as conn:
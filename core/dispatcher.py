@@ -0,0 +1,154 @@
+"""
+موزع التحديثات - ترتيب لكل مستخدم وتوازي بين المستخدمين
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+
+from .config import DISPATCHER
+from .metrics import metrics
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# أنواع التحديثات التي تحتوي from_user
+_USER_UPDATE_FIELDS = (
+    "message", "edited_message", "callback_query", "inline_query",
+    "chosen_inline_result", "shipping_query", "pre_checkout_query",
+    "my_chat_member", "chat_member", "chat_join_request"
+)
+
+_STOP = object()
+
+
+def get_update_user_id(update) -> Optional[int]:
+    """استخراج معرف المستخدم من التحديث"""
+    for field in _USER_UPDATE_FIELDS:
+        obj = getattr(update, field, None)
+        if obj is not None and getattr(obj, "from_user", None) is not None:
+            return obj.from_user.id
+    return None
+
+
+def is_priority_update(update) -> bool:
+    """كال باكات موافقة/رفض الأدمن تذهب لمسار الأولوية"""
+    call = getattr(update, "callback_query", None)
+    if call is None or not call.data:
+        return False
+    return call.data.startswith(tuple(DISPATCHER["PRIORITY_PREFIXES"]))
+
+
+class UpdateDispatcher:
+    """يوزع التحديثات على N طابور تسلسلي حسب المستخدم"""
+    
+    def __init__(self, process: Callable[[list], None], workers: int = 8,
+                 max_queue_size: int = 1000, priority_lane: bool = True):
+        self.process = process
+        self.workers = workers
+        self.queues: List[queue.Queue] = [queue.Queue(maxsize=max_queue_size) for _ in range(workers)]
+        self.priority_queue: Optional[queue.Queue] = queue.Queue(maxsize=max_queue_size) if priority_lane else None
+        self.threads: List[threading.Thread] = []
+        self.running = False
+        
+        self.wait_histogram = metrics.histogram("dispatcher.queue_wait")
+        self.dispatched = metrics.counter("dispatcher.dispatched")
+        self.failed = metrics.counter("dispatcher.failed")
+        for index, lane in enumerate(self.queues):
+            metrics.gauge(f"dispatcher.queue_depth.{index}", func=lane.qsize)
+        if self.priority_queue is not None:
+            metrics.gauge("dispatcher.queue_depth.priority", func=self.priority_queue.qsize)
+    
+    def start(self):
+        """تشغيل العمال"""
+        if self.running:
+            return
+        
+        self.running = True
+        lanes = list(enumerate(self.queues))
+        if self.priority_queue is not None:
+            lanes.append(("priority", self.priority_queue))
+        
+        for name, lane in lanes:
+            thread = threading.Thread(
+                target=self._worker,
+                args=(lane,),
+                daemon=True,
+                name=f"dispatcher-{name}"
+            )
+            thread.start()
+            self.threads.append(thread)
+        
+        logger.info(f"✅ تم تشغيل موزع التحديثات بـ {self.workers} عامل")
+    
+    def _lane_for(self, update) -> queue.Queue:
+        """اختيار الطابور المناسب للتحديث"""
+        if self.priority_queue is not None and is_priority_update(update):
+            return self.priority_queue
+        
+        user_id = get_update_user_id(update)
+        key = user_id if user_id is not None else update.update_id
+        return self.queues[hash(key) % self.workers]
+    
+    def submit(self, update):
+        """إضافة تحديث (ينتظر إذا امتلأ الطابور)"""
+        self._lane_for(update).put((time.perf_counter(), update))
+    
+    def submit_many(self, updates: Iterable):
+        """إضافة دفعة تحديثات بالترتيب"""
+        for update in updates:
+            self.submit(update)
+    
+    def _worker(self, lane: queue.Queue):
+        """عامل تسلسلي لطابور واحد"""
+        while True:
+            item = lane.get()
+            if item is _STOP:
+                break
+            
+            enqueued_at, update = item
+            self.wait_histogram.observe((time.perf_counter() - enqueued_at) * 1000)
+            try:
+                self.process([update])
+                self.dispatched.inc()
+            except Exception as e:
+                self.failed.inc()
+                logger.error(f"خطأ في معالجة التحديث {getattr(update, 'update_id', '?')}: {e}")
+    
+    def get_stats(self) -> dict:
+        """إحصائيات الطوابير"""
+        depths = [lane.qsize() for lane in self.queues]
+        return {
+            "workers": self.workers,
+            "queue_depths": depths,
+            "total_pending": sum(depths),
+            "priority_pending": self.priority_queue.qsize() if self.priority_queue is not None else 0,
+            "dispatched": self.dispatched.value,
+            "failed": self.failed.value
+        }
+    
+    def stop(self, timeout: float = 5.0):
+        """إيقاف العمال بعد إنهاء ما في الطوابير"""
+        if not self.running:
+            return
+        
+        self.running = False
+        lanes = list(self.queues)
+        if self.priority_queue is not None:
+            lanes.append(self.priority_queue)
+        for lane in lanes:
+            lane.put(_STOP)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+
+def create_dispatcher(process: Callable[[list], None]) -> UpdateDispatcher:
+    """إنشاء الموزع من الإعدادات"""
+    return UpdateDispatcher(
+        process,
+        DISPATCHER["WORKERS"],
+        DISPATCHER["MAX_QUEUE_SIZE"],
+        DISPATCHER["PRIORITY_LANE"]
+    )
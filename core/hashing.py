@@ -0,0 +1,20 @@
+"""
+دوال bcrypt الخام - تعمل داخل عمليات البوول المنفصلة
+"""
+
+import bcrypt
+
+
+def bcrypt_hash(password: str, rounds: int) -> str:
+    """تشفير كلمة مرور"""
+    salt = bcrypt.gensalt(rounds=rounds)
+    return bcrypt.hashpw(password.encode(), salt).decode()
+
+
+def bcrypt_check(hashed_password: str, password: str) -> bool:
+    """التحقق من كلمة مرور"""
+    try:
+        return bcrypt.checkpw(password.encode(), hashed_password.encode())
+    except ValueError:
+        # hash غير صالح (مثل كلمة مرور مخفية)
+        return False
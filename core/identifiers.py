@@ -0,0 +1,320 @@
+"""
+مخازن المعرفات الفريدة المولدة مسبقاً - بدون محاولات تكرار
+"""
+
+import sqlite3
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from .config import IDENTIFIER_POOLS, PAYMENT_REFERENCES, SYSTEM_CONSTANTS
+from .bloom import BloomFilter
+from .database import db
+from .security import token_generator
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class IdentifierPool:
+    """مخزن معرفات غير مستخدمة (يتم التحقق منها دفعة واحدة مقابل الجدول)"""
+    
+    def __init__(self, name: str, table: str, column: str, generator: Callable[[], str],
+                 target_size: int = 200, low_watermark: int = 50):
+        self.name = name
+        self.table = table
+        self.column = column
+        self.generator = generator
+        self.target_size = target_size
+        self.low_watermark = low_watermark
+        self.available = deque()
+        self.reserved: Set[str] = set()
+        self.lock = threading.Lock()
+        self.refill_lock = threading.Lock()
+        self.stats = {"taken": 0, "refills": 0, "discarded": 0, "sync_refills": 0, "collisions": 0}
+    
+    def _existing(self, candidates: Iterable[str]) -> Set[str]:
+        """المعرفات الموجودة مسبقاً في الجدول (استعلام واحد)"""
+        candidates = list(candidates)
+        if not candidates:
+            return set()
+        
+        placeholders = ', '.join('?' * len(candidates))
+        query = f"SELECT {self.column} FROM {self.table} WHERE {self.column} IN ({placeholders})"
+        return {row[0] for row in db.fetch_all(query, tuple(candidates))}
+    
+    def refill(self) -> int:
+        """تعبئة المخزن حتى الحجم المطلوب"""
+        # تعبئة واحدة في نفس الوقت
+        if not self.refill_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self.lock:
+                # المعرفات المحجوزة القديمة أصبحت في الجدول ويكشفها الاستعلام
+                if len(self.reserved) > self.target_size * 10:
+                    self.reserved.clear()
+                needed = self.target_size - len(self.available)
+                known = set(self.available) | self.reserved
+            if needed <= 0:
+                return 0
+            
+            candidates = set()
+            while len(candidates) < needed:
+                candidate = self.generator()
+                if candidate not in known:
+                    candidates.add(candidate)
+            
+            taken = self._existing(candidates)
+            fresh = candidates - taken
+            
+            with self.lock:
+                self.available.extend(fresh)
+                self.stats["refills"] += 1
+                self.stats["discarded"] += len(taken)
+            
+            logger.debug(f"تعبئة مخزن {self.name}: {len(fresh)} معرف ({len(taken)} مستخدم مسبقاً)")
+            return len(fresh)
+        except Exception as e:
+            logger.error(f"خطأ في تعبئة مخزن {self.name}: {e}")
+            return 0
+        finally:
+            self.refill_lock.release()
+    
+    def _refill_in_background(self):
+        """تعبئة في خيط منفصل"""
+        threading.Thread(target=self.refill, daemon=True, name=f"pool-{self.name}").start()
+    
+    def take(self) -> str:
+        """حجز معرف غير مستخدم"""
+        with self.lock:
+            value = self.available.popleft() if self.available else None
+            remaining = len(self.available)
+        
+        if value is None:
+            # المخزن فارغ (أول استخدام): تعبئة متزامنة باستعلام واحد
+            self.refill()
+            with self.lock:
+                self.stats["sync_refills"] += 1
+                value = self.available.popleft() if self.available else self.generator()
+                remaining = len(self.available)
+        
+        with self.lock:
+            self.reserved.add(value)
+            self.stats["taken"] += 1
+        
+        if remaining < self.low_watermark:
+            self._refill_in_background()
+        
+        return value
+    
+    def insert(self, insert: Callable[[str], None], attempts: int = None) -> str:
+        """حجز معرف وإدخاله، مع إعادة المحاولة بمعرف جديد عند تعارض الفهرس الفريد
+
+        المخزن يتحقق من المعرفات قبل تسليمها، لكن المعرف الاحتياطي من المولد (عند فشل
+        التعبئة) أو معرف أُدخل من عملية أخرى بعد التحقق قد يتعارض.
+        """
+        attempts = attempts or IDENTIFIER_POOLS["INSERT_ATTEMPTS"]
+        for attempt in range(1, attempts + 1):
+            value = self.take()
+            try:
+                insert(value)
+                return value
+            except sqlite3.IntegrityError as e:
+                if f"{self.table}.{self.column}" not in str(e) or attempt == attempts:
+                    raise
+                with self.lock:
+                    self.stats["collisions"] += 1
+                logger.warning(f"تعارض معرف {self.name} ({value})، إعادة المحاولة بمعرف جديد")
+    
+    def get_stats(self) -> Dict:
+        """إحصائيات المخزن"""
+        with self.lock:
+            return {
+                **self.stats,
+                "available": len(self.available),
+                "reserved": len(self.reserved)
+            }
+
+
+class UsernameRegistry:
+    """فلتر عضوية لأسماء مستخدمي Ichancy الموجودة (في الذاكرة)"""
+    
+    # عدد المحاولات قبل توسيع اللاحقة الرقمية
+    SHORT_SUFFIX_ATTEMPTS = 8
+    
+    def __init__(self):
+        self.names: Set[str] = set()
+        self.loaded = False
+        self.lock = threading.Lock()
+    
+    def load(self) -> int:
+        """تحميل الأسماء الموجودة من قاعدة البيانات"""
+        rows = db.fetch_all("SELECT ichancy_username FROM ichancy_accounts")
+        with self.lock:
+            self.names.update(row[0] for row in rows)
+            self.loaded = True
+            count = len(self.names)
+        logger.info(f"تم تحميل {count} اسم مستخدم Ichancy في فلتر العضوية")
+        return count
+    
+    def _ensure_loaded(self):
+        """تحميل الأسماء عند أول استخدام"""
+        if not self.loaded:
+            self.load()
+    
+    def exists(self, username: str) -> bool:
+        """التحقق من وجود اسم"""
+        self._ensure_loaded()
+        return username in self.names
+    
+    def allocate(self, base_name: str) -> str:
+        """حجز اسم مستخدم غير مستخدم (بدون استعلامات)"""
+        self._ensure_loaded()
+        with self.lock:
+            for attempt in range(IDENTIFIER_POOLS["USERNAME_ATTEMPTS"]):
+                digits = 4 if attempt < self.SHORT_SUFFIX_ATTEMPTS else 6
+                username = token_generator.generate_ichancy_username(base_name, digits)
+                if username not in self.names:
+                    self.names.add(username)
+                    return username
+        
+        raise RuntimeError(f"تعذر حجز اسم مستخدم غير مستخدم لـ {base_name}")
+    
+    def release(self, username: str):
+        """إلغاء حجز اسم لم يتم استخدامه"""
+        with self.lock:
+            self.names.discard(username)
+    
+    def get_stats(self) -> Dict:
+        """إحصائيات الفلتر"""
+        return {"loaded": self.loaded, "size": len(self.names)}
+
+
+class PaymentReferenceRegistry:
+    """فلتر بلوم لأرقام عمليات الشحن المستخدمة (طريقة الدفع + رقم العملية)
+
+    "غير موجود" في الفلتر مؤكد فلا يحتاج استعلاماً، و"ربما موجود" يُتحقق منه
+    من جدول الأرقام الدائم. قبل اكتمال التحميل كل رقم يُتحقق منه من قاعدة البيانات.
+    الفلتر لكل عملية ولا يرى أرقام العمليات الأخرى: المفتاح الأساسي لجدول الأرقام
+    هو الضمان، والفلتر يوفر الاستعلام فقط.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float, batch_size: int):
+        self.min_capacity = capacity
+        self.error_rate = error_rate
+        self.batch_size = batch_size
+        self.filter = BloomFilter(capacity, error_rate)
+        self.pending: Optional[List[str]] = None
+        self.loaded = False
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.stats = {"checks": 0, "skipped_queries": 0, "loads": 0}
+    
+    @staticmethod
+    def _key(payment_method: str, reference: str) -> str:
+        return f"{payment_method}\x1f{reference}"
+    
+    def load(self) -> int:
+        """بناء فلتر جديد من جدول الأرقام الدائم (دفعات بترتيب المفتاح) ثم استبداله"""
+        if not self.load_lock.acquire(blocking=False):
+            return 0
+        try:
+            count = db.fetch_one("SELECT COUNT(*) FROM payment_references")[0]
+            bloom = BloomFilter(max(self.min_capacity, count * 2), self.error_rate)
+            
+            # الأرقام المضافة أثناء التحميل تُنسخ للفلتر الجديد قبل استبداله
+            with self.lock:
+                self.pending = []
+            
+            query = """
+                SELECT payment_method, reference FROM payment_references
+                WHERE (payment_method, reference) > (?, ?)
+                ORDER BY payment_method, reference
+                LIMIT ?
+            """
+            last = ('', '')
+            while True:
+                rows = db.fetch_all(query, (*last, self.batch_size))
+                if not rows:
+                    break
+                last = (rows[-1][0], rows[-1][1])
+                for row in rows:
+                    bloom.add(self._key(row[0], row[1]))
+            
+            with self.lock:
+                bloom.update(self.pending)
+                self.pending = None
+                self.filter = bloom
+                self.loaded = True
+                self.stats["loads"] += 1
+            
+            logger.info(
+                f"تم تحميل {bloom.count:,} رقم عملية في فلتر بلوم "
+                f"({bloom.memory_bytes() / 1024 / 1024:.1f} MB)"
+            )
+            return bloom.count
+        except Exception as e:
+            with self.lock:
+                self.pending = None
+            logger.error(f"خطأ في تحميل أرقام عمليات الشحن: {e}")
+            return 0
+        finally:
+            self.load_lock.release()
+    
+    def load_in_background(self):
+        """تحميل في خيط منفصل (الفحص يعود لقاعدة البيانات حتى ينتهي)"""
+        threading.Thread(target=self.load, daemon=True, name="payment-references").start()
+    
+    def might_exist(self, payment_method: str, reference: str) -> bool:
+        """False = الرقم جديد مؤكد، True = يجب التحقق من قاعدة البيانات"""
+        self.stats["checks"] += 1
+        if not self.loaded or self._key(payment_method, reference) in self.filter:
+            return True
+        self.stats["skipped_queries"] += 1
+        return False
+    
+    def add(self, payment_method: str, reference: str):
+        """تسجيل رقم عملية بعد حفظ الطلب"""
+        key = self._key(payment_method, reference)
+        with self.lock:
+            self.filter.add(key)
+            if self.pending is not None:
+                self.pending.append(key)
+            # تجاوز السعة يرفع نسبة الخطأ: إعادة بناء بحجم أكبر
+            grow = self.loaded and self.filter.count > self.filter.capacity
+        
+        if grow:
+            self.load_in_background()
+    
+    def get_stats(self) -> Dict:
+        """إحصائيات الفلتر"""
+        return {
+            **self.stats,
+            "loaded": self.loaded,
+            "size": self.filter.count,
+            "capacity": self.filter.capacity,
+            "memory_bytes": self.filter.memory_bytes()
+        }
+
+
+# نسخ عامة
+referral_code_pool = IdentifierPool(
+    "referral_codes", "users", "referral_code",
+    lambda: f"REF{token_generator.generate_code(SYSTEM_CONSTANTS['REFERRAL_CODE_LENGTH'])}",
+    IDENTIFIER_POOLS["TARGET_SIZE"], IDENTIFIER_POOLS["LOW_WATERMARK"]
+)
+gift_code_pool = IdentifierPool(
+    "gift_codes", "gift_codes", "code",
+    lambda: token_generator.generate_code(SYSTEM_CONSTANTS['GIFT_CODE_LENGTH']),
+    IDENTIFIER_POOLS["TARGET_SIZE"], IDENTIFIER_POOLS["LOW_WATERMARK"]
+)
+username_registry = UsernameRegistry()
+payment_references = PaymentReferenceRegistry(
+    PAYMENT_REFERENCES["BLOOM_CAPACITY"], PAYMENT_REFERENCES["BLOOM_ERROR_RATE"],
+    PAYMENT_REFERENCES["LOAD_BATCH_SIZE"]
+)
+
+
+def refill_identifier_pools() -> int:
+    """تعبئة جميع المخازن (مهمة مجدولة)"""
+    return referral_code_pool.refill() + gift_code_pool.refill()
@@ -2,16 +2,24 @@
 نظام تسجيل متقدم مع تخصيص
 """
 
+import atexit
+import copy
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import (
+    RotatingFileHandler, TimedRotatingFileHandler, QueueHandler, QueueListener
+)
 import os
+import threading
 from datetime import datetime
-from .config import LOG_PATH
+from .config import LOG_PATH, LOGGING
 
 # إنشاء مجلد اللوجات إذا لم يكن موجوداً
 os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
 
 class CustomFormatter(logging.Formatter):
     """فورماتور مخصص مع ألوان"""
@@ -27,6 +35,9 @@ class CustomFormatter(logging.Formatter):
     }
     
     def format(self, record):
+        # نسخة لأن نفس السجل يمر على باقي الـ handlers (الملفات بدون ألوان)
+        record = copy.copy(record)
+        
         # إضافة الوقت والاسم
         log_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         record.asctime = log_time
@@ -41,57 +52,127 @@ class CustomFormatter(logging.Formatter):
         return super().format(record)
 
 
-def setup_logger(name: str, level=logging.INFO) -> logging.Logger:
-    """إعداد وتكوين اللوجر"""
-    
-    # إنشاء اللوجر
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler لا يوقف خيط المعالج إذا امتلأ الطابور (يسقط السجل ويعده)"""
     
-    # منع التكرار
-    if logger.handlers:
-        return logger
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
     
-    # تنسيق اللوج
-    formatter = CustomFormatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_pipeline_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+
+
+def _build_sink_handlers(level) -> list:
+    """إنشاء handlers الكتابة الفعلية (نسخة واحدة لكل النظام)"""
+    file_formatter = logging.Formatter(LOG_FORMAT)
     
     # Handler للملف مع تدوير حسب الحجم
     file_handler = RotatingFileHandler(
         LOG_PATH,
-        maxBytes=10*1024*1024,  # 10 MB
-        backupCount=10,
+        maxBytes=LOGGING["FILE_MAX_BYTES"],
+        backupCount=LOGGING["FILE_BACKUP_COUNT"],
         encoding='utf-8'
     )
     file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    ))
+    file_handler.setFormatter(file_formatter)
     
     # Handler للملف اليومي
     daily_handler = TimedRotatingFileHandler(
         LOG_PATH.replace('.log', '_daily.log'),
         when='midnight',
         interval=1,
-        backupCount=30,
+        backupCount=LOGGING["DAILY_BACKUP_COUNT"],
         encoding='utf-8'
     )
     daily_handler.setLevel(logging.INFO)
-    daily_handler.setFormatter(logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    ))
+    daily_handler.setFormatter(file_formatter)
+    
+    handlers = [file_handler, daily_handler]
     
     # Handler للكونسول
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
-    console_handler.setFormatter(formatter)
+    if LOGGING["CONSOLE"]:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(level)
+        if LOGGING["CONSOLE_COLORS"]:
+            console_handler.setFormatter(CustomFormatter(LOG_FORMAT, datefmt='%Y-%m-%d %H:%M:%S'))
+        else:
+            console_handler.setFormatter(file_formatter)
+        handlers.append(console_handler)
+    
+    return handlers
+
+
+def setup_logging() -> QueueHandler:
+    """تهيئة خط التسجيل: QueueHandler على الجذر + QueueListener يكتب في خيط منفصل"""
+    global _queue_handler, _listener
+    
+    with _pipeline_lock:
+        if _queue_handler is not None:
+            return _queue_handler
+        
+        level = getattr(logging, LOGGING["LEVEL"], logging.INFO)
+        log_queue = queue.Queue(maxsize=LOGGING["QUEUE_SIZE"])
+        
+        _queue_handler = BoundedQueueHandler(log_queue)
+        _listener = QueueListener(
+            log_queue,
+            *_build_sink_handlers(level),
+            respect_handler_level=True
+        )
+        _listener.start()
+        
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_queue_handler)
+        
+        atexit.register(shutdown_logging)
+        return _queue_handler
+
+
+def shutdown_logging():
+    """تفريغ الطابور وإغلاق ملفات اللوج"""
+    global _queue_handler, _listener
     
-    # إضافة ال handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(daily_handler)
-    logger.addHandler(console_handler)
+    with _pipeline_lock:
+        if _listener is None:
+            return
+        
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _queue_handler = None
+        _listener = None
+
+
+def get_logging_stats() -> dict:
+    """إحصائيات خط التسجيل"""
+    if _queue_handler is None:
+        return {"running": False}
+    
+    return {
+        "running": True,
+        "queue_size": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped
+    }
+
+
+def setup_logger(name: str, level=logging.INFO) -> logging.Logger:
+    """إعداد وتكوين اللوجر"""
+    setup_logging()
+    
+    # اللوجر يمرر السجلات للجذر (لا handlers خاصة به)
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
     
     return logger
 
@@ -110,25 +191,9 @@ error_logger = get_logger("Error")
 
 # دالة لرصد الأداء
 def performance_logger(func):
-    """ديكورير لقياس وقت التنفيذ"""
-    def wrapper(*args, **kwargs):
-        start_time = datetime.now()
-        result = func(*args, **kwargs)
-        end_time = datetime.now()
-        
-        execution_time = (end_time - start_time).total_seconds()
-        
-        if execution_time > 0.1:  # أكثر من 100ms
-            bot_logger.warning(
-                f"الأداء: {func.__name__} استغرق {execution_time:.3f} ثانية"
-            )
-        elif execution_time > 1.0:  # أكثر من 1 ثانية
-            bot_logger.error(
-                f"الأداء البطيء: {func.__name__} استغرق {execution_time:.3f} ثانية"
-            )
-        
-        return result
-    return wrapper
+    """ديكورير لقياس وقت التنفيذ (يسجل في هيستوغرام العملية)"""
+    from .metrics import metrics
+    return metrics.timer()(func)
 
 
 # دالة لتسجيل الأحداث المهمة
@@ -0,0 +1,223 @@
+"""
+سجل المقاييس - هيستوغرامات زمن الاستجابة والعدادات بتكلفة منخفضة
+"""
+
+import functools
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List
+
+from .config import METRICS
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Counter:
+    """عداد تراكمي"""
+    
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.value = 0
+        self.lock = threading.Lock()
+    
+    def inc(self, amount: int = 1):
+        """زيادة العداد"""
+        with self.lock:
+            self.value += amount
+
+
+class Gauge:
+    """قيمة لحظية (تضبط يدوياً أو تقرأ من دالة)"""
+    
+    def __init__(self, name: str, description: str = "", func: Callable[[], float] = None):
+        self.name = name
+        self.description = description
+        self.func = func
+        self.value = 0
+    
+    def set(self, value: float):
+        """ضبط القيمة"""
+        self.value = value
+    
+    def get(self) -> float:
+        """قراءة القيمة الحالية"""
+        if self.func:
+            try:
+                return self.func()
+            except Exception as e:
+                logger.error(f"خطأ في قراءة المقياس {self.name}: {e}")
+                return 0
+        return self.value
+
+
+class Histogram:
+    """هيستوغرام بحدود ثابتة (بالميلي ثانية)"""
+    
+    def __init__(self, name: str, buckets: List[float], description: str = ""):
+        self.name = name
+        self.description = description
+        self.buckets = sorted(buckets)
+        # خانة إضافية لما فوق آخر حد (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+    
+    def observe(self, value_ms: float):
+        """تسجيل قيمة"""
+        index = bisect_left(self.buckets, value_ms)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value_ms
+            if value_ms > self.max:
+                self.max = value_ms
+    
+    def percentile(self, q: float) -> float:
+        """تقدير النسبة المئوية بالاستيفاء داخل الخانة"""
+        with self.lock:
+            counts = list(self.counts)
+            total = self.count
+            max_value = self.max
+        
+        if total == 0:
+            return 0.0
+        
+        rank = q / 100 * total
+        cumulative = 0
+        for i, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else max_value
+                fraction = (rank - cumulative) / bucket_count
+                return min(lower + (upper - lower) * fraction, max_value)
+            cumulative += bucket_count
+        
+        return max_value
+    
+    def summary(self) -> Dict:
+        """ملخص الهيستوغرام"""
+        with self.lock:
+            count = self.count
+            total = self.total
+            max_value = self.max
+        
+        return {
+            "count": count,
+            "avg_ms": round(total / count, 3) if count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(max_value, 3)
+        }
+
+
+class MetricsRegistry:
+    """سجل مركزي لكل المقاييس"""
+    
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counters: Dict[str, Counter] = {}
+        self.gauges: Dict[str, Gauge] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+    
+    def counter(self, name: str, description: str = "") -> Counter:
+        """جلب أو إنشاء عداد"""
+        with self.lock:
+            if name not in self.counters:
+                self.counters[name] = Counter(name, description)
+            return self.counters[name]
+    
+    def gauge(self, name: str, description: str = "", func: Callable[[], float] = None) -> Gauge:
+        """جلب أو إنشاء مقياس لحظي"""
+        with self.lock:
+            if name not in self.gauges:
+                self.gauges[name] = Gauge(name, description, func)
+            return self.gauges[name]
+    
+    def histogram(self, name: str, description: str = "", buckets: List[float] = None) -> Histogram:
+        """جلب أو إنشاء هيستوغرام"""
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(name, buckets or self.buckets, description)
+            return self.histograms[name]
+    
+    def total(self, suffix: str, exclude: str = None) -> int:
+        """مجموع العدادات المنتهية بلاحقة (مثل .errors لكل العمليات)، مع استبعاد بادئة اختيارياً"""
+        with self.lock:
+            counters = list(self.counters.values())
+        return sum(
+            c.value for c in counters
+            if c.name.endswith(suffix) and not (exclude and c.name.startswith(exclude))
+        )
+    
+    def timer(self, name: str = None, sample_rate: float = None):
+        """ديكورير لقياس زمن التنفيذ في هيستوغرام"""
+        def decorator(func):
+            operation = name or func.__qualname__
+            rate = sample_rate
+            if rate is None:
+                rate = METRICS["SAMPLE_RATES"].get(operation, 1.0)
+            
+            histogram = self.histogram(operation)
+            calls = self.counter(f"{operation}.calls")
+            errors = self.counter(f"{operation}.errors")
+            warn_ns = METRICS["SLOW_WARNING_MS"] * 1_000_000
+            error_ns = METRICS["SLOW_ERROR_MS"] * 1_000_000
+            
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                calls.inc()
+                if rate < 1.0 and random.random() >= rate:
+                    return func(*args, **kwargs)
+                
+                start = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    errors.inc()
+                    raise
+                finally:
+                    elapsed = time.perf_counter_ns() - start
+                    histogram.observe(elapsed / 1_000_000)
+                    
+                    if elapsed > error_ns:
+                        logger.error(f"الأداء البطيء: {operation} استغرق {elapsed / 1e9:.3f} ثانية")
+                    elif elapsed > warn_ns:
+                        logger.warning(f"الأداء: {operation} استغرق {elapsed / 1e9:.3f} ثانية")
+            
+            return wrapper
+        return decorator
+    
+    def snapshot(self) -> Dict:
+        """لقطة لكل المقاييس (p50/p95/p99 لكل عملية)"""
+        with self.lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        
+        return {
+            "operations": {name: h.summary() for name, h in histograms.items()},
+            "counters": {name: c.value for name, c in counters.items()},
+            "gauges": {name: g.get() for name, g in gauges.items()}
+        }
+    
+    def slowest(self, limit: int = 5, by: str = "p95_ms") -> List[Dict]:
+        """أبطأ العمليات"""
+        operations = self.snapshot()["operations"]
+        ranked = sorted(
+            ({"operation": name, **summary} for name, summary in operations.items() if summary["count"]),
+            key=lambda item: item[by],
+            reverse=True
+        )
+        return ranked[:limit]
+
+
+# نسخة عامة
+metrics = MetricsRegistry(METRICS["BUCKETS_MS"])
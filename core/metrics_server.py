@@ -0,0 +1,225 @@
+"""
+نقطة /metrics (صيغة Prometheus) و /healthz عبر خيط HTTP محلي
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from .config import METRICS_SERVER
+from .database import db
+from .cache import cache
+from .metrics import metrics, Histogram
+from .security import rate_limiter
+from .shared_state import shared_state
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# عائلات الهيستوغرامات حسب بادئة اسم العملية: (البادئة، اسم المقياس، اسم التسمية)
+HISTOGRAM_FAMILIES = [
+    ("telegram.", "bot_telegram_api_duration_seconds", "method"),
+    ("job.", "bot_scheduler_job_duration_seconds", "job"),
+    ("callback.", "bot_callback_duration_seconds", "route"),
+    ("", "bot_operation_duration_seconds", "operation"),
+]
+
+
+def _escape(value: str) -> str:
+    """تهريب قيمة التسمية"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _family(operation: str):
+    """تحديد عائلة المقياس لاسم عملية"""
+    for prefix, name, label in HISTOGRAM_FAMILIES:
+        if operation.startswith(prefix):
+            return name, label, operation[len(prefix):]
+    return HISTOGRAM_FAMILIES[-1][1], HISTOGRAM_FAMILIES[-1][2], operation
+
+
+def _render_histogram(lines: List[str], name: str, label: str, value: str, histogram: Histogram):
+    """كتابة هيستوغرام بوحدة الثواني"""
+    with histogram.lock:
+        counts = list(histogram.counts)
+        total = histogram.total
+        count = histogram.count
+    
+    cumulative = 0
+    for bound, bucket_count in zip(histogram.buckets, counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{{{label}="{_escape(value)}",le="{bound / 1000:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{label}="{_escape(value)}",le="+Inf"}} {count}')
+    lines.append(f'{name}_sum{{{label}="{_escape(value)}"}} {total / 1000:.9g}')
+    lines.append(f'{name}_count{{{label}="{_escape(value)}"}} {count}')
+
+
+def render_prometheus() -> str:
+    """بناء نص المقاييس بصيغة Prometheus"""
+    lines = []
+    
+    # ========== الهيستوغرامات والعدادات ==========
+    with metrics.lock:
+        histograms = dict(metrics.histograms)
+        counters = dict(metrics.counters)
+        gauges = dict(metrics.gauges)
+    
+    grouped: Dict[str, List] = {}
+    for operation, histogram in sorted(histograms.items()):
+        name, label, value = _family(operation)
+        grouped.setdefault(name, []).append((label, value, histogram))
+    
+    for name, items in grouped.items():
+        lines.append(f"# TYPE {name} histogram")
+        for label, value, histogram in items:
+            _render_histogram(lines, name, label, value, histogram)
+    
+    totals: Dict[str, List[str]] = {}
+    for counter_name, counter in sorted(counters.items()):
+        operation, _, kind = counter_name.rpartition('.')
+        if kind in ('calls', 'errors') and operation:
+            name, label, value = _family(operation)
+            metric = name.replace('_duration_seconds', f'_{kind}_total')
+            totals.setdefault(metric, []).append(f'{metric}{{{label}="{_escape(value)}"}} {counter.value}')
+        elif counter_name.startswith('telegram.status.'):
+            metric = 'bot_telegram_api_responses_total'
+            status = counter_name.rsplit('.', 1)[-1]
+            totals.setdefault(metric, []).append(f'{metric}{{status="{status}"}} {counter.value}')
+        else:
+            metric = 'bot_events_total'
+            totals.setdefault(metric, []).append(f'{metric}{{name="{_escape(counter_name)}"}} {counter.value}')
+    
+    for metric, metric_lines in totals.items():
+        lines.append(f"# TYPE {metric} counter")
+        lines.extend(metric_lines)
+    
+    if gauges:
+        lines.append("# TYPE bot_gauge gauge")
+        for gauge_name, gauge in sorted(gauges.items()):
+            lines.append(f'bot_gauge{{name="{_escape(gauge_name)}"}} {gauge.get()}')
+    
+    # ========== قاعدة البيانات ==========
+    db_stats = db.pool.get_stats()
+    lines.append("# TYPE bot_db_pool_size gauge")
+    lines.append(f"bot_db_pool_size {db_stats['pool_size']}")
+    lines.append("# TYPE bot_db_pool_available gauge")
+    lines.append(f"bot_db_pool_available {db_stats['available']}")
+    lines.append("# TYPE bot_db_pool_checkouts_total counter")
+    lines.append(f'bot_db_pool_checkouts_total{{result="ok"}} {db_stats.get("hits", 0)}')
+    lines.append(f'bot_db_pool_checkouts_total{{result="error"}} {db_stats.get("misses", 0)}')
+    
+    # ========== الكاش ==========
+    lru = cache.cache.get_stats()
+    lines.append("# TYPE bot_cache_entries gauge")
+    lines.append(f"bot_cache_entries {lru['size']}")
+    lines.append("# TYPE bot_cache_max_entries gauge")
+    lines.append(f"bot_cache_max_entries {lru['max_size']}")
+    
+    namespaces = cache.cache.get_namespace_stats()
+    lines.append("# TYPE bot_cache_namespace_entries gauge")
+    for namespace, stats in sorted(namespaces.items()):
+        lines.append(f'bot_cache_namespace_entries{{namespace="{_escape(namespace)}"}} {stats["size"]}')
+    lines.append("# TYPE bot_cache_requests_total counter")
+    for namespace, stats in sorted(namespaces.items()):
+        lines.append(f'bot_cache_requests_total{{namespace="{_escape(namespace)}",result="hit"}} {stats["hits"]}')
+        lines.append(f'bot_cache_requests_total{{namespace="{_escape(namespace)}",result="miss"}} {stats["misses"]}')
+    
+    # ========== Rate Limiter ==========
+    if shared_state:
+        tracked_users = shared_state.count_rate_limited_users()
+    else:
+        with rate_limiter.lock:
+            tracked_users = len(rate_limiter.requests)
+    lines.append("# TYPE bot_rate_limiter_tracked_users gauge")
+    lines.append(f"bot_rate_limiter_tracked_users {tracked_users}")
+    
+    return "\n".join(lines) + "\n"
+
+
+def check_health() -> Dict:
+    """فحص صحة النظام (قاعدة البيانات)"""
+    try:
+        result = db.fetch_one("SELECT 1 as ok")
+        if result and result['ok'] == 1:
+            return {"status": "ok", "database": "ok"}
+        return {"status": "error", "database": "unexpected result"}
+    except Exception as e:
+        return {"status": "error", "database": str(e)}
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """معالج طلبات HTTP"""
+    
+    def do_GET(self):
+        """طلبات GET: /metrics و /healthz"""
+        path = self.path.split('?', 1)[0]
+        try:
+            if path == "/metrics":
+                self._send(200, render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+            elif path == "/healthz":
+                health = check_health()
+                status = 200 if health["status"] == "ok" else 503
+                self._send(status, json.dumps(health), "application/json")
+            else:
+                self._send(404, "not found\n", "text/plain")
+        except Exception as e:
+            logger.error(f"خطأ في نقطة المقاييس {path}: {e}")
+            self._send(500, "internal error\n", "text/plain")
+    
+    def _send(self, status: int, body: str, content_type: str):
+        """إرسال الرد"""
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        """تعطيل سجل الطلبات الافتراضي"""
+        # طلبات الـ scraper كثيرة، لا داعي لتسجيلها
+        pass
+
+
+class MetricsServer:
+    """خادم HTTP للمقاييس في خيط منفصل"""
+    
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+    
+    def start(self) -> bool:
+        """تشغيل الخادم"""
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), _MetricsRequestHandler)
+            self.httpd.daemon_threads = True
+            self.thread = threading.Thread(
+                target=self.httpd.serve_forever,
+                daemon=True,
+                name="metrics-server"
+            )
+            self.thread.start()
+            logger.info(f"✅ نقطة المقاييس تعمل على http://{self.host}:{self.port}/metrics")
+            return True
+        except Exception as e:
+            logger.error(f"❌ فشل تشغيل نقطة المقاييس: {e}")
+            return False
+    
+    def stop(self):
+        """إيقاف الخادم"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def start_metrics_server() -> Optional[MetricsServer]:
+    """تشغيل نقطة المقاييس إذا كانت مفعلة في الإعدادات"""
+    if not METRICS_SERVER.get("ENABLED"):
+        return None
+    
+    server = MetricsServer(METRICS_SERVER["HOST"], METRICS_SERVER["PORT"])
+    return server if server.start() else None
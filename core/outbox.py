@@ -0,0 +1,421 @@
+"""
+طابور الإرسال الصادر لـ Telegram - حدود المعدل وإعادة المحاولة عند 429
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import requests
+from telebot import TeleBot
+from telebot.apihelper import ApiTelegramException
+from urllib3.exceptions import NewConnectionError
+
+from .config import OUTBOX
+from .metrics import metrics
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# فئات الأولوية (الأصغر أولاً)
+PRIORITY_USER = 0       # ردود المستخدمين
+PRIORITY_CHANNEL = 1    # تقارير القنوات والمجموعات
+PRIORITY_BULK = 2       # الإذاعة الجماعية
+
+
+def _never_sent(error: Exception) -> bool:
+    """فشل فتح الاتصال نفسه، فالطلب لم يصل إلى Telegram وإعادته لا تكرر الرسالة
+
+    انتهاء مهلة القراءة أو قطع الاتصال بعد الإرسال قد يأتيان بعد أن قبل Telegram الرسالة.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+class TokenBucket:
+    """دلو رموز لتحديد المعدل"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+    
+    def take(self, now: float) -> float:
+        """استهلاك رمز: يرجع 0 عند النجاح أو وقت توفر الرمز التالي"""
+        if now < self.blocked_until:
+            return self.blocked_until
+        
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        
+        return now + (1 - self.tokens) / self.rate
+    
+    def block(self, until: float):
+        """إيقاف الدلو حتى وقت محدد (بعد 429)"""
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = 0
+
+
+class _Job:
+    """مهمة إرسال واحدة"""
+    
+    __slots__ = ("chat_id", "func", "args", "kwargs", "priority", "seq",
+                 "enqueued_at", "attempts", "future")
+    
+    def __init__(self, chat_id, func, args, kwargs, priority, seq):
+        self.chat_id = chat_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+        self.future = Future()
+
+
+class OutboundQueue:
+    """مجدول الرسائل الصادرة (دلو عام + دلو لكل محادثة + أولويات)"""
+    
+    def __init__(self, workers: int = 8, global_rate: float = 30, chat_rate: float = 1,
+                 chat_burst: float = 3, group_rate: float = 20 / 60, max_retries: int = 5):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.workers = workers
+        
+        self.chat_buckets: Dict[int, TokenBucket] = {}
+        self.ready = []      # (priority, seq, job)
+        self.delayed = []    # (not_before, priority, seq, job)
+        self.in_flight = set()
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        
+        self.sent = metrics.counter("outbox.sent")
+        self.failed = metrics.counter("outbox.failed")
+        self.retried = metrics.counter("outbox.retried")
+        self.throttled = metrics.counter("outbox.throttled_429")
+        self.blocked = metrics.counter("outbox.blocked_by_user")
+        self.not_modified = metrics.counter("outbox.not_modified")
+        self.delivery = metrics.histogram("outbox.delivery")
+        metrics.gauge("outbox.pending", func=self.pending)
+    
+    # ========== الواجهة ==========
+    
+    def submit(self, chat_id, func: Callable, args: tuple = (), kwargs: dict = None,
+               priority: int = None) -> Future:
+        """إضافة مهمة إرسال (لا ينتظر الشبكة أبداً)"""
+        if priority is None:
+            priority = PRIORITY_CHANNEL if isinstance(chat_id, int) and chat_id < 0 else PRIORITY_USER
+        
+        with self.cond:
+            job = _Job(chat_id, func, args, kwargs or {}, priority, next(self.seq))
+            heapq.heappush(self.ready, (job.priority, job.seq, job))
+            self.cond.notify()
+        return job.future
+    
+    def pending(self) -> int:
+        """عدد الرسائل بانتظار الإرسال"""
+        return len(self.ready) + len(self.delayed)
+    
+    def start(self):
+        """تشغيل المجدول وعمال الإرسال"""
+        if self.running:
+            return
+        
+        self.running = True
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="outbox")
+        self.thread = threading.Thread(target=self._schedule_loop, daemon=True, name="outbox-scheduler")
+        self.thread.start()
+        logger.info(f"✅ تم تشغيل طابور الإرسال ({self.workers} عامل)")
+    
+    def stop(self, timeout: float = 10.0):
+        """إيقاف بعد محاولة إرسال ما تبقى"""
+        deadline = time.monotonic() + timeout
+        while self.pending() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.executor:
+            self.executor.shutdown(wait=True)
+    
+    def get_stats(self) -> dict:
+        """إحصائيات الإرسال"""
+        with self.cond:
+            return {
+                "ready": len(self.ready),
+                "delayed": len(self.delayed),
+                "in_flight": len(self.in_flight),
+                "sent": self.sent.value,
+                "failed": self.failed.value,
+                "retried": self.retried.value,
+                "throttled_429": self.throttled.value,
+                "blocked_by_user": self.blocked.value
+            }
+    
+    # ========== المجدول ==========
+    
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        """دلو المحادثة (المجموعات والقنوات أبطأ)"""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if isinstance(chat_id, int) and chat_id < 0:
+                bucket = TokenBucket(self.group_rate, 1)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+    
+    def _defer(self, job: _Job, not_before: float):
+        """تأجيل مهمة (يستدعى داخل القفل)"""
+        heapq.heappush(self.delayed, (not_before, job.priority, job.seq, job))
+    
+    def _prune_buckets(self, now: float):
+        """حذف دلاء المحادثات الخاملة الممتلئة"""
+        idle = [
+            chat_id for chat_id, bucket in self.chat_buckets.items()
+            if now - bucket.updated > 300 and now > bucket.blocked_until
+        ]
+        for chat_id in idle:
+            del self.chat_buckets[chat_id]
+    
+    def _schedule_loop(self):
+        """اختيار المهمة التالية المسموح بإرسالها"""
+        last_prune = time.monotonic()
+        
+        while True:
+            with self.cond:
+                if not self.running:
+                    break
+                
+                now = time.monotonic()
+                while self.delayed and self.delayed[0][0] <= now:
+                    _, priority, seq, job = heapq.heappop(self.delayed)
+                    heapq.heappush(self.ready, (priority, seq, job))
+                
+                if now - last_prune > 60:
+                    self._prune_buckets(now)
+                    last_prune = now
+                
+                if not self.ready:
+                    timeout = self.delayed[0][0] - now if self.delayed else None
+                    self.cond.wait(timeout)
+                    continue
+                
+                # الحد العام أولاً
+                global_wait = self.global_bucket.take(now)
+                if global_wait:
+                    self.cond.wait(global_wait - now)
+                    continue
+                
+                _, _, job = heapq.heappop(self.ready)
+                
+                # رسالة واحدة قيد الإرسال لكل محادثة للحفاظ على الترتيب
+                if job.chat_id in self.in_flight:
+                    self.global_bucket.tokens += 1
+                    self._defer(job, now + 0.05)
+                    continue
+                
+                chat_wait = self._chat_bucket(job.chat_id).take(now)
+                if chat_wait:
+                    self.global_bucket.tokens += 1
+                    self._defer(job, chat_wait)
+                    continue
+                
+                self.in_flight.add(job.chat_id)
+            
+            self.executor.submit(self._deliver, job)
+    
+    def _deliver(self, job: _Job):
+        """تنفيذ الإرسال الفعلي (في خيط عامل)"""
+        job.attempts += 1
+        retry_at = None
+        
+        try:
+            result = job.func(*job.args, **job.kwargs)
+            job.future.set_result(result)
+            self.sent.inc()
+            self.delivery.observe((time.monotonic() - job.enqueued_at) * 1000)
+        except ApiTelegramException as e:
+            if e.error_code == 429 and job.attempts <= self.max_retries:
+                parameters = (e.result_json or {}).get("parameters") or {}
+                retry_after = parameters.get("retry_after", 1)
+                retry_at = time.monotonic() + retry_after
+                self.throttled.inc()
+                logger.warning(f"⏳ 429 للمحادثة {job.chat_id}، إعادة المحاولة بعد {retry_after} ثانية")
+            elif e.error_code >= 500 and job.attempts <= self.max_retries:
+                retry_at = time.monotonic() + min(2 ** job.attempts, 60)
+            elif e.error_code == 400 and "message is not modified" in str(e.description):
+                # التعديل لم يغير شيئاً، النتيجة مطابقة للمطلوب
+                self.not_modified.inc()
+                job.future.set_result(None)
+            else:
+                self.failed.inc()
+                job.future.set_exception(e)
+                if e.error_code == 403:
+                    # المستخدم حظر البوت (متوقع أثناء الإذاعة)
+                    self.blocked.inc()
+                    logger.debug(f"المحادثة {job.chat_id} حظرت البوت")
+                else:
+                    logger.warning(f"فشل الإرسال للمحادثة {job.chat_id}: {e.description}")
+        except Exception as e:
+            # إعادة المحاولة فقط إذا لم يصل الطلب، وأي خطأ آخر يفشل فوراً (لا رسائل مكررة)
+            if _never_sent(e) and job.attempts <= self.max_retries:
+                retry_at = time.monotonic() + min(2 ** job.attempts, 60)
+            else:
+                self.failed.inc()
+                job.future.set_exception(e)
+                logger.error(f"❌ فشل الإرسال للمحادثة {job.chat_id} بعد {job.attempts} محاولات: {e}")
+        finally:
+            with self.cond:
+                self.in_flight.discard(job.chat_id)
+                if retry_at is not None:
+                    self.retried.inc()
+                    self._chat_bucket(job.chat_id).block(retry_at)
+                    self._defer(job, retry_at)
+                self.cond.notify()
+
+
+def _markup_fingerprint(markup) -> int:
+    """بصمة الكيبورد (FrozenKeyboard يرجع JSON محسوباً مسبقاً)"""
+    if markup is None:
+        return hash(None)
+    if hasattr(markup, "to_json"):
+        return hash(markup.to_json())
+    return hash(str(markup))
+
+
+class EditFingerprints:
+    """آخر محتوى معروض لكل رسالة (chat_id, message_id) لتخطي التعديلات المكررة"""
+    
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        # (chat_id, message_id) -> [بصمة النص، بصمة الكيبورد]
+        self.entries: "OrderedDict[tuple, list]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.skipped = metrics.counter("outbox.edits_skipped")
+    
+    def check_and_set(self, key: tuple, text_fp: Optional[int], markup_fp: int) -> bool:
+        """True إذا كان المحتوى مطابقاً للمعروض (لا حاجة للتعديل)، وإلا يسجل المحتوى الجديد"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                if entry[1] == markup_fp and (text_fp is None or entry[0] == text_fp):
+                    self.skipped.inc()
+                    return True
+                if text_fp is not None:
+                    entry[0] = text_fp
+                entry[1] = markup_fp
+                return False
+            
+            # تعديل الكيبورد فقط لا يكشف النص
+            self.entries[key] = [text_fp, markup_fp]
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            return False
+    
+    def forget(self, key: tuple):
+        """حذف البصمة (بعد فشل التعديل، المعروض غير معروف)"""
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+def _done_future(result=None) -> Future:
+    """Future مكتمل (للتعديلات المتخطاة)"""
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+# هوية البوت لكل توكن (لا تتغير أثناء التشغيل)
+_bot_identities = {}
+
+
+class QueuedTeleBot(TeleBot):
+    """TeleBot يرسل الرسائل عبر طابور الإرسال (ترجع Future بدل Message)"""
+    
+    def get_me(self):
+        """هوية البوت (طلب واحد لكل توكن، يتم تحميلها عند بدء التشغيل)"""
+        me = _bot_identities.get(self.token)
+        if me is None:
+            me = TeleBot.get_me(self)
+            _bot_identities[self.token] = me
+        return me
+    
+    def send_message(self, chat_id, text, *args, priority: int = None, **kwargs):
+        future = outbox.submit(chat_id, TeleBot.send_message, (self, chat_id, text) + args, kwargs, priority)
+        if not args:
+            # تسجيل محتوى الرسالة الجديدة ليتخطى أول تعديل مطابق
+            text_fp = hash((text, kwargs.get("parse_mode")))
+            markup_fp = _markup_fingerprint(kwargs.get("reply_markup"))
+            future.add_done_callback(lambda done: self._remember_sent(done, text_fp, markup_fp))
+        return future
+    
+    def _remember_sent(self, future: Future, text_fp: int, markup_fp: int):
+        """بصمة الرسالة بعد نجاح الإرسال"""
+        if future.exception() is None and future.result() is not None:
+            message = future.result()
+            edit_fingerprints.check_and_set((message.chat.id, message.message_id), text_fp, markup_fp)
+    
+    def edit_message_text(self, text, chat_id=None, message_id=None, *args, priority: int = None, **kwargs):
+        if chat_id is not None and message_id is not None and not args:
+            key = (chat_id, message_id)
+            text_fp = hash((text, kwargs.get("parse_mode")))
+            if edit_fingerprints.check_and_set(key, text_fp, _markup_fingerprint(kwargs.get("reply_markup"))):
+                return _done_future()
+            return self._submit_edit(key, TeleBot.edit_message_text, (self, text, chat_id, message_id), kwargs, priority)
+        
+        return outbox.submit(
+            chat_id, TeleBot.edit_message_text, (self, text, chat_id, message_id) + args, kwargs, priority
+        )
+    
+    def edit_message_reply_markup(self, chat_id=None, message_id=None, *args, priority: int = None, **kwargs):
+        if chat_id is not None and message_id is not None and not args:
+            key = (chat_id, message_id)
+            if edit_fingerprints.check_and_set(key, None, _markup_fingerprint(kwargs.get("reply_markup"))):
+                return _done_future()
+            return self._submit_edit(key, TeleBot.edit_message_reply_markup, (self, chat_id, message_id), kwargs, priority)
+        
+        return outbox.submit(
+            chat_id, TeleBot.edit_message_reply_markup, (self, chat_id, message_id) + args, kwargs, priority
+        )
+    
+    @staticmethod
+    def _submit_edit(key: tuple, func, args: tuple, kwargs: dict, priority: int) -> Future:
+        """إرسال التعديل وحذف البصمة إذا فشل"""
+        future = outbox.submit(key[0], func, args, kwargs, priority)
+        future.add_done_callback(lambda done: done.exception() is not None and edit_fingerprints.forget(key))
+        return future
+
+
+# نسخة عامة
+outbox = OutboundQueue(
+    OUTBOX["WORKERS"],
+    OUTBOX["GLOBAL_RATE"],
+    OUTBOX["CHAT_RATE"],
+    OUTBOX["CHAT_BURST"],
+    OUTBOX["GROUP_RATE"],
+    OUTBOX["MAX_RETRIES"]
+)
+edit_fingerprints = EditFingerprints(OUTBOX["EDIT_FINGERPRINTS"])
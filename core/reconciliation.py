@@ -0,0 +1,198 @@
+"""
+دوال مطابقة الأرصدة الخام - تعمل داخل عمليات البوول المنفصلة باتصال للقراءة فقط
+
+كل دالة تعالج نطاق user_id واحد باستعلام تجميعي واحد، وتمر على النتائج سطراً سطراً.
+يُشغّل كعملية مستقلة (python -m core.reconciliation) فلا يستورد إلا المكتبة القياسية:
+عمليات البوول (spawn) تعيد استيراد هذا الملف فقط بدل main.py وتهيئة البوت.
+"""
+
+import argparse
+import json
+import multiprocessing
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Tuple
+
+# (اسم الفحص، القيمة المخزنة، القيمة المحسوبة من السجل)
+CHECKS = (
+    ("balance", "balance", "ledger_balance"),
+    ("total_deposit", "total_deposit", "ledger_deposits"),
+    ("total_withdraw", "total_withdraw", "ledger_withdrawals"),
+    ("gifts_sent", "gift_tx_sent", "ledger_gifts_sent"),
+    ("gifts_received", "gift_tx_received", "ledger_gifts_received"),
+)
+
+# كل جدول يجمّع داخل النطاق قبل الربط، فالفهارس على user_id تكفي ولا يوجد join كامل.
+# العدادات تُقارن بدفتر القيود لا بجدول المعاملات الذي تُحذف سجلاته القديمة، مضافاً إليها
+# قيم الافتتاح لمستخدمي ما قبل الدفتر (ledger_openings)
+RANGE_QUERY = """
+    SELECT u.user_id, u.balance, u.total_deposit, u.total_withdraw,
+           COALESCE(l.total, 0) AS ledger_balance,
+           COALESCE(o.gifts_sent, 0) + COALESCE(l.gifts_sent, 0) AS ledger_gifts_sent,
+           COALESCE(o.gifts_received, 0) + COALESCE(l.gifts_received, 0) AS ledger_gifts_received,
+           COALESCE(o.total_deposit, 0) + COALESCE(l.deposits, 0) AS ledger_deposits,
+           COALESCE(o.total_withdraw, 0) + COALESCE(l.withdrawals, 0) AS ledger_withdrawals,
+           COALESCE(l.row_count, 0) + (o.user_id IS NOT NULL) AS ledger_rows,
+           COALESCE(gs.total, 0) AS gift_tx_sent,
+           COALESCE(gr.total, 0) AS gift_tx_received,
+           COALESCE(gs.row_count, 0) + COALESCE(gr.row_count, 0) AS gift_rows
+    FROM users u
+    LEFT JOIN (
+        SELECT user_id, SUM(amount) AS total,
+               SUM(CASE WHEN kind = 'gift_sent' THEN -amount ELSE 0 END) AS gifts_sent,
+               SUM(CASE WHEN kind = 'gift_received' THEN amount ELSE 0 END) AS gifts_received,
+               SUM(CASE WHEN kind = 'deposit' THEN amount ELSE 0 END) AS deposits,
+               -SUM(CASE WHEN kind IN ('withdraw', 'withdraw_refund') THEN amount ELSE 0 END) AS withdrawals,
+               COUNT(*) AS row_count
+        FROM ledger_entries
+        WHERE user_id BETWEEN :lo AND :hi
+        GROUP BY user_id
+    ) l ON l.user_id = u.user_id
+    LEFT JOIN ledger_openings o ON o.user_id = u.user_id
+    LEFT JOIN (
+        SELECT sender_id, SUM(original_amount) AS total, COUNT(*) AS row_count
+        FROM gift_transactions
+        WHERE sender_id BETWEEN :lo AND :hi
+        GROUP BY sender_id
+    ) gs ON gs.sender_id = u.user_id
+    LEFT JOIN (
+        SELECT receiver_id, SUM(net_amount) AS total, COUNT(*) AS row_count
+        FROM gift_transactions
+        WHERE receiver_id BETWEEN :lo AND :hi
+        GROUP BY receiver_id
+    ) gr ON gr.receiver_id = u.user_id
+    WHERE u.user_id BETWEEN :lo AND :hi
+"""
+
+
+def connect_readonly(db_path: str) -> sqlite3.Connection:
+    """اتصال للقراءة فقط (WAL: لا يحجب الكتابة في البوت)"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+
+def chunk_boundaries(db_path: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """تقسيم user_id إلى نطاقات متساوية العدد (المعرفات متفرقة فلا يصلح التقسيم الحسابي)"""
+    conn = connect_readonly(db_path)
+    try:
+        starts = [row[0] for row in conn.execute(
+            """
+                SELECT user_id FROM (
+                    SELECT user_id, ROW_NUMBER() OVER (ORDER BY user_id) - 1 AS position
+                    FROM users
+                )
+                WHERE position % ? = 0
+            """,
+            (chunk_size,)
+        )]
+        last = conn.execute("SELECT MAX(user_id) FROM users").fetchone()[0]
+    finally:
+        conn.close()
+    
+    ranges = []
+    for index, start in enumerate(starts):
+        end = starts[index + 1] - 1 if index + 1 < len(starts) else last
+        ranges.append((start, end))
+    return ranges
+
+
+def reconcile_range(db_path: str, lo: int, hi: int, max_samples: int) -> Dict:
+    """مطابقة نطاق مستخدمين - يرجع مجاميع مختصرة وعينة من الفروقات"""
+    totals = {name: 0 for name, _, _ in CHECKS}
+    counts = {name: 0 for name, _, _ in CHECKS}
+    samples = []
+    users = 0
+    rows = 0
+    
+    conn = connect_readonly(db_path)
+    try:
+        for row in conn.execute(RANGE_QUERY, {"lo": lo, "hi": hi}):
+            users += 1
+            rows += 1 + row["ledger_rows"] + row["gift_rows"]
+            
+            for name, stored_column, expected_column in CHECKS:
+                drift = row[stored_column] - row[expected_column]
+                if drift:
+                    counts[name] += 1
+                    totals[name] += drift
+                    if len(samples) < max_samples:
+                        samples.append({
+                            "user_id": row["user_id"],
+                            "check": name,
+                            "stored": row[stored_column],
+                            "expected": row[expected_column],
+                            "drift": drift
+                        })
+    finally:
+        conn.close()
+    
+    return {
+        "range": (lo, hi),
+        "users": users,
+        "rows": rows,
+        "discrepancies": counts,
+        "drift": totals,
+        "samples": samples
+    }
+
+
+def run(db_path: str, chunk_size: int, workers: int, max_samples: int) -> Dict:
+    """مطابقة كل المستخدمين على نطاقات متوازية ودمج النتائج"""
+    ranges = chunk_boundaries(db_path, chunk_size)
+    
+    report = {
+        "chunks": len(ranges),
+        "users": 0,
+        "rows": 0,
+        "discrepancies": {name: 0 for name, _, _ in CHECKS},
+        "drift": {name: 0 for name, _, _ in CHECKS},
+        "samples": []
+    }
+    
+    def merge(result: Dict):
+        report["users"] += result["users"]
+        report["rows"] += result["rows"]
+        for name in report["discrepancies"]:
+            report["discrepancies"][name] += result["discrepancies"][name]
+            report["drift"][name] += result["drift"][name]
+        room = max_samples - len(report["samples"])
+        report["samples"].extend(result["samples"][:room])
+    
+    # spawn لتجنب نسخ أقفال الخيوط عبر fork، ونطاقات محدودة قيد التنفيذ بدل إرسال الكل
+    with ProcessPoolExecutor(
+        max_workers=min(workers, max(1, len(ranges))),
+        mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        pending = set()
+        for lo, hi in ranges:
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(future.result())
+            pending.add(executor.submit(reconcile_range, db_path, lo, hi, max_samples))
+        
+        for future in wait(pending).done:
+            merge(future.result())
+    
+    report["samples"].sort(key=lambda sample: (sample["check"], sample["user_id"]))
+    return report
+
+
+def main():
+    """نقطة الدخول: python -m core.reconciliation DB_PATH ... - التقرير JSON على stdout"""
+    parser = argparse.ArgumentParser(description="مطابقة الأرصدة")
+    parser.add_argument("db_path")
+    parser.add_argument("--chunk-size", type=int, required=True)
+    parser.add_argument("--workers", type=int, required=True)
+    parser.add_argument("--max-samples", type=int, required=True)
+    args = parser.parse_args()
+    
+    report = run(args.db_path, args.chunk_size, args.workers, args.max_samples)
+    json.dump(report, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+موجه الكال باكات - مسارات معلنة بدل سلاسل startswith، مع زمن وأخطاء لكل مسار
+
+أشكال المسارات:
+    "back"                 مطابقة تامة (dict)
+    "pay_{method}"         بادئة + معامل نصي
+    "approve_{tx_id:int}"  بادئة + معامل رقمي
+    "admin_*"              أي بيانات تبدأ بالبادئة
+
+التامة تطابق عبر dict، والباقي عبر trie على البادئات (الأطول أولاً)،
+فإضافة زر جديد لا تزيد تكلفة باقي الأزرار
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import metrics
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+_CONVERTERS = {"str": str, "int": int}
+
+
+class Route:
+    """مسار واحد مع مقاييسه"""
+    
+    __slots__ = ("pattern", "prefix", "param", "converter", "handler", "histogram", "calls", "errors")
+    
+    def __init__(self, pattern: str, handler: Callable):
+        self.pattern = pattern
+        self.handler = handler
+        self.param: Optional[str] = None
+        self.converter: Optional[Callable[[str], Any]] = None
+        
+        if pattern.endswith("*"):
+            self.prefix = pattern[:-1]
+        elif "{" in pattern:
+            start = pattern.index("{")
+            if not pattern.endswith("}") or "{" in pattern[start + 1:]:
+                raise ValueError(f"معامل واحد فقط في نهاية المسار: {pattern}")
+            self.prefix = pattern[:start]
+            name, _, kind = pattern[start + 1:-1].partition(":")
+            if kind and kind not in _CONVERTERS:
+                raise ValueError(f"نوع معامل غير معروف في المسار {pattern}: {kind}")
+            self.param = name
+            self.converter = _CONVERTERS[kind or "str"]
+        else:
+            self.prefix = pattern
+        
+        # callback.<pattern> -> bot_callback_duration_seconds{route="..."}
+        self.histogram = metrics.histogram(f"callback.{pattern}")
+        self.calls = metrics.counter(f"callback.{pattern}.calls")
+        self.errors = metrics.counter(f"callback.{pattern}.errors")
+    
+    @property
+    def is_exact(self) -> bool:
+        return self.param is None and not self.pattern.endswith("*")
+    
+    def parse(self, data: str) -> Optional[Dict[str, Any]]:
+        """استخراج المعامل من البيانات (None إذا لم تطابق)"""
+        if self.param is None:
+            return {}
+        
+        raw = data[len(self.prefix):]
+        if not raw:
+            return None
+        try:
+            return {self.param: self.converter(raw)}
+        except ValueError:
+            return None
+
+
+class _Node:
+    __slots__ = ("children", "routes")
+    
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.routes: List[Route] = []
+
+
+class CallbackRouter:
+    """جدول المسارات: dict للتامة و trie للبادئات"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.exact: Dict[str, Route] = {}
+        self.root = _Node()
+        self.unmatched = metrics.counter(f"callback.{name}.unmatched")
+    
+    def add(self, pattern: str, handler: Callable) -> Route:
+        """تسجيل مسار"""
+        route = Route(pattern, handler)
+        if route.is_exact:
+            if pattern in self.exact:
+                raise ValueError(f"المسار مسجل مسبقاً: {pattern}")
+            self.exact[pattern] = route
+            return route
+        
+        node = self.root
+        for char in route.prefix:
+            node = node.children.setdefault(char, _Node())
+        # المعاملات قبل * على نفس البادئة
+        node.routes.append(route)
+        node.routes.sort(key=lambda r: r.param is None)
+        return route
+    
+    def route(self, *patterns: str):
+        """ديكورير تسجيل دالة لمسار أو أكثر"""
+        def decorator(handler: Callable) -> Callable:
+            for pattern in patterns:
+                self.add(pattern, handler)
+            return handler
+        return decorator
+    
+    def match(self, data: str) -> Optional[Tuple[Route, Dict[str, Any]]]:
+        """إيجاد المسار المطابق ومعاملاته"""
+        route = self.exact.get(data)
+        if route is not None:
+            return route, {}
+        
+        # جمع العقد التي عليها مسارات على طول البيانات، ثم الأطول أولاً
+        candidates = []
+        node = self.root
+        if node.routes:
+            candidates.append(node)
+        for char in data:
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.routes:
+                candidates.append(node)
+        
+        for node in reversed(candidates):
+            for route in node.routes:
+                params = route.parse(data)
+                if params is not None:
+                    return route, params
+        return None
+    
+    def dispatch(self, call, *args) -> bool:
+        """تنفيذ مسار call.data (المعاملات الإضافية تمرر قبل call، مثل self)"""
+        match = self.match(call.data or "")
+        if match is None:
+            self.unmatched.inc()
+            return False
+        
+        route, params = match
+        route.calls.inc()
+        start = time.perf_counter_ns()
+        try:
+            route.handler(*args, call, **params)
+        except Exception:
+            route.errors.inc()
+            raise
+        finally:
+            route.histogram.observe((time.perf_counter_ns() - start) / 1_000_000)
+        return True
+    
+    def get_stats(self) -> dict:
+        """عدد المسارات"""
+        prefixed = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            prefixed += len(node.routes)
+            stack.extend(node.children.values())
+        
+        return {
+            "exact": len(self.exact),
+            "prefixed": prefixed,
+            "unmatched": self.unmatched.value
+        }
@@ -5,38 +5,187 @@
 import hashlib
 import secrets
 import string
+import threading
 import time
-from typing import Optional, Tuple
-import bcrypt
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, Dict
 from cryptography.fernet import Fernet
 import base64
 import os
 
-from .config import SECRET_KEY
+from .config import SECRET_KEY, PERFORMANCE, PASSWORD_HASHING
+from .hashing import bcrypt_hash, bcrypt_check
 from .logger import get_logger
+from .shared_state import shared_state
 
 logger = get_logger(__name__)
 
 
+class HashingExecutor:
+    """بوول عمليات محدود لتشفير bcrypt بعيداً عن خيوط المعالجات"""
+    
+    def __init__(self, pool_size: int = None, max_pending: int = 64, use_processes: bool = True,
+                 callback_workers: int = 2):
+        self.pool_size = pool_size or PERFORMANCE["THREAD_POOL_SIZE"]
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self.callback_workers = callback_workers
+        self.executor = None
+        self.callbacks = None
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "waited_for_slot": 0,
+            "rejected_busy": 0,
+            "max_pending_seen": 0,
+            "total_ms": 0.0
+        }
+    
+    def _get_executor(self):
+        """إنشاء البوول عند أول استخدام"""
+        if self.executor is None:
+            with self.lock:
+                if self.executor is None:
+                    if self.use_processes:
+                        try:
+                            # spawn لتجنب نسخ أقفال الخيوط عبر fork؛ main.py لا يستورد شيئاً فلا تعيد العمليات تهيئة البوت
+                            self.executor = ProcessPoolExecutor(
+                                max_workers=self.pool_size,
+                                mp_context=multiprocessing.get_context("spawn")
+                            )
+                            logger.info(f"تم تهيئة بوول التشفير بـ {self.pool_size} عملية")
+                        except Exception as e:
+                            logger.error(f"فشل إنشاء بوول العمليات، استخدام الخيوط: {e}")
+                    
+                    if self.executor is None:
+                        self.executor = ThreadPoolExecutor(
+                            max_workers=self.pool_size,
+                            thread_name_prefix="hashing"
+                        )
+        return self.executor
+    
+    def _get_callbacks(self) -> ThreadPoolExecutor:
+        """خيوط تنفيذ ما بعد التشفير (لا تشغل خيط إدارة بوول العمليات)"""
+        if self.callbacks is None:
+            with self.lock:
+                if self.callbacks is None:
+                    self.callbacks = ThreadPoolExecutor(
+                        max_workers=self.callback_workers,
+                        thread_name_prefix="hashing-done"
+                    )
+        return self.callbacks
+    
+    def submit(self, fn, *args, wait: bool = True) -> Optional[Future]:
+        """إرسال مهمة تشفير (ينتظر إذا امتلأ البوول، أو يرجع None مع wait=False)"""
+        if not self.slots.acquire(blocking=False):
+            if not wait:
+                with self.lock:
+                    self.stats["rejected_busy"] += 1
+                return None
+            with self.lock:
+                self.stats["waited_for_slot"] += 1
+            self.slots.acquire()
+        
+        start = time.perf_counter()
+        with self.lock:
+            self.stats["submitted"] += 1
+            pending = self.stats["submitted"] - self.stats["completed"] - self.stats["failed"]
+            self.stats["max_pending_seen"] = max(self.stats["max_pending_seen"], pending)
+        
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            with self.lock:
+                self.stats["failed"] += 1
+            raise
+        
+        def _done(f: Future):
+            self.slots.release()
+            with self.lock:
+                if f.exception() is None:
+                    self.stats["completed"] += 1
+                else:
+                    self.stats["failed"] += 1
+                self.stats["total_ms"] += (time.perf_counter() - start) * 1000
+        
+        future.add_done_callback(_done)
+        return future
+    
+    def submit_then(self, callback: Callable[[Future], None], fn, *args) -> bool:
+        """إرسال مهمة وتنفيذ callback(future) عند انتهائها - المستدعي لا ينتظر
+
+        يرجع False إذا كان البوول ممتلئاً (المعالج يرد على المستخدم بدل الانتظار).
+        """
+        future = self.submit(fn, *args, wait=False)
+        if future is None:
+            return False
+        
+        def _run(f: Future):
+            try:
+                callback(f)
+            except Exception as e:
+                logger.error(f"خطأ في إكمال مهمة التشفير: {e}")
+        
+        future.add_done_callback(lambda f: self._get_callbacks().submit(_run, f))
+        return True
+    
+    def get_stats(self) -> Dict:
+        """إحصائيات البوول وعمق الطابور"""
+        with self.lock:
+            pending = self.stats["submitted"] - self.stats["completed"] - self.stats["failed"]
+            finished = self.stats["completed"] + self.stats["failed"]
+            return {
+                **self.stats,
+                "pool_size": self.pool_size,
+                "pending": pending,
+                "queue_depth": max(0, pending - self.pool_size),
+                "avg_ms": round(self.stats["total_ms"] / finished, 2) if finished else 0.0,
+                "mode": type(self.executor).__name__ if self.executor else "idle"
+            }
+    
+    def shutdown(self):
+        """إيقاف البوول"""
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.callbacks:
+            self.callbacks.shutdown(wait=False)
+            self.callbacks = None
+
+
 class PasswordManager:
     """مدير كلمات المرور مع تشفير قوي"""
     
     @staticmethod
     def hash_password(password: str) -> str:
         """تشفير كلمة المرور باستخدام bcrypt"""
-        salt = bcrypt.gensalt(rounds=12)
-        hashed = bcrypt.hashpw(password.encode(), salt)
-        return hashed.decode()
+        return bcrypt_hash(password, PASSWORD_HASHING["ROUNDS"])
     
     @staticmethod
     def verify_password(hashed_password: str, password: str) -> bool:
         """التحقق من كلمة المرور"""
         try:
-            return bcrypt.checkpw(password.encode(), hashed_password.encode())
+            return bcrypt_check(hashed_password, password)
         except Exception as e:
             logger.error(f"خطأ في التحقق من كلمة المرور: {e}")
             return False
     
+    @staticmethod
+    def hash_password_async(password: str, callback: Callable[[Future], None]) -> bool:
+        """تشفير كلمة المرور في بوول التشفير ثم callback(future) - False إذا كان البوول ممتلئاً"""
+        return hashing_executor.submit_then(callback, bcrypt_hash, password, PASSWORD_HASHING["ROUNDS"])
+    
+    @staticmethod
+    def verify_password_async(hashed_password: str, password: str,
+                              callback: Callable[[Future], None]) -> bool:
+        """التحقق من كلمة المرور في بوول التشفير ثم callback(future) - False إذا كان البوول ممتلئاً"""
+        return hashing_executor.submit_then(callback, bcrypt_check, hashed_password, password)
+    
     @staticmethod
     def generate_strong_password(length: int = 12) -> str:
         """توليد كلمة مرور قوية"""
@@ -94,18 +243,26 @@ class RateLimiter:
         self.window = window
         self.requests = {}
         self.lock = threading.Lock()
-        logger.info(f"تم تهيئة RateLimiter: {max_requests} طلب في {window} ثانية")
+        
+        # عدادات مشتركة بين العمليات (إن كانت مفعلة)
+        self.shared_state = shared_state
+        
+        mode = "مشترك" if self.shared_state else "محلي"
+        logger.info(f"تم تهيئة RateLimiter ({mode}): {max_requests} طلب في {window} ثانية")
     
     def is_allowed(self, user_id: int) -> Tuple[bool, int]:
         """التحقق إذا كان المستخدم مسموح له"""
+        now = time.time()
+        
+        # تجاهل المشرف الرئيسي
+        from .config import ADMIN_ID
+        if user_id == ADMIN_ID:
+            return True, 0
+        
+        if self.shared_state:
+            return self.shared_state.rate_limit_hit(user_id, self.max_requests, self.window)
+        
         with self.lock:
-            now = time.time()
-            
-            # تجاهل المشرف الرئيسي
-            from .config import ADMIN_ID
-            if user_id == ADMIN_ID:
-                return True, 0
-            
             if user_id not in self.requests:
                 self.requests[user_id] = []
             
@@ -128,6 +285,9 @@ class RateLimiter:
     
     def cleanup_old_requests(self):
         """تنظيف الطلبات القديمة"""
+        if self.shared_state:
+            self.shared_state.cleanup(self.window)
+        
         with self.lock:
             now = time.time()
             cleaned_count = 0
@@ -210,11 +370,16 @@ class TokenGenerator:
         random_part = ''.join(secrets.choice(chars) for _ in range(4))
         return f"REF{base}{random_part}"
     
+    @staticmethod
+    def generate_code(length: int = 8) -> str:
+        """توليد كود عشوائي من أحرف كبيرة وأرقام"""
+        chars = string.ascii_uppercase + string.digits
+        return ''.join(secrets.choice(chars) for _ in range(length))
+    
     @staticmethod
     def generate_gift_code() -> str:
         """توليد كود هدية فريد"""
-        chars = string.ascii_uppercase + string.digits
-        return ''.join(secrets.choice(chars) for _ in range(8))
+        return TokenGenerator.generate_code(8)
     
     @staticmethod
     def generate_transaction_id() -> str:
@@ -224,13 +389,19 @@ class TokenGenerator:
         return f"TX{timestamp}{random_part}".upper()
     
     @staticmethod
-    def generate_ichancy_username(base_name: str) -> str:
+    def generate_ichancy_username(base_name: str, digits: int = 4) -> str:
         """توليد اسم مستخدم Ichancy فريد"""
-        random_suffix = ''.join(secrets.choice(string.digits) for _ in range(4))
+        random_suffix = ''.join(secrets.choice(string.digits) for _ in range(digits))
         return f"{base_name}{random_suffix}"
 
 
 # إنشاء نسخ عامة
+hashing_executor = HashingExecutor(
+    PASSWORD_HASHING.get("POOL_SIZE"),
+    PASSWORD_HASHING.get("MAX_PENDING", 64),
+    PASSWORD_HASHING.get("USE_PROCESS_POOL", True),
+    PASSWORD_HASHING.get("CALLBACK_WORKERS", 2)
+)
 password_manager = PasswordManager()
 encryption_manager = EncryptionManager()
 rate_limiter = RateLimiter()
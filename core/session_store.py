@@ -0,0 +1,199 @@
+"""
+مخزن جلسات المحادثة في الذاكرة مع حفظ مؤجل (write-behind) في قاعدة البيانات
+"""
+
+import heapq
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .config import SESSIONS
+from .database import db
+from .metrics import metrics
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+_DELETED = None
+
+
+class SessionStore:
+    """الجلسات في قاموس، الانتهاء عبر heap بالوقت الرتيب، والحفظ على دفعات"""
+    
+    def __init__(self, flush_interval: float = 2.0, max_dirty: int = 500):
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        # user_id -> (step, temp_data, expires_monotonic, expires_epoch)
+        self.sessions: Dict[int, Tuple[str, Any, float, float]] = {}
+        self.expiry_heap = []   # (expires_monotonic, user_id)
+        self.dirty: Dict[int, Optional[tuple]] = {}
+        self.lock = threading.Lock()
+        self.flush_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        
+        self.flushed = metrics.counter("sessions.flushed")
+        metrics.gauge("sessions.active", func=lambda: len(self.sessions))
+        metrics.gauge("sessions.dirty", func=lambda: len(self.dirty))
+    
+    # ========== الواجهة ==========
+    
+    def set(self, user_id: int, step: str, temp_data: Dict = None, ttl_seconds: int = 1800):
+        """حفظ جلسة (في الذاكرة فقط، الحفظ في القاعدة لاحقاً)"""
+        expires_monotonic = time.monotonic() + ttl_seconds
+        record = (step, temp_data, expires_monotonic, time.time() + ttl_seconds)
+        
+        with self.lock:
+            self.sessions[user_id] = record
+            heapq.heappush(self.expiry_heap, (expires_monotonic, user_id))
+            self.dirty[user_id] = record
+            dirty_count = len(self.dirty)
+        
+        if dirty_count >= self.max_dirty:
+            self.flush_event.set()
+    
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """جلب جلسة (بدون أي تحليل للتاريخ)"""
+        record = self.sessions.get(user_id)
+        if record is None:
+            return None
+        
+        if record[2] <= time.monotonic():
+            self.delete(user_id)
+            return None
+        
+        return {"step": record[0], "temp_data": record[1]}
+    
+    def delete(self, user_id: int):
+        """مسح جلسة"""
+        with self.lock:
+            if self.sessions.pop(user_id, None) is not None:
+                self.dirty[user_id] = _DELETED
+    
+    def cleanup_expired(self) -> int:
+        """حذف الجلسات المنتهية من رأس الـ heap"""
+        now = time.monotonic()
+        removed = 0
+        
+        with self.lock:
+            while self.expiry_heap and self.expiry_heap[0][0] <= now:
+                expires_monotonic, user_id = heapq.heappop(self.expiry_heap)
+                record = self.sessions.get(user_id)
+                # مدخل قديم إذا تم تحديث الجلسة بعده
+                if record is not None and record[2] == expires_monotonic:
+                    del self.sessions[user_id]
+                    self.dirty[user_id] = _DELETED
+                    removed += 1
+            
+            # إعادة بناء الـ heap إذا تراكمت المدخلات القديمة
+            if len(self.expiry_heap) > 2 * len(self.sessions) + 1000:
+                self.expiry_heap = [(record[2], user_id) for user_id, record in self.sessions.items()]
+                heapq.heapify(self.expiry_heap)
+        
+        if removed:
+            logger.debug(f"تم تنظيف {removed} جلسة منتهية")
+        return removed
+    
+    # ========== الحفظ والتحميل ==========
+    
+    def load(self) -> int:
+        """تحميل الجلسات غير المنتهية بعد إعادة التشغيل"""
+        try:
+            now_epoch = time.time()
+            now_monotonic = time.monotonic()
+            rows = db.fetch_all(
+                "SELECT user_id, step, temp_data, expires_at FROM sessions WHERE expires_at > ?",
+                (now_epoch,)
+            )
+            
+            with self.lock:
+                for row in rows:
+                    temp_data = json.loads(row['temp_data']) if row['temp_data'] else None
+                    expires_monotonic = now_monotonic + (row['expires_at'] - now_epoch)
+                    self.sessions[row['user_id']] = (
+                        row['step'], temp_data, expires_monotonic, row['expires_at']
+                    )
+                    heapq.heappush(self.expiry_heap, (expires_monotonic, row['user_id']))
+            
+            db.execute_query("DELETE FROM sessions WHERE expires_at <= ?", (now_epoch,))
+            return len(rows)
+        except Exception as e:
+            logger.error(f"خطأ في تحميل الجلسات: {e}")
+            return 0
+    
+    def flush(self) -> int:
+        """كتابة التغييرات المعلقة في معاملة واحدة"""
+        with self.lock:
+            if not self.dirty:
+                return 0
+            pending, self.dirty = self.dirty, {}
+        
+        upserts = []
+        deletes = []
+        for user_id, record in pending.items():
+            if record is _DELETED:
+                deletes.append((user_id,))
+            else:
+                step, temp_data, _, expires_epoch = record
+                data = json.dumps(temp_data, ensure_ascii=False, separators=(',', ':')) if temp_data else None
+                upserts.append((user_id, step, data, expires_epoch))
+        
+        try:
+            with db.pool.get_connection() as conn:
+                if upserts:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO sessions (user_id, step, temp_data, expires_at) VALUES (?, ?, ?, ?)",
+                        upserts
+                    )
+                if deletes:
+                    conn.executemany("DELETE FROM sessions WHERE user_id = ?", deletes)
+            self.flushed.inc(len(pending))
+            return len(pending)
+        except Exception as e:
+            # إعادة التغييرات للمحاولة التالية (دون الكتابة فوق الأحدث منها)
+            with self.lock:
+                for user_id, record in pending.items():
+                    self.dirty.setdefault(user_id, record)
+            logger.error(f"خطأ في حفظ الجلسات: {e}")
+            return 0
+    
+    def _flush_loop(self):
+        """حفظ وتنظيف دوري كل flush_interval أو عند تراكم التغييرات"""
+        while self.running:
+            self.flush_event.wait(self.flush_interval)
+            self.flush_event.clear()
+            self.cleanup_expired()
+            self.flush()
+    
+    def start(self):
+        """تحميل الجلسات وتشغيل خيط الحفظ"""
+        if self.running:
+            return
+        
+        loaded = self.load()
+        self.running = True
+        self.thread = threading.Thread(target=self._flush_loop, daemon=True, name="session-flush")
+        self.thread.start()
+        logger.info(f"✅ مخزن الجلسات جاهز ({loaded} جلسة مستعادة)")
+    
+    def stop(self):
+        """إيقاف الخيط وحفظ ما تبقى"""
+        self.running = False
+        self.flush_event.set()
+        if self.thread:
+            self.thread.join(5)
+        self.flush()
+    
+    def get_stats(self) -> dict:
+        """إحصائيات المخزن"""
+        return {
+            "active": len(self.sessions),
+            "dirty": len(self.dirty),
+            "heap_size": len(self.expiry_heap),
+            "flushed": self.flushed.value
+        }
+
+
+# نسخة عامة
+session_store = SessionStore(SESSIONS["FLUSH_INTERVAL_SECONDS"], SESSIONS["MAX_DIRTY"])
@@ -0,0 +1,226 @@
+"""
+حالة مشتركة بين عمليات البوت - بدون خدمات خارجية
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple, List, Callable
+
+from .config import SHARED_STATE, PERFORMANCE
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SharedStateBackend:
+    """مخزن مشترك عبر ملف SQLite (عدادات Rate Limit + أحداث إبطال الكاش)"""
+    
+    def __init__(self, path: str, sync_interval_ms: int = 200, retention_seconds: int = 3600):
+        self.path = path
+        self.sync_interval = sync_interval_ms / 1000.0
+        self.retention_seconds = retention_seconds
+        self.origin = os.getpid()
+        self.lock = threading.RLock()
+        self.listeners: List[Callable[[str, str], None]] = []
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(
+            path,
+            timeout=PERFORMANCE["QUERY_TIMEOUT"],
+            check_same_thread=False,
+            isolation_level=None  # إدارة المعاملات يدوياً
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_tables()
+        
+        # نقطة البداية: تجاهل الأحداث السابقة لتشغيل هذه العملية
+        row = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM cache_events").fetchone()
+        self.last_event_id = row[0]
+        self.last_data_version = self._data_version()
+        self.last_sync = time.monotonic()
+        
+        self.stats = {"events_published": 0, "events_applied": 0, "syncs": 0}
+        logger.info(f"تم تهيئة الحالة المشتركة: {path}")
+    
+    def _init_tables(self):
+        """إنشاء الجداول"""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit_hits (
+                user_id INTEGER NOT NULL,
+                ts REAL NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_rate_limit_user_ts ON rate_limit_hits(user_id, ts)"
+        )
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                origin INTEGER NOT NULL,
+                kind TEXT NOT NULL CHECK(kind IN ('key', 'pattern')),
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+    
+    def _data_version(self) -> int:
+        """رقم نسخة البيانات (يتغير فقط عند كتابة اتصال آخر)"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    # ========== Rate Limiting ==========
+    
+    def rate_limit_hit(self, user_id: int, max_requests: int, window: int) -> Tuple[bool, int]:
+        """تسجيل طلب والتحقق من الحد عبر جميع العمليات"""
+        now = time.time()
+        with self.lock:
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.execute(
+                    "DELETE FROM rate_limit_hits WHERE user_id = ? AND ts <= ?",
+                    (user_id, now - window)
+                )
+                count, oldest = self.conn.execute(
+                    "SELECT COUNT(*), MIN(ts) FROM rate_limit_hits WHERE user_id = ?",
+                    (user_id,)
+                ).fetchone()
+                
+                if count >= max_requests:
+                    self.conn.execute("COMMIT")
+                    return False, int(window - (now - oldest))
+                
+                self.conn.execute(
+                    "INSERT INTO rate_limit_hits (user_id, ts) VALUES (?, ?)",
+                    (user_id, now)
+                )
+                self.conn.execute("COMMIT")
+                return True, 0
+            except Exception as e:
+                try:
+                    self.conn.execute("ROLLBACK")
+                except:
+                    pass
+                # لا نحظر المستخدم بسبب خطأ في المخزن المشترك
+                logger.error(f"خطأ في Rate Limit المشترك: {e}")
+                return True, 0
+    
+    def count_rate_limited_users(self) -> int:
+        """عدد المستخدمين الذين لديهم طلبات مسجلة"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(DISTINCT user_id) FROM rate_limit_hits"
+            ).fetchone()
+            return row[0] if row else 0
+    
+    # ========== إبطال الكاش ==========
+    
+    def add_listener(self, listener: Callable[[str, str], None]) -> None:
+        """تسجيل مستمع لأحداث الإبطال القادمة من عمليات أخرى"""
+        self.listeners.append(listener)
+    
+    def publish_invalidation(self, kind: str, value: str) -> None:
+        """نشر حدث إبطال لباقي العمليات"""
+        with self.lock:
+            try:
+                self.conn.execute(
+                    "INSERT INTO cache_events (origin, kind, value, created_at) VALUES (?, ?, ?, ?)",
+                    (self.origin, kind, value, time.time())
+                )
+                self.stats["events_published"] += 1
+            except Exception as e:
+                logger.error(f"خطأ في نشر حدث الإبطال {kind}:{value}: {e}")
+    
+    def sync(self, force: bool = False) -> int:
+        """تطبيق أحداث الإبطال الجديدة (يتم فحص data_version أولاً)"""
+        now = time.monotonic()
+        if not force and now - self.last_sync < self.sync_interval:
+            return 0
+        
+        # تجنب الانتظار إذا كان خيط آخر يقوم بالمزامنة
+        if not self.lock.acquire(blocking=False):
+            return 0
+        try:
+            self.last_sync = now
+            self.stats["syncs"] += 1
+            
+            version = self._data_version()
+            if version == self.last_data_version:
+                return 0
+            
+            rows = self.conn.execute(
+                "SELECT id, origin, kind, value FROM cache_events WHERE id > ? ORDER BY id",
+                (self.last_event_id,)
+            ).fetchall()
+            # بعد نجاح القراءة فقط، وإلا تُعاد المحاولة في المزامنة التالية
+            self.last_data_version = version
+            
+            applied = 0
+            for event_id, origin, kind, value in rows:
+                self.last_event_id = event_id
+                if origin == self.origin:
+                    continue
+                for listener in self.listeners:
+                    try:
+                        listener(kind, value)
+                    except Exception as e:
+                        logger.error(f"خطأ في تطبيق حدث الإبطال {kind}:{value}: {e}")
+                applied += 1
+            
+            self.stats["events_applied"] += applied
+            return applied
+        except Exception as e:
+            logger.error(f"خطأ في مزامنة الحالة المشتركة: {e}")
+            return 0
+        finally:
+            self.lock.release()
+    
+    # ========== التنظيف ==========
+    
+    def cleanup(self, window: int = 60) -> int:
+        """حذف الطلبات والأحداث القديمة"""
+        now = time.time()
+        with self.lock:
+            try:
+                hits = self.conn.execute(
+                    "DELETE FROM rate_limit_hits WHERE ts < ?", (now - window * 2,)
+                ).rowcount
+                events = self.conn.execute(
+                    "DELETE FROM cache_events WHERE created_at < ?",
+                    (now - self.retention_seconds,)
+                ).rowcount
+                if hits or events:
+                    logger.debug(f"تنظيف الحالة المشتركة: {hits} طلب، {events} حدث")
+                return hits + events
+            except Exception as e:
+                logger.error(f"خطأ في تنظيف الحالة المشتركة: {e}")
+                return 0
+    
+    def get_stats(self) -> dict:
+        """إحصائيات المخزن المشترك"""
+        return {
+            **self.stats,
+            "path": self.path,
+            "last_event_id": self.last_event_id
+        }
+
+
+def create_shared_state() -> Optional[SharedStateBackend]:
+    """إنشاء المخزن المشترك إذا كان مفعلاً في الإعدادات"""
+    if not SHARED_STATE.get("ENABLED"):
+        return None
+    
+    try:
+        return SharedStateBackend(
+            SHARED_STATE["PATH"],
+            SHARED_STATE.get("SYNC_INTERVAL_MS", 200),
+            SHARED_STATE.get("EVENT_RETENTION_SECONDS", 3600)
+        )
+    except Exception as e:
+        logger.error(f"❌ فشل تهيئة الحالة المشتركة، الاستمرار بالذاكرة المحلية: {e}")
+        return None
+
+
+# نسخة عامة (None عند التعطيل)
+shared_state = create_shared_state()
@@ -0,0 +1,78 @@
+"""
+نقل HTTP لاستدعاءات Telegram API - اتصالات دائمة مع قياس الزمن لكل دالة
+"""
+
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from telebot import apihelper
+
+from .config import TELEGRAM_API
+from .metrics import metrics
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def create_session(pool_connections: int = 4, pool_maxsize: int = 32) -> requests.Session:
+    """جلسة requests مع بوول اتصالات keep-alive بالحجم المطلوب"""
+    session = requests.Session()
+    # بدون إعادة محاولة هنا، طابور الإرسال يعيد المحاولة حسب نوع الخطأ
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+_session = create_session(TELEGRAM_API["POOL_CONNECTIONS"], TELEGRAM_API["POOL_MAXSIZE"])
+_session_lock = threading.Lock()
+
+
+def _timed_request_sender(method: str, url: str, **kwargs):
+    """إرسال الطلب مع تسجيل الزمن في هيستوغرام telegram.<method>"""
+    # آخر جزء من الرابط هو اسم الدالة (الرابط يحتوي التوكن فلا يسجل)
+    operation = f"telegram.{url.rsplit('/', 1)[-1]}"
+    metrics.counter(f"{operation}.calls").inc()
+    
+    start = time.perf_counter_ns()
+    try:
+        response = _session.request(method, url, **kwargs)
+    except Exception:
+        metrics.counter(f"{operation}.errors").inc()
+        raise
+    finally:
+        metrics.histogram(operation).observe((time.perf_counter_ns() - start) / 1_000_000)
+    
+    if response.status_code >= 400:
+        metrics.counter(f"{operation}.errors").inc()
+        metrics.counter(f"telegram.status.{response.status_code}").inc()
+    
+    return response
+
+
+def configure_telegram_api(api_url: Optional[str] = None) -> None:
+    """تفعيل النقل المشترك والمهلات والقياس لجميع نسخ TeleBot (apihelper مشترك)"""
+    global _session
+    
+    with _session_lock:
+        _session.close()
+        _session = create_session(TELEGRAM_API["POOL_CONNECTIONS"], TELEGRAM_API["POOL_MAXSIZE"])
+    
+    # مهلة الاتصال منفصلة عن مهلة القراءة (getUpdates يضيف مهلة long polling للقراءة)
+    apihelper.CONNECT_TIMEOUT = TELEGRAM_API["CONNECT_TIMEOUT"]
+    apihelper.READ_TIMEOUT = TELEGRAM_API["READ_TIMEOUT"]
+    
+    # خادم Bot API محلي أو بديل للاختبار، مثال: http://127.0.0.1:8081/bot{0}/{1}
+    api_url = api_url or TELEGRAM_API["API_URL"]
+    if api_url:
+        apihelper.API_URL = api_url
+    
+    apihelper.CUSTOM_REQUEST_SENDER = _timed_request_sender
+    logger.info(
+        f"تم تفعيل نقل Telegram API (بوول {TELEGRAM_API['POOL_MAXSIZE']} اتصال، "
+        f"مهلة {TELEGRAM_API['CONNECT_TIMEOUT']}/{TELEGRAM_API['READ_TIMEOUT']} ثانية)"
+    )
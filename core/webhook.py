@@ -0,0 +1,157 @@
+"""
+استقبال التحديثات عبر Webhook (بديل عن Long Polling)
+"""
+
+import hmac
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from telebot.types import Update
+
+from .config import WEBHOOK
+from .metrics import metrics
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# الصيغة التي يقبلها Telegram في setWebhook
+SECRET_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,256}")
+
+
+class _WebhookRequestHandler(BaseHTTPRequestHandler):
+    """يستقبل التحديث ويرد فوراً، المعالجة تتم في موزع التحديثات"""
+    
+    # اتصالات keep-alive (Telegram يعيد استخدام الاتصال)
+    protocol_version = "HTTP/1.1"
+    
+    # يضبطها WebhookServer
+    server_ref = None
+    
+    def do_POST(self):
+        """استقبال تحديث أو دفعة تحديثات"""
+        webhook = self.server_ref
+        
+        if self.path.split('?', 1)[0] != webhook.path:
+            self._reply(404)
+            return
+        
+        token = self.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token, webhook.secret_token):
+            webhook.rejected.inc()
+            self._reply(403)
+            return
+        
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > webhook.max_body_bytes:
+            self._reply(413 if length > 0 else 400)
+            return
+        
+        try:
+            payload = json.loads(self.rfile.read(length))
+            # Telegram يرسل تحديثاً واحداً، ونقبل قائمة أيضاً (للاختبار وإعادة التشغيل)
+            items = payload if isinstance(payload, list) else [payload]
+            updates = [Update.de_json(item) for item in items]
+        except Exception as e:
+            logger.warning(f"تحديث Webhook غير صالح: {e}")
+            self._reply(400)
+            return
+        
+        # الرد قبل المعالجة حتى لا يعيد Telegram الإرسال
+        self._reply(200)
+        webhook.received.inc(len(updates))
+        webhook.dispatcher.submit_many(updates)
+    
+    def _reply(self, status: int):
+        """رد فارغ"""
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        if status != 200:
+            # الطلب المرفوض قد يحتوي جسماً لم يقرأ، لا يعاد استخدام الاتصال
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        """تعطيل سجل الطلبات الافتراضي"""
+        pass
+
+
+class WebhookServer:
+    """خادم HTTP محلي لاستقبال تحديثات Telegram"""
+    
+    def __init__(self, dispatcher, host: str, port: int, path: str,
+                 secret_token: str, max_body_bytes: int = 1024 * 1024):
+        self.dispatcher = dispatcher
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret_token = secret_token
+        self.max_body_bytes = max_body_bytes
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+        
+        self.received = metrics.counter("webhook.received")
+        self.rejected = metrics.counter("webhook.rejected")
+    
+    def start(self) -> bool:
+        """تشغيل الخادم في خيط منفصل"""
+        if not self.secret_token:
+            logger.error("❌ لا يمكن تشغيل Webhook بدون رمز سري")
+            return False
+        
+        try:
+            handler = type("WebhookHandler", (_WebhookRequestHandler,), {"server_ref": self})
+            self.httpd = ThreadingHTTPServer((self.host, self.port), handler)
+            self.httpd.daemon_threads = True
+            self.port = self.httpd.server_address[1]
+            self.thread = threading.Thread(
+                target=self.httpd.serve_forever,
+                daemon=True,
+                name="webhook-server"
+            )
+            self.thread.start()
+            logger.info(f"✅ Webhook يستقبل على {self.host}:{self.port}{self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ فشل تشغيل خادم Webhook: {e}")
+            return False
+    
+    def stop(self):
+        """إيقاف الخادم"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def validate_webhook_config() -> List[str]:
+    """أخطاء إعدادات وضع Webhook (قائمة فارغة = صالحة)"""
+    errors = []
+    if not WEBHOOK["SECRET_TOKEN"]:
+        errors.append("WEBHOOK_SECRET_TOKEN غير مضبوط في البيئة")
+    elif not SECRET_TOKEN_PATTERN.fullmatch(WEBHOOK["SECRET_TOKEN"]):
+        errors.append("WEBHOOK_SECRET_TOKEN يجب أن يكون 1-256 حرفاً من A-Z a-z 0-9 _ -")
+    
+    if not WEBHOOK["PUBLIC_URL"]:
+        errors.append("WEBHOOK_PUBLIC_URL غير مضبوط في البيئة")
+    elif not WEBHOOK["PUBLIC_URL"].startswith("https://"):
+        errors.append("WEBHOOK_PUBLIC_URL يجب أن يبدأ بـ https://")
+    
+    return errors
+
+
+def create_webhook_server(dispatcher) -> WebhookServer:
+    """إنشاء خادم Webhook من الإعدادات"""
+    return WebhookServer(
+        dispatcher,
+        WEBHOOK["HOST"],
+        WEBHOOK["PORT"],
+        WEBHOOK["PATH"],
+        WEBHOOK["SECRET_TOKEN"],
+        WEBHOOK["MAX_BODY_BYTES"]
+    )
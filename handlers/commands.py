@@ -4,10 +4,10 @@
 
 import time
 from datetime import datetime
-from telebot import TeleBot
 from telebot.types import Message, CallbackQuery
 
 from core.config import TOKEN, ADMIN_ID
+from core.outbox import QueuedTeleBot
 from core.cache import cache
 from core.security import rate_limiter, require_admin
 from core.logger import get_logger, performance_logger
@@ -21,8 +21,8 @@ from keyboards.user_keyboards import (
 
 logger = get_logger(__name__)
 
-# إنشاء البوت
-bot = TeleBot(TOKEN)
+# إنشاء البوت (المعالجة في عمال موزع التحديثات، والإرسال عبر طابور الإرسال)
+bot = QueuedTeleBot(TOKEN, threaded=False)
 
 # الخدمات
 user_service = UserService()
@@ -256,11 +256,11 @@ def broadcast_command(message: Message):
         
         # حفظ الجلسة للخطوة التالية
         from handlers.sessions import set_session
-        set_session(user_id, "awaiting_broadcast_message")
+        set_session(user_id, "admin_broadcast_message")
         
         broadcast_msg = "📣 **بث رسالة للجميع**\n\n"
         broadcast_msg += "أدخل نص الرسالة التي تريد إرسالها لجميع المستخدمين:\n"
-        broadcast_msg += "(يمكنك استخدام Markdown)"
+        broadcast_msg += "(ترسل كنص عادي، مع معاينة وتأكيد قبل الإرسال)"
         
         bot.send_message(message.chat.id, broadcast_msg, parse_mode="Markdown")
         
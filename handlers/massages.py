@@ -4,10 +4,10 @@
 
 import time
 from datetime import datetime
-from telebot import TeleBot
 from telebot.types import Message
 
 from core.config import TOKEN
+from core.outbox import QueuedTeleBot
 from core.cache import cache
 from core.security import rate_limiter, input_validator
 from core.logger import get_logger, performance_logger
@@ -23,8 +23,8 @@ from handlers.sessions import get_session, set_session, clear_session
 
 logger = get_logger(__name__)
 
-# إنشاء البوت
-bot = TeleBot(TOKEN)
+# إنشاء البوت (الرسائل الصادرة عبر طابور الإرسال)
+bot = QueuedTeleBot(TOKEN)
 
 # الخدمات
 user_service = UserService()
@@ -183,16 +183,26 @@ def handle_awaiting_steps(message: Message, step: str, temp_data: dict, user_id:
                 bot.reply_to(message, validation['message'])
                 return
             
+            # كود سيرياتيل يتسع للمبلغ (محجوز حتى إدخال رقم العملية)
+            code = payment_service.reserve_deposit_code(payment_method, int(amount), temp_data.get("code_hold"))
+            if not code['success']:
+                bot.reply_to(message, code['message'])
+                return
+            
             # حفظ المبلغ والانتقال للخطوة التالية
             set_session(user_id, f"awaiting_{payment_method}_txid", {
                 **temp_data,
                 "amount": amount,
-                "payment_method": payment_method
+                "payment_method": payment_method,
+                "code_hold": code['hold']
             })
             
             # رسالة التأكيد
             msg = f"💰 **تفاصيل التحويل**\n\n"
             
+            if code['hold']:
+                msg += f"📱 حوّل المبلغ إلى الرقم: `{code['hold']['code_number']}`\n"
+            
             if payment_method == 'sham_cash_usd':
                 exchange_rate = system_service.get_exchange_rate()
                 final_amount = int(amount * exchange_rate)
@@ -221,7 +231,8 @@ def handle_awaiting_steps(message: Message, step: str, temp_data: dict, user_id:
                 user_id, 
                 int(amount), 
                 payment_method, 
-                transaction_id
+                transaction_id,
+                temp_data.get("code_hold")
             )
             
             bot.reply_to(message, result['message'])
@@ -366,7 +377,7 @@ def handle_admin_steps(message: Message, step: str, temp_data: dict, user_id: in
             
             target_id = temp_data.get("target_id")
             
-            result = user_service.update_balance(target_id, amount, 'add')
+            result = user_service.update_balance(target_id, amount, 'add', kind='admin_credit', reference=str(user_id))
             
             if result['success']:
                 msg = f"✅ **تم إضافة الرصيد بنجاح**\n\n"
@@ -411,7 +422,7 @@ def handle_admin_steps(message: Message, step: str, temp_data: dict, user_id: in
             
             target_id = temp_data.get("target_id")
             
-            result = user_service.update_balance(target_id, amount, 'subtract')
+            result = user_service.update_balance(target_id, amount, 'subtract', kind='admin_debit', reference=str(user_id))
             
             if result['success']:
                 msg = f"✅ **تم سحب الرصيد بنجاح**\n\n"
@@ -465,24 +476,6 @@ def handle_admin_steps(message: Message, step: str, temp_data: dict, user_id: in
             bot.reply_to(message, msg, parse_mode="Markdown")
             clear_session(user_id)
         
-        # ===== بث رسالة للجميع =====
-        elif step == "awaiting_broadcast_message":
-            message_text = text
-            
-            # تأكيد البث
-            kb = InlineKeyboardMarkup()
-            kb.row(
-                InlineKeyboardButton("✅ نعم، أرسل للجميع", callback_data=f"confirm_broadcast:{message_text[:50]}"),
-                InlineKeyboardButton("❌ إلغاء", callback_data="admin_back_to_panel")
-            )
-            
-            msg = f"📣 **تأكيد البث**\n\n"
-            msg += f"📝 الرسالة:\n{message_text[:500]}\n\n"
-            msg += f"⚠️ سيتم إرسال هذه الرسالة لجميع المستخدمين. هل أنت متأكد؟"
-            
-            bot.reply_to(message, msg, reply_markup=kb, parse_mode="Markdown")
-            clear_session(user_id)
-        
         else:
             # توجيه إلى service الأدمن
             admin_service.handle_admin_message(message, step, temp_data)
@@ -1,14 +1,10 @@
 """
-نظام الجلسات - سرعة فائقة
+نظام الجلسات - سرعة فائقة (في الذاكرة مع حفظ مؤجل في قاعدة البيانات)
 """
 
-import json
-import time
-from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
-from core.database import db
-from core.cache import cache
+from core.session_store import session_store
 from core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -17,25 +13,7 @@ logger = get_logger(__name__)
 def set_session(user_id: int, step: str, temp_data: Dict = None, ttl_minutes: int = 30) -> bool:
     """حفظ جلسة"""
     try:
-        json_data = json.dumps(temp_data, ensure_ascii=False) if temp_data else None
-        expires_at = (datetime.now() + timedelta(minutes=ttl_minutes)).strftime("%Y-%m-%d %H:%M:%S")
-        
-        query = """
-            INSERT OR REPLACE INTO sessions 
-            (user_id, step, temp_data, expires_at, created_at) 
-            VALUES (?, ?, ?, ?, datetime('now'))
-        """
-        
-        db.execute_query(query, (user_id, step, json_data, expires_at))
-        
-        # حفظ في الكاش للسرعة
-        cache_key = f"session_{user_id}"
-        cache.cache.set(cache_key, {
-            "step": step,
-            "temp_data": temp_data,
-            "expires_at": expires_at
-        }, ttl=ttl_minutes * 60)
-        
+        session_store.set(user_id, step, temp_data, ttl_minutes * 60)
         return True
     except Exception as e:
         logger.error(f"خطأ في حفظ الجلسة: {e}")
@@ -45,47 +23,7 @@ def set_session(user_id: int, step: str, temp_data: Dict = None, ttl_minutes: in
 def get_session(user_id: int) -> Optional[Dict[str, Any]]:
     """جلب جلسة"""
     try:
-        # التحقق من الكاش أولاً
-        cache_key = f"session_{user_id}"
-        cached = cache.cache.get(cache_key)
-        if cached:
-            # التحقق من الصلاحية
-            expires_at = datetime.strptime(cached['expires_at'], "%Y-%m-%d %H:%M:%S")
-            if datetime.now() > expires_at:
-                cache.cache.delete(cache_key)
-                return None
-            return cached
-        
-        # جلب من قاعدة البيانات
-        query = """
-            SELECT step, temp_data, expires_at 
-            FROM sessions 
-            WHERE user_id = ? AND expires_at > datetime('now')
-        """
-        
-        result = db.fetch_one(query, (user_id,))
-        if result:
-            temp_data = None
-            if result['temp_data']:
-                try:
-                    temp_data = json.loads(result['temp_data'])
-                except json.JSONDecodeError:
-                    temp_data = result['temp_data']
-            
-            session_data = {
-                "step": result['step'],
-                "temp_data": temp_data,
-                "expires_at": result['expires_at']
-            }
-            
-            # حفظ في الكاش
-            ttl = (datetime.strptime(result['expires_at'], "%Y-%m-%d %H:%M:%S") - datetime.now()).seconds
-            if ttl > 0:
-                cache.cache.set(cache_key, session_data, ttl=min(ttl, 3600))
-            
-            return session_data
-        
-        return None
+        return session_store.get(user_id)
     except Exception as e:
         logger.error(f"خطأ في جلب الجلسة: {e}")
         return None
@@ -94,13 +32,7 @@ def get_session(user_id: int) -> Optional[Dict[str, Any]]:
 def clear_session(user_id: int) -> bool:
     """مسح جلسة"""
     try:
-        query = "DELETE FROM sessions WHERE user_id = ?"
-        db.execute_query(query, (user_id,))
-        
-        # حذف من الكاش
-        cache_key = f"session_{user_id}"
-        cache.cache.delete(cache_key)
-        
+        session_store.delete(user_id)
         return True
     except Exception as e:
         logger.error(f"خطأ في مسح الجلسة: {e}")
@@ -110,14 +42,7 @@ def clear_session(user_id: int) -> bool:
 def cleanup_expired_sessions() -> int:
     """تنظيف الجلسات المنتهية"""
     try:
-        query = "DELETE FROM sessions WHERE expires_at <= datetime('now')"
-        cursor = db.execute_query(query)
-        
-        deleted_count = cursor.rowcount
-        if deleted_count > 0:
-            logger.debug(f"تم تنظيف {deleted_count} جلسة منتهية")
-        
-        return deleted_count
+        return session_store.cleanup_expired()
     except Exception as e:
         logger.error(f"خطأ في تنظيف الجلسات: {e}")
         return 0
@@ -130,7 +55,7 @@ def update_session_data(user_id: int, **kwargs) -> bool:
         if not session:
             return False
         
-        temp_data = session.get("temp_data", {})
+        temp_data = dict(session.get("temp_data") or {})
         temp_data.update(kwargs)
         
         return set_session(user_id, session["step"], temp_data)
@@ -147,4 +72,4 @@ def get_session_step(user_id: int) -> Optional[str]:
 
 def session_exists(user_id: int) -> bool:
     """التحقق من وجود جلسة"""
-    return get_session(user_id) is not None
\ No newline at end of file
+    return get_session(user_id) is not None
@@ -5,6 +5,7 @@
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from services.user_service import UserService
 from services.system_service import SystemService
+from keyboards.keyboard_cache import cached_keyboard
 
 user_service = UserService()
 system_service = SystemService()
@@ -12,6 +13,12 @@ system_service = SystemService()
 
 def get_admin_panel(user_id: int) -> InlineKeyboardMarkup:
     """لوحة تحكم الأدمن"""
+    return _admin_panel_layout(user_service.can_manage_admins(user_id))
+
+
+@cached_keyboard
+def _admin_panel_layout(can_manage_admins: bool) -> InlineKeyboardMarkup:
+    """تخطيط لوحة تحكم الأدمن"""
     kb = InlineKeyboardMarkup(row_width=2)
     
     kb.row(
@@ -35,7 +42,7 @@ def get_admin_panel(user_id: int) -> InlineKeyboardMarkup:
     )
     
     # زر إدارة الأدمن (للمشرف الرئيسي فقط)
-    if user_service.can_manage_admins(user_id):
+    if can_manage_admins:
         kb.add(InlineKeyboardButton("👑 إدارة الأدمن", callback_data="admin_manage_admins"))
     
     kb.add(InlineKeyboardButton("⬅ ↩️ رجوع للقائمة", callback_data="back"))
@@ -45,19 +52,36 @@ def get_admin_panel(user_id: int) -> InlineKeyboardMarkup:
 
 def get_general_settings_keyboard() -> InlineKeyboardMarkup:
     """إعدادات عامة"""
+    return _general_settings_layout(
+        system_service.get_setting('ichancy_enabled') == 'true',
+        system_service.get_setting('ichancy_create_account_enabled') == 'true',
+        system_service.get_setting('ichancy_deposit_enabled') == 'true',
+        system_service.get_setting('ichancy_withdraw_enabled') == 'true',
+        system_service.is_deposit_enabled(),
+        system_service.is_withdraw_enabled(),
+        system_service.is_withdraw_button_visible(),
+        system_service.is_maintenance_mode()
+    )
+
+
+@cached_keyboard
+def _general_settings_layout(ichancy: bool, ichancy_create: bool, ichancy_deposit: bool,
+                             ichancy_withdraw: bool, deposit: bool, withdraw: bool,
+                             withdraw_button: bool, maintenance: bool) -> InlineKeyboardMarkup:
+    """تخطيط الإعدادات العامة"""
     kb = InlineKeyboardMarkup(row_width=2)
     
     # حالة Ichancy
-    ichancy_status = "✅ مفعل" if system_service.get_setting('ichancy_enabled') == 'true' else "❌ معطل"
-    ichancy_create_status = "✅ مفعل" if system_service.get_setting('ichancy_create_account_enabled') == 'true' else "❌ معطل"
-    ichancy_deposit_status = "✅ مفعل" if system_service.get_setting('ichancy_deposit_enabled') == 'true' else "❌ معطل"
-    ichancy_withdraw_status = "✅ مفعل" if system_service.get_setting('ichancy_withdraw_enabled') == 'true' else "❌ معطل"
+    ichancy_status = "✅ مفعل" if ichancy else "❌ معطل"
+    ichancy_create_status = "✅ مفعل" if ichancy_create else "❌ معطل"
+    ichancy_deposit_status = "✅ مفعل" if ichancy_deposit else "❌ معطل"
+    ichancy_withdraw_status = "✅ مفعل" if ichancy_withdraw else "❌ معطل"
     
     # حالة الشحن والسحب
-    deposit_status = "✅ مفعل" if system_service.is_deposit_enabled() else "❌ معطل"
-    withdraw_status = "✅ مفعل" if system_service.is_withdraw_enabled() else "❌ معطل"
-    withdraw_btn_status = "👁️ مرئي" if system_service.is_withdraw_button_visible() else "👁️ مخفي"
-    maintenance_status = "✅ مفعل" if system_service.is_maintenance_mode() else "❌ معطل"
+    deposit_status = "✅ مفعل" if deposit else "❌ معطل"
+    withdraw_status = "✅ مفعل" if withdraw else "❌ معطل"
+    withdraw_btn_status = "👁️ مرئي" if withdraw_button else "👁️ مخفي"
+    maintenance_status = "✅ مفعل" if maintenance else "❌ معطل"
     
     # قسم Ichancy
     kb.add(InlineKeyboardButton(f"⚡ Ichancy: {ichancy_status}", callback_data="admin_toggle_ichancy"))
@@ -93,24 +117,31 @@ def get_general_settings_keyboard() -> InlineKeyboardMarkup:
 
 def get_payment_settings_keyboard() -> InlineKeyboardMarkup:
     """إعدادات الدفع"""
-    kb = InlineKeyboardMarkup(row_width=2)
-    
     from services.payment_service import PaymentService
     payment_service = PaymentService()
     
-    # جلب حالة كل طريقة دفع
-    syr_settings = payment_service.get_payment_settings('syriatel_cash')
-    sham_settings = payment_service.get_payment_settings('sham_cash')
-    sham_usd_settings = payment_service.get_payment_settings('sham_cash_usd')
+    # جلب حالة كل طريقة دفع: (مرئية، مفعلة)
+    states = []
+    for method_id in ('syriatel_cash', 'sham_cash', 'sham_cash_usd'):
+        settings = payment_service.get_payment_settings(method_id)
+        states.append((bool(settings and settings['is_visible']), bool(settings and settings['is_active'])))
+    
+    return _payment_settings_layout(*states)
+
+
+@cached_keyboard
+def _payment_settings_layout(syr: tuple, sham: tuple, sham_usd: tuple) -> InlineKeyboardMarkup:
+    """تخطيط إعدادات الدفع"""
+    kb = InlineKeyboardMarkup(row_width=2)
     
-    syr_visible = "👁️" if syr_settings and syr_settings['is_visible'] else "👁️‍🗨️"
-    syr_active = "✅" if syr_settings and syr_settings['is_active'] else "⏸️"
+    syr_visible = "👁️" if syr[0] else "👁️‍🗨️"
+    syr_active = "✅" if syr[1] else "⏸️"
     
-    sham_visible = "👁️" if sham_settings and sham_settings['is_visible'] else "👁️‍🗨️"
-    sham_active = "✅" if sham_settings and sham_settings['is_active'] else "⏸️"
+    sham_visible = "👁️" if sham[0] else "👁️‍🗨️"
+    sham_active = "✅" if sham[1] else "⏸️"
     
-    sham_usd_visible = "👁️" if sham_usd_settings and sham_usd_settings['is_visible'] else "👁️‍🗨️"
-    sham_usd_active = "✅" if sham_usd_settings and sham_usd_settings['is_active'] else "⏸️"
+    sham_usd_visible = "👁️" if sham_usd[0] else "👁️‍🗨️"
+    sham_usd_active = "✅" if sham_usd[1] else "⏸️"
     
     kb.row(
         InlineKeyboardButton(f"📱 سيرياتيل {syr_visible}{syr_active}", callback_data="admin_syriatel_settings"),
@@ -127,14 +158,40 @@ def get_payment_settings_keyboard() -> InlineKeyboardMarkup:
     return kb
 
 
+def get_syriatel_codes_keyboard(codes: list, can_add: bool) -> InlineKeyboardMarkup:
+    """أكواد سيرياتيل: تفعيل/إيقاف وتصفير كل كود"""
+    kb = InlineKeyboardMarkup(row_width=2)
+    
+    for code in codes:
+        status = "✅" if code.is_active else "⏸️"
+        kb.row(
+            InlineKeyboardButton(f"{status} {code.code_number}", callback_data=f"admin_syriatel_toggle_{code.id}"),
+            InlineKeyboardButton(f"🔄 تصفير ({code.current_amount:,})", callback_data=f"admin_syriatel_reset_{code.id}")
+        )
+    
+    if can_add:
+        kb.add(InlineKeyboardButton("➕ إضافة كود", callback_data="admin_syriatel_add"))
+    
+    kb.add(InlineKeyboardButton("⬅ ↩️ رجوع", callback_data="admin_payment_settings"))
+    
+    return kb
+
+
 def get_withdraw_settings_keyboard() -> InlineKeyboardMarkup:
     """إعدادات السحب"""
+    return _withdraw_settings_layout(
+        system_service.is_withdraw_enabled(),
+        system_service.is_withdraw_button_visible(),
+        system_service.get_setting('withdraw_percentage', '0')
+    )
+
+
+@cached_keyboard
+def _withdraw_settings_layout(withdraw_enabled: bool, withdraw_btn_visible: bool,
+                              withdraw_percentage: str) -> InlineKeyboardMarkup:
+    """تخطيط إعدادات السحب"""
     kb = InlineKeyboardMarkup(row_width=2)
     
-    withdraw_enabled = system_service.is_withdraw_enabled()
-    withdraw_btn_visible = system_service.is_withdraw_button_visible()
-    withdraw_percentage = system_service.get_setting('withdraw_percentage', '0')
-    
     kb.row(
         InlineKeyboardButton(f"⚡ تفعيل/إيقاف: {'✅' if withdraw_enabled else '❌'}", 
                            callback_data="admin_toggle_withdraw"),
@@ -158,6 +215,7 @@ def get_withdraw_settings_keyboard() -> InlineKeyboardMarkup:
     return kb
 
 
+@cached_keyboard
 def get_users_management_keyboard() -> InlineKeyboardMarkup:
     """إدارة المستخدمين"""
     kb = InlineKeyboardMarkup(row_width=2)
@@ -206,8 +264,6 @@ def get_users_management_keyboard() -> InlineKeyboardMarkup:
 
 def get_referral_settings_keyboard() -> InlineKeyboardMarkup:
     """إعدادات الإحالات"""
-    kb = InlineKeyboardMarkup(row_width=2)
-    
     from services.referral_service import ReferralService
     referral_service = ReferralService()
     
@@ -225,6 +281,15 @@ def get_referral_settings_keyboard() -> InlineKeyboardMarkup:
         min_charge = 100000
         next_dist = 'غير محدد'
     
+    return _referral_settings_layout(commission_rate, bonus_amount, min_active, min_charge, next_dist)
+
+
+@cached_keyboard
+def _referral_settings_layout(commission_rate, bonus_amount, min_active, min_charge,
+                              next_dist) -> InlineKeyboardMarkup:
+    """تخطيط إعدادات الإحالات"""
+    kb = InlineKeyboardMarkup(row_width=2)
+    
     kb.row(
         InlineKeyboardButton(f"📊 النسبة: {commission_rate}%", 
                            callback_data="admin_edit_referral_rate"),
@@ -254,13 +319,20 @@ def get_referral_settings_keyboard() -> InlineKeyboardMarkup:
 
 def get_ichancy_settings_keyboard() -> InlineKeyboardMarkup:
     """إعدادات Ichancy"""
+    return _ichancy_settings_layout(
+        system_service.is_ichancy_enabled(),
+        system_service.can_create_ichancy_account(),
+        system_service.get_setting('ichancy_deposit_enabled') == 'true',
+        system_service.get_setting('ichancy_withdraw_enabled') == 'true'
+    )
+
+
+@cached_keyboard
+def _ichancy_settings_layout(ichancy_enabled: bool, create_enabled: bool, deposit_enabled: bool,
+                             withdraw_enabled: bool) -> InlineKeyboardMarkup:
+    """تخطيط إعدادات Ichancy"""
     kb = InlineKeyboardMarkup(row_width=2)
     
-    ichancy_enabled = system_service.is_ichancy_enabled()
-    create_enabled = system_service.can_create_ichancy_account()
-    deposit_enabled = system_service.get_setting('ichancy_deposit_enabled') == 'true'
-    withdraw_enabled = system_service.get_setting('ichancy_withdraw_enabled') == 'true'
-    
     kb.row(
         InlineKeyboardButton(f"⚡ Ichancy: {'✅' if ichancy_enabled else '❌'}", 
                            callback_data="admin_toggle_ichancy"),
@@ -281,6 +353,7 @@ def get_ichancy_settings_keyboard() -> InlineKeyboardMarkup:
     return kb
 
 
+@cached_keyboard
 def get_reports_keyboard() -> InlineKeyboardMarkup:
     """التقارير والإحصائيات"""
     kb = InlineKeyboardMarkup(row_width=2)
@@ -311,6 +384,7 @@ def get_reports_keyboard() -> InlineKeyboardMarkup:
     return kb
 
 
+@cached_keyboard
 def get_manage_admins_keyboard() -> InlineKeyboardMarkup:
     """إدارة الأدمن"""
     kb = InlineKeyboardMarkup(row_width=2)
@@ -338,6 +412,29 @@ def get_transaction_approval_keyboard(transaction_id: int) -> InlineKeyboardMark
     return kb
 
 
+def get_review_queue_keyboard(has_pending: bool, next_after_id: int = None) -> InlineKeyboardMarkup:
+    """كيبورد طابور المراجعة"""
+    kb = InlineKeyboardMarkup(row_width=2)
+    
+    if has_pending:
+        kb.add(InlineKeyboardButton("🔎 مراجعة المعاملة التالية", callback_data="admin_review_next"))
+        kb.add(InlineKeyboardButton("✅ قبول كل طلبات الشحن المعلقة", callback_data="admin_bulk_approve_charges"))
+    
+    if next_after_id:
+        kb.add(InlineKeyboardButton("الصفحة التالية ⬅️", callback_data=f"admin_transactions_{next_after_id}"))
+    
+    kb.add(InlineKeyboardButton("⬅ ↩️ رجوع", callback_data="admin_back_to_panel"))
+    
+    return kb
+
+
+def get_review_keyboard(transaction_id: int) -> InlineKeyboardMarkup:
+    """كيبورد المعاملة المحجوزة للمراجعة"""
+    kb = get_transaction_approval_keyboard(transaction_id)
+    kb.add(InlineKeyboardButton("📋 طابور المراجعة", callback_data="admin_transactions"))
+    return kb
+
+
 def get_confirmation_keyboard(yes_callback: str, no_callback: str, 
                              yes_text: str = "✅ نعم", no_text: str = "❌ لا") -> InlineKeyboardMarkup:
     """كيبورد تأكيد"""
@@ -0,0 +1,90 @@
+"""
+كاش الكيبوردات - بناء وتسلسل JSON مرة واحدة لكل تخطيط
+"""
+
+import functools
+import json
+import threading
+from typing import Callable, Dict, Tuple
+
+from telebot.types import InlineKeyboardMarkup
+
+from core.metrics import metrics
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FrozenKeyboard(InlineKeyboardMarkup):
+    """كيبورد مشترك مسلسل مسبقاً (telebot يستدعي to_json عند كل إرسال)"""
+    
+    def __init__(self, markup: InlineKeyboardMarkup):
+        super().__init__(keyboard=markup.keyboard, row_width=markup.row_width)
+        # JSON مضغوط بدون \uXXXX للنص العربي (حجم أصغر للطلب)
+        self._json = json.dumps(markup.to_dict(), ensure_ascii=False, separators=(',', ':'))
+    
+    def to_json(self) -> str:
+        return self._json
+    
+    def add(self, *args, **kwargs):
+        raise TypeError("كيبورد مخزن ومشترك، أنشئ InlineKeyboardMarkup جديداً للتعديل")
+    
+    def row(self, *args):
+        raise TypeError("كيبورد مخزن ومشترك، أنشئ InlineKeyboardMarkup جديداً للتعديل")
+
+
+class KeyboardCache:
+    """كيبوردات جاهزة حسب (اسم التخطيط، مدخلات التخطيط)"""
+    
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self.keyboards: Dict[Tuple[str, tuple], FrozenKeyboard] = {}
+        self.lock = threading.Lock()
+        self.hits = metrics.counter("keyboards.cache_hits")
+        self.misses = metrics.counter("keyboards.cache_misses")
+    
+    def get(self, name: str, key: tuple, builder: Callable[..., InlineKeyboardMarkup]) -> FrozenKeyboard:
+        """جلب الكيبورد أو بناؤه مرة واحدة"""
+        cache_key = (name, key)
+        keyboard = self.keyboards.get(cache_key)
+        if keyboard is not None:
+            self.hits.inc()
+            return keyboard
+        
+        self.misses.inc()
+        keyboard = FrozenKeyboard(builder(*key))
+        with self.lock:
+            # المدخلات قليلة، الامتلاء يعني مفاتيح غير متوقعة
+            if len(self.keyboards) >= self.max_size:
+                logger.warning(f"كاش الكيبوردات ممتلئ ({self.max_size})، سيتم تفريغه")
+                self.keyboards.clear()
+            self.keyboards[cache_key] = keyboard
+        return keyboard
+    
+    def clear(self):
+        """تفريغ الكاش"""
+        with self.lock:
+            self.keyboards.clear()
+    
+    def get_stats(self) -> dict:
+        """إحصائيات الكاش"""
+        return {
+            "size": len(self.keyboards),
+            "hits": self.hits.value,
+            "misses": self.misses.value
+        }
+
+
+# نسخة عامة
+keyboard_cache = KeyboardCache()
+
+
+def cached_keyboard(builder: Callable[..., InlineKeyboardMarkup]) -> Callable[..., FrozenKeyboard]:
+    """تخزين نتيجة دالة بناء كيبورد حسب معاملاتها (يجب أن تحدد التخطيط بالكامل)"""
+    name = f"{builder.__module__}.{builder.__qualname__}"
+    
+    @functools.wraps(builder)
+    def wrapper(*args):
+        return keyboard_cache.get(name, args, builder)
+    
+    return wrapper
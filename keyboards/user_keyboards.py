@@ -5,32 +5,62 @@
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from services.user_service import UserService
 from services.system_service import SystemService
+from keyboards.keyboard_cache import cached_keyboard
 
 user_service = UserService()
 system_service = SystemService()
 
+# خدمات تنشأ مرة واحدة عند أول استخدام (استيراد متأخر لتجنب الاستيراد الدائري)
+_services = {}
+
+
+def _get_service(name: str):
+    """نسخة واحدة من IchancyService / PaymentService"""
+    service = _services.get(name)
+    if service is None:
+        if name == "ichancy":
+            from services.ichancy_service import IchancyService
+            service = IchancyService()
+        else:
+            from services.payment_service import PaymentService
+            service = PaymentService()
+        _services[name] = service
+    return service
+
 
 def get_main_menu(user_id: int) -> InlineKeyboardMarkup:
     """القائمة الرئيسية للمستخدم"""
+    ichancy_enabled = system_service.is_ichancy_enabled()
+    has_account = ichancy_enabled and bool(_get_service("ichancy").get_account_info(user_id))
+    
+    return _main_menu_layout(
+        ichancy_enabled,
+        has_account,
+        system_service.is_deposit_enabled(),
+        system_service.is_withdraw_enabled() and system_service.is_withdraw_button_visible(),
+        user_service.is_admin(user_id)
+    )
+
+
+@cached_keyboard
+def _main_menu_layout(ichancy_enabled: bool, has_account: bool, deposit_enabled: bool,
+                      withdraw_visible: bool, is_admin: bool) -> InlineKeyboardMarkup:
+    """تخطيط القائمة الرئيسية"""
     kb = InlineKeyboardMarkup(row_width=2)
     
     # زر Ichancy (أول زر)
-    if system_service.is_ichancy_enabled():
-        from services.ichancy_service import IchancyService
-        ichancy_service = IchancyService()
-        ichancy_account = ichancy_service.get_account_info(user_id)
-        
-        if ichancy_account:
+    if ichancy_enabled:
+        if has_account:
             kb.add(InlineKeyboardButton("⚡ Ichancy - معلومات الحساب", callback_data="ichancy_menu"))
         else:
             kb.add(InlineKeyboardButton("⚡ Ichancy - إنشاء حساب", callback_data="ichancy_menu"))
     
     # زر شحن رصيد
-    if system_service.is_deposit_enabled():
+    if deposit_enabled:
         kb.add(InlineKeyboardButton("💰 شحن رصيد", callback_data="deposit_menu"))
     
     # زر سحب رصيد
-    if system_service.is_withdraw_enabled() and system_service.is_withdraw_button_visible():
+    if withdraw_visible:
         kb.add(InlineKeyboardButton("📤 سحب رصيد", callback_data="withdraw_menu"))
     
     # نظام الاحالات
@@ -55,7 +85,7 @@ def get_main_menu(user_id: int) -> InlineKeyboardMarkup:
     kb.add(InlineKeyboardButton("📌 الشروط والأحكام", callback_data="terms"))
     
     # زر لوحة التحكم للأدمن
-    if user_service.is_admin(user_id):
+    if is_admin:
         kb.add(InlineKeyboardButton("🎛 لوحة التحكم", callback_data="admin_panel"))
     
     return kb
@@ -63,6 +93,13 @@ def get_main_menu(user_id: int) -> InlineKeyboardMarkup:
 
 def get_ichancy_menu(has_account: bool = False) -> InlineKeyboardMarkup:
     """قائمة Ichancy"""
+    can_create = not has_account and system_service.can_create_ichancy_account()
+    return _ichancy_menu_layout(bool(has_account), can_create)
+
+
+@cached_keyboard
+def _ichancy_menu_layout(has_account: bool, can_create: bool) -> InlineKeyboardMarkup:
+    """تخطيط قائمة Ichancy"""
     kb = InlineKeyboardMarkup(row_width=2)
     
     if has_account:
@@ -71,7 +108,7 @@ def get_ichancy_menu(has_account: bool = False) -> InlineKeyboardMarkup:
             InlineKeyboardButton("💸 سحب من Ichancy", callback_data="ichancy_withdraw")
         )
     else:
-        if system_service.can_create_ichancy_account():
+        if can_create:
             kb.add(InlineKeyboardButton("📝 إنشاء حساب Ichancy", callback_data="ichancy_create"))
     
     kb.add(InlineKeyboardButton("⬅ ↩️ رجوع", callback_data="back"))
@@ -79,25 +116,37 @@ def get_ichancy_menu(has_account: bool = False) -> InlineKeyboardMarkup:
     return kb
 
 
+_PAYMENT_METHODS = (
+    ('syriatel_cash', '📱 سيرياتيل كاش'),
+    ('sham_cash', '💰 شام كاش'),
+    ('sham_cash_usd', '💵 شام كاش دولار')
+)
+
+
 def get_deposit_menu() -> InlineKeyboardMarkup:
     """قائمة طرق الشحن"""
-    kb = InlineKeyboardMarkup(row_width=2)
-    
-    from services.payment_service import PaymentService
-    payment_service = PaymentService()
+    payment_service = _get_service("payment")
     
     # طرق الدفع المفعلة والمرئية
-    payment_methods = [
-        ('syriatel_cash', '📱 سيرياتيل كاش'),
-        ('sham_cash', '💰 شام كاش'),
-        ('sham_cash_usd', '💵 شام كاش دولار')
-    ]
-    
-    buttons = []
-    for method_id, method_name in payment_methods:
+    visible_methods = []
+    for method_id, _ in _PAYMENT_METHODS:
         settings = payment_service.get_payment_settings(method_id)
         if settings and settings['is_visible'] and settings['is_active']:
-            buttons.append(InlineKeyboardButton(method_name, callback_data=f"pay_{method_id}"))
+            visible_methods.append(method_id)
+    
+    return _deposit_menu_layout(tuple(visible_methods))
+
+
+@cached_keyboard
+def _deposit_menu_layout(visible_methods: tuple) -> InlineKeyboardMarkup:
+    """تخطيط قائمة طرق الشحن"""
+    kb = InlineKeyboardMarkup(row_width=2)
+    
+    buttons = [
+        InlineKeyboardButton(method_name, callback_data=f"pay_{method_id}")
+        for method_id, method_name in _PAYMENT_METHODS
+        if method_id in visible_methods
+    ]
     
     # ترتيب الأزرار
     if len(buttons) >= 2:
@@ -112,6 +161,7 @@ def get_deposit_menu() -> InlineKeyboardMarkup:
     return kb
 
 
+@cached_keyboard
 def get_referral_menu() -> InlineKeyboardMarkup:
     """قائمة الإحالات"""
     kb = InlineKeyboardMarkup()
@@ -119,6 +169,7 @@ def get_referral_menu() -> InlineKeyboardMarkup:
     return kb
 
 
+@cached_keyboard
 def get_gift_menu() -> InlineKeyboardMarkup:
     """قائمة الهدايا"""
     kb = InlineKeyboardMarkup(row_width=2)
@@ -134,6 +185,7 @@ def get_gift_menu() -> InlineKeyboardMarkup:
     return kb
 
 
+@cached_keyboard
 def get_logs_menu() -> InlineKeyboardMarkup:
     """قائمة السجلات"""
     kb = InlineKeyboardMarkup(row_width=2)
@@ -148,6 +200,7 @@ def get_logs_menu() -> InlineKeyboardMarkup:
     return kb
 
 
+@cached_keyboard
 def get_contact_menu() -> InlineKeyboardMarkup:
     """قائمة التواصل"""
     kb = InlineKeyboardMarkup()
@@ -160,6 +213,7 @@ def get_contact_menu() -> InlineKeyboardMarkup:
     return kb
 
 
+@cached_keyboard
 def get_terms_menu() -> InlineKeyboardMarkup:
     """قائمة الشروط"""
     kb = InlineKeyboardMarkup()
@@ -3,7 +3,7 @@
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List, Tuple, Iterator
 from dataclasses import dataclass, asdict
 import json
 
@@ -28,10 +28,7 @@ class IchancyAccount:
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = datetime.now().isoformat()
-        
-        # تشفير كلمة المرور عند الإنشاء
-        if self.ichancy_password and not self.ichancy_password.startswith('$2b$'):
-            self.ichancy_password = password_manager.hash_password(self.ichancy_password)
+        # التشفير يتم فقط في IchancyModel.create
     
     def to_dict(self) -> Dict[str, Any]:
         """تحويل إلى قاموس"""
@@ -52,25 +49,47 @@ class IchancyAccount:
         self.last_login = datetime.now().isoformat()
         self.save()
     
-    def verify_password(self, password: str) -> bool:
-        """التحقق من كلمة المرور"""
-        return password_manager.verify_password(self.ichancy_password, password)
+    def verify_password(self, password: str, callback: Callable[[bool], None]) -> bool:
+        """التحقق من كلمة المرور ثم callback(النتيجة) - False إذا كان بوول التشفير ممتلئاً"""
+        def _done(future):
+            try:
+                valid = future.result()
+            except Exception as e:
+                logger.error(f"خطأ في التحقق من كلمة مرور Ichancy: {e}")
+                valid = False
+            callback(valid)
+        
+        # bcrypt بطيء عمداً، يتم في بوول التشفير والنتيجة تصل للـ callback
+        return password_manager.verify_password_async(self.ichancy_password, password, _done)
     
     def save(self):
         """حفظ في قاعدة البيانات"""
         IchancyModel.update(self)
 
 
+@dataclass(frozen=True)
+class IchancyAccountView:
+    """عرض خفيف للقراءة فقط (للقوائم والكاش) بدون كلمة المرور"""
+    user_id: int
+    ichancy_username: str
+    ichancy_balance: int = 0
+    created_at: str = None
+    last_login: str = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """تحويل إلى قاموس"""
+        data = asdict(self)
+        data['ichancy_password'] = '********'
+        return data
+
+
 class IchancyModel:
     """نموذج إدارة حسابات Ichancy"""
     
     @staticmethod
-    def create(user_id: int, username: str, password: str) -> Optional[IchancyAccount]:
-        """إنشاء حساب Ichancy جديد"""
+    def create(user_id: int, username: str, hashed_password: str) -> Optional[IchancyAccount]:
+        """إنشاء حساب Ichancy جديد (كلمة المرور مشفرة مسبقاً في بوول التشفير)"""
         try:
-            # تشفير كلمة المرور
-            hashed_password = password_manager.hash_password(password)
-            
             query = """
                 INSERT INTO ichancy_accounts 
                 (user_id, ichancy_username, ichancy_password, created_at)
@@ -231,27 +250,65 @@ class IchancyModel:
         return account is not None
     
     @staticmethod
-    def get_all(limit: int = 100) -> list:
+    def _row_to_view(row) -> IchancyAccountView:
+        """تحويل صف إلى عرض خفيف"""
+        return IchancyAccountView(
+            user_id=row['user_id'],
+            ichancy_username=row['ichancy_username'],
+            ichancy_balance=row['ichancy_balance'],
+            created_at=row['created_at'],
+            last_login=row['last_login']
+        )
+    
+    @staticmethod
+    def get_all(limit: int = 100) -> List[IchancyAccountView]:
         """جلب جميع الحسابات"""
-        query = """
-            SELECT user_id, ichancy_username, ichancy_balance, 
-                   created_at, last_login
-            FROM ichancy_accounts 
-            ORDER BY created_at DESC
-            LIMIT ?
-        """
+        accounts, _ = IchancyModel.get_page(limit)
+        return accounts
+    
+    @staticmethod
+    def get_page(limit: int = 100, after: Tuple[str, int] = None
+                 ) -> Tuple[List[IchancyAccountView], Optional[Tuple[str, int]]]:
+        """جلب صفحة حسابات (keyset) - يرجع الحسابات ومؤشر الصفحة التالية"""
+        if after:
+            query = """
+                SELECT user_id, ichancy_username, ichancy_balance, 
+                       created_at, last_login
+                FROM ichancy_accounts 
+                WHERE (created_at, user_id) < (?, ?)
+                ORDER BY created_at DESC, user_id DESC
+                LIMIT ?
+            """
+            params = (after[0], after[1], limit)
+        else:
+            query = """
+                SELECT user_id, ichancy_username, ichancy_balance, 
+                       created_at, last_login
+                FROM ichancy_accounts 
+                ORDER BY created_at DESC, user_id DESC
+                LIMIT ?
+            """
+            params = (limit,)
+        
+        results = db.fetch_all(query, params)
+        accounts = [IchancyModel._row_to_view(row) for row in results]
         
-        results = db.fetch_all(query, (limit,))
-        return [
-            IchancyAccount(
-                user_id=row['user_id'],
-                ichancy_username=row['ichancy_username'],
-                ichancy_password='********',  # مخفي
-                ichancy_balance=row['ichancy_balance'],
-                created_at=row['created_at'],
-                last_login=row['last_login']
-            ) for row in results
-        ]
+        next_cursor = None
+        if len(accounts) == limit:
+            last = accounts[-1]
+            next_cursor = (last.created_at, last.user_id)
+        
+        return accounts, next_cursor
+    
+    @staticmethod
+    def iter_all(batch_size: int = 500) -> Iterator[IchancyAccountView]:
+        """المرور على جميع الحسابات دفعة دفعة بدون تحميلها كلها في الذاكرة"""
+        cursor = None
+        while True:
+            accounts, cursor = IchancyModel.get_page(batch_size, cursor)
+            yield from accounts
+            if cursor is None:
+                break
     
     @staticmethod
     def count_all() -> int:
@@ -51,7 +51,7 @@ class AdminModel:
         # التحقق من الإدمن الرئيسي
         from core.config import ADMIN_ID
         if user_id == ADMIN_ID:
-            cache.set_admin_status(user_id, True)
+            cache.set_admin_status(user_id, True, publish=False)
             return True
         
         # التحقق من قاعدة البيانات
@@ -59,7 +59,7 @@ class AdminModel:
         result = db.fetch_one(query, (user_id,))
         
         is_admin = result is not None
-        cache.set_admin_status(user_id, is_admin)
+        cache.set_admin_status(user_id, is_admin, publish=False)
         
         return is_admin
     
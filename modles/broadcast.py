@@ -0,0 +1,136 @@
+"""
+نموذج الرسائل الجماعية (الإذاعة) مع نقاط الاستئناف
+"""
+
+from typing import Optional, Dict, Any, List
+from dataclasses import dataclass, asdict
+
+from core.database import db
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Broadcast:
+    """نموذج بيانات الإذاعة"""
+    id: int
+    text: str
+    created_by: int
+    status: str = 'running'  # 'running', 'completed', 'cancelled'
+    total: int = 0
+    last_user_id: int = 0
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    progress_chat_id: int = None
+    progress_message_id: int = None
+    created_at: str = None
+    
+    @property
+    def processed(self) -> int:
+        """عدد المستخدمين الذين تمت معالجتهم"""
+        return self.sent + self.failed + self.blocked
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """تحويل إلى قاموس"""
+        return asdict(self)
+
+
+class BroadcastModel:
+    """نموذج إدارة الإذاعة"""
+    
+    _COLUMNS = """
+        id, text, created_by, status, total, last_user_id, sent, failed,
+        blocked, progress_chat_id, progress_message_id, created_at
+    """
+    
+    @staticmethod
+    def _from_row(row) -> Broadcast:
+        """تحويل صف إلى Broadcast"""
+        return Broadcast(**{key: row[key] for key in row.keys()})
+    
+    @staticmethod
+    def create(text: str, created_by: int, total: int,
+               progress_chat_id: int = None, progress_message_id: int = None) -> Optional[Broadcast]:
+        """إنشاء إذاعة جديدة"""
+        try:
+            query = """
+                INSERT INTO broadcasts (text, created_by, total, progress_chat_id, progress_message_id)
+                VALUES (?, ?, ?, ?, ?)
+            """
+            broadcast_id = db.insert_and_get_id(
+                query, (text, created_by, total, progress_chat_id, progress_message_id)
+            )
+            logger.info(f"تم إنشاء إذاعة #{broadcast_id} لـ {total} مستخدم بواسطة {created_by}")
+            return BroadcastModel.get(broadcast_id)
+        except Exception as e:
+            logger.error(f"خطأ في إنشاء الإذاعة: {e}")
+            return None
+    
+    @staticmethod
+    def get(broadcast_id: int) -> Optional[Broadcast]:
+        """جلب إذاعة"""
+        query = f"SELECT {BroadcastModel._COLUMNS} FROM broadcasts WHERE id = ?"
+        result = db.fetch_one(query, (broadcast_id,))
+        return BroadcastModel._from_row(result) if result else None
+    
+    @staticmethod
+    def get_running() -> List[Broadcast]:
+        """الإذاعات غير المكتملة (للاستئناف بعد إعادة التشغيل)"""
+        query = f"SELECT {BroadcastModel._COLUMNS} FROM broadcasts WHERE status = 'running' ORDER BY id"
+        return [BroadcastModel._from_row(row) for row in db.fetch_all(query)]
+    
+    @staticmethod
+    def save_progress(broadcast: Broadcast) -> bool:
+        """حفظ نقطة الاستئناف بعد كل دفعة"""
+        try:
+            query = """
+                UPDATE broadcasts
+                SET last_user_id = ?, sent = ?, failed = ?, blocked = ?,
+                    updated_at = datetime('now')
+                WHERE id = ?
+            """
+            db.execute_query(query, (
+                broadcast.last_user_id, broadcast.sent, broadcast.failed,
+                broadcast.blocked, broadcast.id
+            ))
+            return True
+        except Exception as e:
+            logger.error(f"خطأ في حفظ تقدم الإذاعة #{broadcast.id}: {e}")
+            return False
+    
+    @staticmethod
+    def finish(broadcast_id: int, status: str) -> bool:
+        """إنهاء إذاعة جارية ('completed' أو 'cancelled') - False إذا لم تكن جارية"""
+        try:
+            query = """
+                UPDATE broadcasts
+                SET status = ?, updated_at = datetime('now'), finished_at = datetime('now')
+                WHERE id = ? AND status = 'running'
+            """
+            return db.execute_query(query, (status, broadcast_id)).rowcount > 0
+        except Exception as e:
+            logger.error(f"خطأ في تغيير حالة الإذاعة #{broadcast_id}: {e}")
+            return False
+    
+    @staticmethod
+    def record_blocked(user_ids: List[int], broadcast_id: int) -> None:
+        """تسجيل المستخدمين الذين حظروا البوت (للتنظيف لاحقاً)"""
+        if not user_ids:
+            return
+        try:
+            query = """
+                INSERT OR REPLACE INTO blocked_users (user_id, broadcast_id, blocked_at)
+                VALUES (?, ?, datetime('now'))
+            """
+            db.execute_many(query, [(user_id, broadcast_id) for user_id in user_ids])
+        except Exception as e:
+            logger.error(f"خطأ في تسجيل المستخدمين المحظورين للبوت: {e}")
+    
+    @staticmethod
+    def count_blocked() -> int:
+        """عدد المستخدمين الذين حظروا البوت"""
+        query = "SELECT COUNT(*) as count FROM blocked_users"
+        result = db.fetch_one(query)
+        return result['count'] if result else 0
@@ -0,0 +1,125 @@
+"""
+نموذج الإحصائيات اليومية المجمّعة
+"""
+
+from typing import Dict, Any, Iterable, Optional
+
+from core.database import db
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+TRANSACTION_TYPES = ('charge', 'withdraw')
+STATUSES = ('pending', 'approved', 'rejected', 'completed')
+
+
+class DailyStatsModel:
+    """قراءة وكتابة daily_stats و daily_transaction_stats
+
+    عدادات المعاملات والمستخدمين الجدد والنشطين تكتبها الـ triggers مع البيانات نفسها،
+    وهنا فقط القراءة، إضافة ما لا يُخزن في الجداول (الأخطاء)، وإعادة البناء.
+    """
+    
+    @staticmethod
+    def get(date_str: str) -> Dict[str, Any]:
+        """تقرير يوم: صف واحد من daily_stats وتفصيل المعاملات بالمفتاح (date, type, status)"""
+        row = db.fetch_one(
+            "SELECT new_users, active_users, system_errors FROM daily_stats WHERE date = ?",
+            (date_str,)
+        )
+        rows = db.fetch_all(
+            "SELECT type, status, count, amount FROM daily_transaction_stats WHERE date = ?",
+            (date_str,)
+        )
+        
+        breakdown = {
+            tx_type: {status: {"count": 0, "amount": 0} for status in STATUSES}
+            for tx_type in TRANSACTION_TYPES
+        }
+        for r in rows:
+            breakdown[r['type']][r['status']] = {"count": r['count'], "amount": r['amount']}
+        
+        return {
+            'date': date_str,
+            'new_users': row['new_users'] if row else 0,
+            'active_users': row['active_users'] if row else 0,
+            'system_errors': row['system_errors'] if row else 0,
+            'total_deposit': breakdown['charge']['approved']['amount'],
+            'deposit_count': breakdown['charge']['approved']['count'],
+            'total_withdraw': breakdown['withdraw']['approved']['amount'],
+            'withdraw_count': breakdown['withdraw']['approved']['count'],
+            'pending_count': breakdown['charge']['pending']['count'] + breakdown['withdraw']['pending']['count'],
+            'rejected_count': breakdown['charge']['rejected']['count'] + breakdown['withdraw']['rejected']['count'],
+            'transactions': breakdown
+        }
+    
+    @staticmethod
+    def add_errors(date_str: str, count: int) -> bool:
+        """إضافة أخطاء النظام المسجلة منذ آخر دفعة"""
+        try:
+            db.execute_query(
+                """
+                    INSERT INTO daily_stats (date, system_errors) VALUES (?, ?)
+                    ON CONFLICT(date) DO UPDATE SET system_errors = system_errors + excluded.system_errors
+                """,
+                (date_str, count)
+            )
+            return True
+        except Exception as e:
+            logger.error(f"خطأ في تسجيل أخطاء النظام ليوم {date_str}: {e}")
+            return False
+    
+    @staticmethod
+    def touch_users(user_ids: Iterable[int], last_active: str) -> bool:
+        """تحديث آخر نشاط دفعة واحدة (trigger النشاط يعد أول نشاط في اليوم فقط)"""
+        try:
+            db.execute_many(
+                "UPDATE users SET last_active = ? WHERE user_id = ?",
+                [(last_active, user_id) for user_id in user_ids]
+            )
+            return True
+        except Exception as e:
+            logger.error(f"خطأ في تحديث نشاط المستخدمين: {e}")
+            return False
+    
+    @staticmethod
+    def is_empty() -> bool:
+        """لم تُبنَ الإحصائيات بعد"""
+        return db.fetch_one("SELECT 1 FROM daily_transaction_stats LIMIT 1") is None
+    
+    @staticmethod
+    def rebuild(since: Optional[str] = None) -> Dict[str, int]:
+        """إعادة بناء العدادات من الجداول في تمرير مجمّع واحد (None = كل التاريخ)
+
+        النشطون والأخطاء لا يمكن استنتاجهم من الجداول فتبقى قيمهم كما هي. الأيام الأقدم من
+        حذف المعاملات القديمة يجب ألا تدخل في since وإلا ستُبنى من بيانات ناقصة.
+        """
+        since = since or ''
+        with db.transaction() as conn:
+            conn.execute("DELETE FROM daily_transaction_stats WHERE date >= ?", (since,))
+            transaction_rows = conn.execute(
+                """
+                    INSERT INTO daily_transaction_stats (date, type, status, count, amount)
+                    SELECT date(created_at), type, status, COUNT(*), SUM(amount)
+                    FROM transactions
+                    WHERE type IN ('charge', 'withdraw') AND created_at >= ?
+                    GROUP BY date(created_at), type, status
+                """,
+                (since,)
+            ).rowcount
+            
+            conn.execute("UPDATE daily_stats SET new_users = 0 WHERE date >= ?", (since,))
+            user_days = conn.execute(
+                """
+                    INSERT INTO daily_stats (date, new_users)
+                    SELECT date(created_at), COUNT(*)
+                    FROM users
+                    WHERE created_at >= ?
+                    GROUP BY date(created_at)
+                    ON CONFLICT(date) DO UPDATE SET new_users = excluded.new_users
+                """,
+                (since,)
+            ).rowcount
+        
+        logger.info(f"📊 تمت إعادة بناء الإحصائيات اليومية منذ {since or 'البداية'}")
+        return {"transaction_rows": transaction_rows, "user_days": user_days}
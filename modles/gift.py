@@ -9,6 +9,7 @@ import json
 
 from core.database import db
 from core.security import token_generator
+from core.identifiers import gift_code_pool
 from core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -80,9 +81,6 @@ class GiftModel:
                     created_by: int = None) -> Optional[GiftCode]:
         """إنشاء كود هدية جديد"""
         try:
-            # توليد كود فريد
-            code = token_generator.generate_gift_code()
-            
             # حساب تاريخ الانتهاء
             expires_at = None
             if expires_days > 0:
@@ -94,10 +92,11 @@ class GiftModel:
                 VALUES (?, ?, ?, ?, ?, ?)
             """
             
-            db.execute_query(query, (
-                code, amount, max_uses, created_by, expires_at,
+            # كود فريد من المخزن، وكود جديد إذا تعارض مع كود موجود
+            code = gift_code_pool.insert(lambda candidate: db.execute_query(query, (
+                candidate, amount, max_uses, created_by, expires_at,
                 datetime.now().isoformat()
-            ))
+            )))
             
             gift_code = GiftCode(
                 code=code,
@@ -0,0 +1,218 @@
+"""
+نموذج دفتر القيود - كل حركة رصيد قيد غير قابل للتعديل، والرصيد في users مجمّع له
+"""
+
+import json
+from typing import Optional, Dict, Any, List, Tuple
+from dataclasses import dataclass, asdict
+
+from core.database import db
+from core.cache import cache
+from core.metrics import metrics
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# أنواع القيود التي تغير عدادات المستخدم (العمود، الإشارة)
+KIND_COUNTERS = {
+    'deposit': ('total_deposit', 1),
+    'withdraw': ('total_withdraw', 1),
+    'withdraw_refund': ('total_withdraw', -1),
+}
+
+_insufficient = metrics.counter("ledger.insufficient_balance")
+
+
+@dataclass
+class LedgerEntry:
+    """قيد في دفتر القيود"""
+    id: int
+    user_id: int
+    amount: int
+    balance_after: int
+    kind: str
+    reference: str = None
+    created_at: str = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """تحويل إلى قاموس"""
+        return asdict(self)
+
+
+class LedgerModel:
+    """حركات الرصيد الذرية (تعديل الرصيد + القيد في نفس المعاملة)"""
+    
+    @staticmethod
+    def _apply(conn, user_id: int, amount: int, kind: str, reference: str = None) -> Optional[int]:
+        """تعديل الرصيد وإضافة القيد داخل معاملة قائمة (amount سالب للخصم)
+
+        الخصم مشروط في نفس الـ UPDATE، فلا يمر طلبان متزامنان على نفس الرصيد
+        """
+        column, sign = KIND_COUNTERS.get(kind, (None, 0))
+        counter_sql = f", {column} = {column} + ?" if column else ""
+        counter_params = (sign * abs(amount),) if column else ()
+        
+        row = conn.execute(
+            f"""
+                UPDATE users
+                SET balance = balance + ?{counter_sql}
+                WHERE user_id = ? AND balance + ? >= 0
+                RETURNING balance
+            """,
+            (amount, *counter_params, user_id, amount)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        conn.execute(
+            """
+                INSERT INTO ledger_entries (user_id, amount, balance_after, kind, reference)
+                VALUES (?, ?, ?, ?, ?)
+            """,
+            (user_id, amount, row[0], kind, reference)
+        )
+        return row[0]
+    
+    @staticmethod
+    def _credit_many(conn, entries: List[Tuple[int, int, str, str]]) -> Dict[int, int]:
+        """إضافات كثيرة داخل معاملة قائمة: UPDATE واحد لكل نوع قيد بدل UPDATE لكل مستخدم
+
+        entries: (user_id, amount > 0, kind, reference) - يرجع الرصيد النهائي لكل مستخدم
+        """
+        by_kind: Dict[str, Dict[int, int]] = {}
+        for user_id, amount, kind, _ in entries:
+            totals = by_kind.setdefault(kind, {})
+            totals[user_id] = totals.get(user_id, 0) + amount
+        
+        balances = {}
+        for kind, totals in by_kind.items():
+            column, sign = KIND_COUNTERS.get(kind, (None, 0))
+            counter_sql = f", {column} = {column} + {sign} * c.total" if column else ""
+            rows = conn.execute(
+                f"""
+                    UPDATE users
+                    SET balance = balance + c.total{counter_sql}
+                    FROM (
+                        SELECT json_extract(value, '$[0]') AS user_id, json_extract(value, '$[1]') AS total
+                        FROM json_each(?)
+                    ) AS c
+                    WHERE users.user_id = c.user_id
+                    RETURNING users.user_id, users.balance
+                """,
+                (json.dumps(list(totals.items())),)
+            ).fetchall()
+            balances.update({row[0]: row[1] for row in rows})
+        
+        # الرصيد بعد كل قيد: من الرصيد النهائي رجوعاً بترتيب القيود
+        running = dict(balances)
+        ledger_rows = []
+        for user_id, amount, kind, reference in reversed(entries):
+            if user_id not in running:
+                continue
+            ledger_rows.append((user_id, amount, running[user_id], kind, reference))
+            running[user_id] -= amount
+        ledger_rows.reverse()
+        
+        conn.executemany(
+            """
+                INSERT INTO ledger_entries (user_id, amount, balance_after, kind, reference)
+                VALUES (?, ?, ?, ?, ?)
+            """,
+            ledger_rows
+        )
+        return balances
+    
+    @staticmethod
+    def post(user_id: int, amount: int, kind: str, reference: str = None) -> Optional[int]:
+        """قيد واحد (موجب للإضافة، سالب للخصم) - يرجع الرصيد الجديد أو None"""
+        try:
+            with db.transaction() as conn:
+                new_balance = LedgerModel._apply(conn, user_id, amount, kind, reference)
+            
+            cache.delete_user(user_id)
+            if new_balance is None and amount < 0:
+                _insufficient.inc()
+            return new_balance
+        except Exception as e:
+            logger.error(f"خطأ في قيد {kind} للمستخدم {user_id}: {e}")
+            return None
+    
+    @staticmethod
+    def transfer(from_user_id: int, to_user_id: int, amount: int, net_amount: int,
+                 kind_out: str, kind_in: str, reference: str = None) -> Optional[Tuple[int, int]]:
+        """خصم من مستخدم وإضافة لآخر في معاملة واحدة - يرجع (رصيد المرسل، رصيد المستلم)"""
+        try:
+            with db.transaction() as conn:
+                sender_balance = LedgerModel._apply(conn, from_user_id, -amount, kind_out, reference)
+                if sender_balance is None:
+                    _insufficient.inc()
+                    return None
+                
+                receiver_balance = LedgerModel._apply(conn, to_user_id, net_amount, kind_in, reference)
+                if receiver_balance is None:
+                    # المستلم غير موجود: إلغاء الخصم أيضاً
+                    conn.rollback()
+                    return None
+            
+            cache.delete_user(from_user_id)
+            cache.delete_user(to_user_id)
+            return sender_balance, receiver_balance
+        except Exception as e:
+            logger.error(f"خطأ في التحويل من {from_user_id} إلى {to_user_id}: {e}")
+            return None
+    
+    @staticmethod
+    def reset_all(kind: str = 'reset') -> int:
+        """تصفير أرصدة غير المحظورين مع قيد عكسي لكل رصيد"""
+        try:
+            with db.transaction() as conn:
+                conn.execute(
+                    """
+                        INSERT INTO ledger_entries (user_id, amount, balance_after, kind)
+                        SELECT user_id, -balance, 0, ?
+                        FROM users
+                        WHERE is_banned = 0 AND balance != 0
+                    """,
+                    (kind,)
+                )
+                affected = conn.execute(
+                    "UPDATE users SET balance = 0 WHERE is_banned = 0 AND balance != 0"
+                ).rowcount
+            
+            cache.invalidate_pattern("user_")
+            return affected
+        except Exception as e:
+            logger.error(f"خطأ في تصفير الأرصدة: {e}")
+            return 0
+    
+    @staticmethod
+    def get_entries(user_id: int, limit: int = 20, before_id: int = None) -> List[LedgerEntry]:
+        """قيود مستخدم من الأحدث (before_id للصفحة التالية)"""
+        query = """
+            SELECT id, user_id, amount, balance_after, kind, reference, created_at
+            FROM ledger_entries
+            WHERE user_id = ? AND id < ?
+            ORDER BY id DESC
+            LIMIT ?
+        """
+        rows = db.fetch_all(query, (user_id, before_id or 2 ** 63 - 1, limit))
+        return [LedgerEntry(**{key: row[key] for key in row.keys()}) for row in rows]
+    
+    @staticmethod
+    def check_user(user_id: int) -> Optional[Dict[str, int]]:
+        """مقارنة الرصيد المجمّع بمجموع القيود لمستخدم واحد"""
+        query = """
+            SELECT u.balance,
+                   COALESCE((SELECT SUM(amount) FROM ledger_entries WHERE user_id = u.user_id), 0) AS ledger_balance
+            FROM users u
+            WHERE u.user_id = ?
+        """
+        result = db.fetch_one(query, (user_id,))
+        if not result:
+            return None
+        
+        return {
+            "balance": result['balance'],
+            "ledger_balance": result['ledger_balance'],
+            "drift": result['balance'] - result['ledger_balance']
+        }
@@ -0,0 +1,91 @@
+"""
+نموذج إشعارات الدفع الواردة من مصدر خارجي (رسائل التحويل)
+"""
+
+from datetime import datetime
+from typing import Optional, Dict
+from dataclasses import dataclass
+
+from core.database import db
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class PaymentNotification:
+    """نموذج بيانات الإشعار"""
+    id: int = None
+    payment_method: str = None
+    reference: str = None
+    amount: int = 0
+    sender: str = None
+    receiver: str = None
+    source: str = None
+    status: str = 'unmatched'  # 'unmatched', 'matched', 'review'
+    transaction_id: int = None
+    notes: str = None
+    received_at: str = None
+    matched_at: str = None
+
+
+class PaymentNotificationModel:
+    """نموذج إدارة إشعارات الدفع"""
+    
+    @staticmethod
+    def create(notification: PaymentNotification) -> Optional[int]:
+        """تسجيل إشعار - None إذا كان مسجلاً مسبقاً (نفس طريقة الدفع ورقم العملية)"""
+        try:
+            cursor = db.execute_query(
+                """
+                    INSERT OR IGNORE INTO payment_notifications
+                    (payment_method, reference, amount, sender, receiver, source)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    notification.payment_method,
+                    notification.reference,
+                    notification.amount,
+                    notification.sender,
+                    notification.receiver,
+                    notification.source
+                )
+            )
+            return cursor.lastrowid if cursor.rowcount == 1 else None
+        except Exception as e:
+            logger.error(f"خطأ في تسجيل إشعار الدفع {notification.reference}: {e}")
+            return None
+    
+    @staticmethod
+    def get_by_reference(payment_method: str, reference: str) -> Optional[PaymentNotification]:
+        """جلب إشعار برقم العملية (من الفهرس الفريد)"""
+        row = db.fetch_one(
+            "SELECT * FROM payment_notifications WHERE payment_method = ? AND reference = ?",
+            (payment_method, reference)
+        )
+        return PaymentNotification(**{key: row[key] for key in row.keys()}) if row else None
+    
+    @staticmethod
+    def resolve(notification_id: int, status: str, transaction_id: int = None,
+                notes: str = None, from_status: str = 'unmatched') -> bool:
+        """تغيير حالة الإشعار بشرط حالته الحالية (إشعار واحد يُطابق مرة واحدة)"""
+        try:
+            cursor = db.execute_query(
+                """
+                    UPDATE payment_notifications
+                    SET status = ?, transaction_id = COALESCE(?, transaction_id),
+                        notes = COALESCE(?, notes), matched_at = ?
+                    WHERE id = ? AND status = ?
+                """,
+                (status, transaction_id, notes, datetime.now().isoformat(), notification_id, from_status)
+            )
+            return cursor.rowcount == 1
+        except Exception as e:
+            logger.error(f"خطأ في تحديث إشعار الدفع #{notification_id}: {e}")
+            return False
+    
+    @staticmethod
+    def count_by_status() -> Dict[str, int]:
+        """عدد الإشعارات حسب الحالة"""
+        rows = db.fetch_all("SELECT status, COUNT(*) as count FROM payment_notifications GROUP BY status")
+        return {row['status']: row['count'] for row in rows}
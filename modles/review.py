@@ -0,0 +1,97 @@
+"""
+نموذج حجوزات المراجعة - كل أدمن يحجز المعاملة التي يراجعها لمدة محددة
+"""
+
+import time
+from typing import Optional
+
+from core.database import db
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ReviewLeaseModel:
+    """حجز معاملة معلقة لأدمن واحد حتى انتهاء المدة"""
+    
+    @staticmethod
+    def claim(transaction_id: int, admin_id: int, lease_seconds: int) -> bool:
+        """حجز معاملة (أو تجديد حجز نفس الأدمن) - False إذا كانت محجوزة لغيره"""
+        try:
+            now = time.time()
+            query = """
+                INSERT INTO review_leases (transaction_id, admin_id, expires_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(transaction_id) DO UPDATE
+                SET admin_id = excluded.admin_id, expires_at = excluded.expires_at
+                WHERE review_leases.admin_id = excluded.admin_id OR review_leases.expires_at < ?
+            """
+            cursor = db.execute_query(query, (transaction_id, admin_id, now + lease_seconds, now))
+            return cursor.rowcount == 1
+        except Exception as e:
+            logger.error(f"خطأ في حجز المعاملة #{transaction_id}: {e}")
+            return False
+    
+    @staticmethod
+    def claim_next(admin_id: int, lease_seconds: int, transaction_type: str = None) -> Optional[int]:
+        """حجز أقدم معاملة معلقة غير محجوزة - يرجع رقمها"""
+        try:
+            now = time.time()
+            type_condition = "AND t.type = ?" if transaction_type else ""
+            params = (now, admin_id, transaction_type) if transaction_type else (now, admin_id)
+            
+            with db.transaction() as conn:
+                # المنتهية ومحجوزات نفس الأدمن متاحة له (مثل إعادة فتح القائمة)
+                row = conn.execute(
+                    f"""
+                        SELECT t.id
+                        FROM transactions t
+                        LEFT JOIN review_leases l ON l.transaction_id = t.id
+                        WHERE t.status = 'pending'
+                          AND (l.transaction_id IS NULL OR l.expires_at < ? OR l.admin_id = ?)
+                          {type_condition}
+                        ORDER BY t.created_at ASC, t.id ASC
+                        LIMIT 1
+                    """,
+                    params
+                ).fetchone()
+                if row is None:
+                    return None
+                
+                conn.execute(
+                    "INSERT OR REPLACE INTO review_leases (transaction_id, admin_id, expires_at) VALUES (?, ?, ?)",
+                    (row[0], admin_id, now + lease_seconds)
+                )
+                return row[0]
+        except Exception as e:
+            logger.error(f"خطأ في حجز المعاملة التالية للأدمن {admin_id}: {e}")
+            return None
+    
+    @staticmethod
+    def get_holder(transaction_id: int) -> Optional[int]:
+        """الأدمن الحاجز حالياً (None إذا لا يوجد حجز ساري)"""
+        query = "SELECT admin_id FROM review_leases WHERE transaction_id = ? AND expires_at >= ?"
+        result = db.fetch_one(query, (transaction_id, time.time()))
+        return result['admin_id'] if result else None
+    
+    @staticmethod
+    def _release(conn, transaction_id: int) -> None:
+        """إلغاء الحجز داخل معاملة القبول/الرفض"""
+        conn.execute("DELETE FROM review_leases WHERE transaction_id = ?", (transaction_id,))
+    
+    @staticmethod
+    def count_active() -> int:
+        """عدد الحجوزات السارية"""
+        query = "SELECT COUNT(*) as count FROM review_leases WHERE expires_at >= ?"
+        result = db.fetch_one(query, (time.time(),))
+        return result['count'] if result else 0
+    
+    @staticmethod
+    def cleanup_expired() -> int:
+        """حذف الحجوزات المنتهية"""
+        try:
+            cursor = db.execute_query("DELETE FROM review_leases WHERE expires_at < ?", (time.time(),))
+            return cursor.rowcount
+        except Exception as e:
+            logger.error(f"خطأ في تنظيف حجوزات المراجعة: {e}")
+            return 0
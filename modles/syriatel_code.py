@@ -0,0 +1,157 @@
+"""
+نموذج أكواد سيرياتيل كاش - كل كود يستقبل حتى سعة محددة
+"""
+
+from typing import Optional, List, Tuple
+from dataclasses import dataclass
+
+from core.database import db
+from core.config import SYSTEM_CONSTANTS
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class SyriatelCode:
+    """نموذج بيانات الكود"""
+    id: int = None
+    code_number: str = None
+    current_amount: int = 0
+    is_active: bool = True
+    added_by: int = None
+    added_at: str = None
+    last_used: str = None
+    usage_count: int = 0
+    
+    @property
+    def remaining(self) -> int:
+        """السعة المتبقية"""
+        return max(0, SYSTEM_CONSTANTS["CODE_CAPACITY"] - self.current_amount)
+
+
+class SyriatelCodeModel:
+    """نموذج إدارة أكواد سيرياتيل"""
+    
+    @staticmethod
+    def _from_row(row) -> SyriatelCode:
+        return SyriatelCode(
+            id=row['id'],
+            code_number=row['code_number'],
+            current_amount=row['current_amount'],
+            is_active=bool(row['is_active']),
+            added_by=row['added_by'],
+            added_at=row['added_at'],
+            last_used=row['last_used'],
+            usage_count=row['usage_count']
+        )
+    
+    @staticmethod
+    def get_all(active_only: bool = False) -> List[SyriatelCode]:
+        """جلب الأكواد"""
+        query = "SELECT * FROM syriatel_codes"
+        if active_only:
+            query += " WHERE is_active = 1"
+        query += " ORDER BY id"
+        return [SyriatelCodeModel._from_row(row) for row in db.fetch_all(query)]
+    
+    @staticmethod
+    def get(code_id: int) -> Optional[SyriatelCode]:
+        """جلب كود برقمه"""
+        row = db.fetch_one("SELECT * FROM syriatel_codes WHERE id = ?", (code_id,))
+        return SyriatelCodeModel._from_row(row) if row else None
+    
+    @staticmethod
+    def count() -> int:
+        """عدد الأكواد"""
+        result = db.fetch_one("SELECT COUNT(*) as count FROM syriatel_codes")
+        return result['count'] if result else 0
+    
+    @staticmethod
+    def add(code_number: str, added_by: int = None) -> Optional[int]:
+        """إضافة كود جديد"""
+        try:
+            return db.insert_and_get_id(
+                "INSERT INTO syriatel_codes (code_number, added_by) VALUES (?, ?)",
+                (code_number, added_by)
+            )
+        except Exception as e:
+            logger.error(f"خطأ في إضافة كود سيرياتيل {code_number}: {e}")
+            return None
+    
+    @staticmethod
+    def set_active(code_id: int, is_active: bool) -> bool:
+        """تفعيل/إيقاف كود"""
+        try:
+            cursor = db.execute_query(
+                "UPDATE syriatel_codes SET is_active = ? WHERE id = ?",
+                (1 if is_active else 0, code_id)
+            )
+            return cursor.rowcount == 1
+        except Exception as e:
+            logger.error(f"خطأ في تغيير حالة كود سيرياتيل {code_id}: {e}")
+            return False
+    
+    @staticmethod
+    def add_amount(code_id: int, amount: int) -> Optional[int]:
+        """إضافة مبلغ للكود إذا كانت السعة تكفي - يرجع المبلغ الجديد أو None"""
+        try:
+            with db.transaction() as conn:
+                row = conn.execute(
+                    """
+                        UPDATE syriatel_codes
+                        SET current_amount = current_amount + ?
+                        WHERE id = ? AND current_amount + ? <= ?
+                        RETURNING current_amount
+                    """,
+                    (amount, code_id, amount, SYSTEM_CONSTANTS["CODE_CAPACITY"])
+                ).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error(f"خطأ في إضافة {amount} لكود سيرياتيل {code_id}: {e}")
+            return None
+    
+    @staticmethod
+    def _release_many(conn, transaction_ids_json: str) -> int:
+        """إرجاع سعة شحنات سيرياتيل مرفوضة داخل معاملة قائمة - يرجع عدد الأكواد المعدلة"""
+        cursor = conn.execute(
+            """
+                UPDATE syriatel_codes
+                SET current_amount = MAX(0, current_amount - released.total)
+                FROM (
+                    SELECT account_number, SUM(amount) AS total
+                    FROM transactions
+                    WHERE id IN (SELECT value FROM json_each(?))
+                      AND type = 'charge' AND payment_method = 'syriatel_cash'
+                    GROUP BY account_number
+                ) AS released
+                WHERE syriatel_codes.code_number = released.account_number
+            """,
+            (transaction_ids_json,)
+        )
+        return cursor.rowcount
+    
+    @staticmethod
+    def reset_amount(code_id: int) -> bool:
+        """تصفير المبلغ المستلم على الكود"""
+        try:
+            cursor = db.execute_query("UPDATE syriatel_codes SET current_amount = 0 WHERE id = ?", (code_id,))
+            return cursor.rowcount == 1
+        except Exception as e:
+            logger.error(f"خطأ في تصفير كود سيرياتيل {code_id}: {e}")
+            return False
+    
+    @staticmethod
+    def record_usage(batch: List[Tuple[int, str, int]]) -> bool:
+        """تحديث عداد الاستخدام وآخر استخدام دفعة واحدة: (الزيادة، آخر استخدام، رقم الكود)"""
+        if not batch:
+            return True
+        try:
+            db.execute_many(
+                "UPDATE syriatel_codes SET usage_count = usage_count + ?, last_used = ? WHERE id = ?",
+                batch
+            )
+            return True
+        except Exception as e:
+            logger.error(f"خطأ في تحديث استخدام أكواد سيرياتيل: {e}")
+            return False
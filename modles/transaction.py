@@ -117,6 +117,19 @@ class TransactionModel:
             logger.error(f"خطأ في تحديث حالة المعاملة #{transaction_id}: {e}")
             return False
     
+    @staticmethod
+    def detach_code(transaction_id: int, notes: str) -> bool:
+        """فصل طلب الشحن عن كود سيرياتيل لم يُسجل عليه مبلغه (فلا يُرجع الرفض سعة لم تُضف)"""
+        try:
+            cursor = db.execute_query(
+                "UPDATE transactions SET account_number = NULL, notes = ? WHERE id = ?",
+                (notes, transaction_id)
+            )
+            return cursor.rowcount == 1
+        except Exception as e:
+            logger.error(f"خطأ في فصل الكود عن المعاملة #{transaction_id}: {e}")
+            return False
+    
     @staticmethod
     def get_user_transactions(user_id: int, limit: int = 50, offset: int = 0) -> List[Transaction]:
         """جلب معاملات مستخدم"""
@@ -183,42 +196,85 @@ class TransactionModel:
         ]
     
     @staticmethod
-    def get_daily_transactions(date_str: str) -> Dict[str, Any]:
-        """جلب معاملات يوم معين"""
-        # الشحنات
-        deposit_query = """
-            SELECT COALESCE(SUM(amount), 0) as total, COUNT(*) as count
-            FROM transactions 
-            WHERE type = 'charge' AND status = 'approved' 
-            AND date(created_at) = ?
+    def get_pending_page(transaction_type: str = None, after_id: int = None,
+                         limit: int = 5) -> List[Transaction]:
+        """صفحة من المعاملات المعلقة بترتيب (created_at, id)
+
+        after_id آخر معاملة في الصفحة السابقة (keyset بدل OFFSET، فالصفحة العاشرة بسرعة الأولى)
         """
-        deposit_result = db.fetch_one(deposit_query, (date_str,))
+        conditions = ["status = 'pending'"]
+        params = []
+        # بدون INDEXED BY يختار SQLite فهرس status ثم يرتب كل المعلقة
+        index = "idx_transactions_pending"
         
-        # السحوبات
-        withdraw_query = """
-            SELECT COALESCE(SUM(amount), 0) as total, COUNT(*) as count
-            FROM transactions 
-            WHERE type = 'withdraw' AND status = 'approved'
-            AND date(created_at) = ?
-        """
-        withdraw_result = db.fetch_one(withdraw_query, (date_str,))
+        if transaction_type:
+            conditions.append("type = ?")
+            params.append(transaction_type)
+            index = "idx_transactions_pending_type"
         
-        # المعلقة
-        pending_query = """
-            SELECT COUNT(*) as count
-            FROM transactions 
-            WHERE status = 'pending' AND date(created_at) = ?
+        if after_id:
+            conditions.append("(created_at, id) > (SELECT created_at, id FROM transactions WHERE id = ?)")
+            params.append(after_id)
+        
+        query = f"""
+            SELECT id, user_id, type, amount, payment_method, transaction_id,
+                   account_number, status, created_at, notes
+            FROM transactions INDEXED BY {index}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY created_at ASC, id ASC
+            LIMIT ?
         """
-        pending_result = db.fetch_one(pending_query, (date_str,))
+        params.append(limit)
         
-        return {
-            'date': date_str,
-            'total_deposit': deposit_result['total'] if deposit_result else 0,
-            'deposit_count': deposit_result['count'] if deposit_result else 0,
-            'total_withdraw': withdraw_result['total'] if withdraw_result else 0,
-            'withdraw_count': withdraw_result['count'] if withdraw_result else 0,
-            'pending_count': pending_result['count'] if pending_result else 0
-        }
+        results = db.fetch_all(query, tuple(params))
+        return [
+            Transaction(**{key: row[key] for key in row.keys()})
+            for row in results
+        ]
+    
+    @staticmethod
+    def count_pending(transaction_type: str = None) -> int:
+        """عدد المعاملات المعلقة (من الفهرس الجزئي)"""
+        if transaction_type:
+            query = "SELECT COUNT(*) as count FROM transactions WHERE status = 'pending' AND type = ?"
+            result = db.fetch_one(query, (transaction_type,))
+        else:
+            query = "SELECT COUNT(*) as count FROM transactions WHERE status = 'pending'"
+            result = db.fetch_one(query)
+        return result['count'] if result else 0
+    
+    @staticmethod
+    def reference_exists(payment_method: str, reference: str) -> bool:
+        """هل رقم العملية مستخدم في طلب شحن سابق (جدول الأرقام الدائم، يشمل المعاملات المحذوفة)"""
+        query = "SELECT 1 FROM payment_references WHERE payment_method = ? AND reference = ?"
+        return db.fetch_one(query, (payment_method, reference)) is not None
+    
+    @staticmethod
+    def get_charge_by_reference(payment_method: str, reference: str) -> Optional[Transaction]:
+        """طلب الشحن صاحب رقم العملية (واحد على الأكثر، جدول الأرقام الدائم يمنع التكرار)"""
+        query = """
+            SELECT id, user_id, type, amount, payment_method, transaction_id,
+                   account_number, status, created_at, notes
+            FROM transactions
+            WHERE type = 'charge' AND transaction_id IS NOT NULL
+              AND payment_method = ? AND transaction_id = ?
+        """
+        row = db.fetch_one(query, (payment_method, reference))
+        return Transaction(**{key: row[key] for key in row.keys()}) if row else None
+    
+    @staticmethod
+    def _transition_status(conn, transaction_id: int, from_status: str, to_status: str,
+                           notes: str = None) -> bool:
+        """تغيير الحالة داخل معاملة قائمة فقط إذا كانت ما زالت from_status (لا يمر طلبان على نفس المعاملة)"""
+        cursor = conn.execute(
+            """
+                UPDATE transactions 
+                SET status = ?, notes = COALESCE(?, notes)
+                WHERE id = ? AND status = ?
+            """,
+            (to_status, notes, transaction_id, from_status)
+        )
+        return cursor.rowcount == 1
     
     @staticmethod
     def get_user_summary(user_id: int) -> Dict[str, Any]:
@@ -11,6 +11,7 @@ from core.database import db
 from core.cache import cache
 from core.security import password_manager, encryption_manager
 from core.logger import get_logger
+from models.ledger import LedgerModel
 
 logger = get_logger(__name__)
 
@@ -47,11 +48,12 @@ class User:
     def update_activity(self):
         """تحديث وقت النشاط الأخير"""
         self.last_active = datetime.now().isoformat()
-        self.save_to_cache()
+        # النشاط يُكتب لقاعدة البيانات دورياً، ولا داعي لإبطال نسخ العمليات الأخرى عند كل رسالة
+        self.save_to_cache(publish=False)
     
-    def save_to_cache(self):
-        """حفظ في الكاش"""
-        cache.set_user(self.user_id, self.to_dict())
+    def save_to_cache(self, publish: bool = True):
+        """حفظ في الكاش (publish=False عند التعبئة من قاعدة البيانات)"""
+        cache.set_user(self.user_id, self.to_dict(), publish=publish)
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'User':
@@ -66,16 +68,19 @@ class UserModel:
     def create(user_id: int) -> bool:
         """إنشاء مستخدم جديد"""
         try:
-            from core.security import token_generator
-            
-            referral_code = token_generator.generate_referral_code(user_id)
+            from core.identifiers import referral_code_pool
             
             query = """
                 INSERT INTO users (user_id, referral_code, created_at, last_active)
-                VALUES (?, ?, datetime('now'), datetime('now'))
+                VALUES (?, ?, ?, ?)
             """
+            # نفس الساعة المحلية التي يكتب بها stats_rollup آخر نشاط
+            now = datetime.now().isoformat()
             
-            db.execute_query(query, (user_id, referral_code))
+            # إعادة المحاولة بكود جديد إذا تعارض الكود مع مستخدم موجود
+            referral_code = referral_code_pool.insert(
+                lambda code: db.execute_query(query, (user_id, code, now, now))
+            )
             logger.info(f"تم إنشاء مستخدم جديد: {user_id}")
             
             # إضافة للكاش
@@ -120,47 +125,30 @@ class UserModel:
             )
             
             # حفظ في الكاش
-            user.save_to_cache()
+            user.save_to_cache(publish=False)
             
             return user
         
         return None
     
     @staticmethod
-    def update_balance(user_id: int, amount: int, operation: str = 'add') -> bool:
-        """تحديث رصيد المستخدم"""
-        try:
-            if operation == 'add':
-                query = """
-                    UPDATE users 
-                    SET balance = balance + ?, 
-                        total_deposit = total_deposit + ?,
-                        last_active = datetime('now')
-                    WHERE user_id = ?
-                """
-                params = (amount, amount, user_id)
-            elif operation == 'subtract':
-                query = """
-                    UPDATE users 
-                    SET balance = MAX(0, balance - ?),
-                        total_withdraw = total_withdraw + ?,
-                        last_active = datetime('now')
-                    WHERE user_id = ?
-                """
-                params = (amount, amount, user_id)
-            else:
-                return False
-            
-            db.execute_query(query, params)
-            
-            # تحديث الكاش
-            cache.delete_user(user_id)
-            
+    def update_balance(user_id: int, amount: int, operation: str = 'add',
+                       kind: str = None, reference: str = None) -> Optional[int]:
+        """تحديث رصيد المستخدم عبر دفتر القيود - يرجع الرصيد الجديد أو None
+
+        الخصم لا ينفذ إذا كان الرصيد غير كافٍ (الشرط داخل نفس الـ UPDATE)
+        """
+        if operation == 'add':
+            signed_amount = amount
+        elif operation == 'subtract':
+            signed_amount = -amount
+        else:
+            return None
+        
+        new_balance = LedgerModel.post(user_id, signed_amount, kind or f"manual_{operation}", reference)
+        if new_balance is not None:
             logger.debug(f"تم تحديث رصيد المستخدم {user_id}: {operation} {amount}")
-            return True
-        except Exception as e:
-            logger.error(f"خطأ في تحديث رصيد المستخدم {user_id}: {e}")
-            return False
+        return new_balance
     
     @staticmethod
     def ban(user_id: int, reason: str = "", ban_until: str = None) -> bool:
@@ -292,6 +280,24 @@ class UserModel:
         result = db.fetch_one(query)
         return result['count'] if result else 0
     
+    @staticmethod
+    def get_active_ids_page(after_id: int = 0, limit: int = 500) -> list:
+        """صفحة معرفات المستخدمين غير المحظورين (keyset على user_id)"""
+        query = """
+            SELECT user_id FROM users
+            WHERE user_id > ? AND is_banned = 0
+            ORDER BY user_id
+            LIMIT ?
+        """
+        return [row['user_id'] for row in db.fetch_all(query, (after_id, limit))]
+    
+    @staticmethod
+    def count_active() -> int:
+        """عد المستخدمين غير المحظورين"""
+        query = "SELECT COUNT(*) as count FROM users WHERE is_banned = 0"
+        result = db.fetch_one(query)
+        return result['count'] if result else 0
+    
     @staticmethod
     def count_banned() -> int:
         """عد المستخدمين المحظورين"""
@@ -301,17 +307,7 @@ class UserModel:
     
     @staticmethod
     def reset_all_balances() -> int:
-        """تصفير جميع الأرصدة"""
-        try:
-            query = "UPDATE users SET balance = 0 WHERE is_banned = 0"
-            cursor = db.execute_query(query)
-            
-            # إبطال كاش جميع المستخدمين
-            cache.invalidate_pattern("user_")
-            
-            affected = cursor.rowcount
-            logger.warning(f"تم تصفير أرصدة {affected} مستخدم")
-            return affected
-        except Exception as e:
-            logger.error(f"خطأ في تصفير الأرصدة: {e}")
-            return 0
\ No newline at end of file
+        """تصفير جميع الأرصدة (مع قيد عكسي لكل رصيد في دفتر القيود)"""
+        affected = LedgerModel.reset_all()
+        logger.warning(f"تم تصفير أرصدة {affected} مستخدم")
+        return affected
\ No newline at end of file
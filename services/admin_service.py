@@ -3,7 +3,7 @@
 """
 
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import datetime, timedelta
 import time
 
 from telebot.types import Message, CallbackQuery
@@ -11,17 +11,28 @@ from core.database import db
 from core.cache import cache
 from core.security import input_validator
 from core.logger import get_logger, performance_logger
+from core.metrics import metrics
+from core.router import CallbackRouter
+from core.config import REVIEW_QUEUE, SYSTEM_CONSTANTS, DAILY_STATS
 from services.user_service import UserService
 from services.system_service import SystemService
 from services.payment_service import PaymentService
 from services.ichancy_service import IchancyService
 from services.referral_service import ReferralService
 from services.gift_service import GiftService
+from services.broadcast_service import broadcast_service
+from services.code_allocator import code_allocator
+from services.stats_rollup import stats_rollup
 from models.admin import AdminModel
+from models.user import UserModel
+from models.syriatel_code import SyriatelCodeModel
 from keyboards.admin_keyboards import *
 
 logger = get_logger(__name__)
 
+# مسارات كال باكات الأدمن (الدوال تستقبل self ثم call)
+admin_routes = CallbackRouter("admin")
+
 
 class AdminService:
     """خدمات الأدمن المتقدمة"""
@@ -38,33 +49,8 @@ class AdminService:
     def handle_admin_callback(self, call: CallbackQuery):
         """معالجة كال باكات الأدمن"""
         try:
-            user_id = call.from_user.id
-            data = call.data
-            
-            if data == "admin_general_settings":
-                self._show_general_settings(call)
-            elif data == "admin_payment_settings":
-                self._show_payment_settings(call)
-            elif data == "admin_withdraw_settings":
-                self._show_withdraw_settings(call)
-            elif data == "admin_users_management":
-                self._show_users_management(call)
-            elif data == "admin_reports":
-                self._show_reports(call)
-            elif data == "admin_referral_settings":
-                self._show_referral_settings(call)
-            elif data == "admin_ichancy_settings":
-                self._show_ichancy_settings(call)
-            elif data == "admin_transactions":
-                self._show_transactions(call)
-            elif data == "admin_manage_admins":
-                self._show_manage_admins(call)
-            elif data.startswith("admin_toggle_"):
-                self._toggle_setting(call)
-            elif data.startswith("admin_edit_"):
-                self._edit_setting(call)
-            elif data.startswith("admin_"):
-                self._handle_admin_action(call)
+            if not admin_routes.dispatch(call, self):
+                call.bot.answer_callback_query(call.id, "⚙️ هذه الميزة قيد التطوير")
             
         except Exception as e:
             logger.error(f"خطأ في handle_admin_callback: {e}")
@@ -88,6 +74,10 @@ class AdminService:
                 self._show_top_referrals(message, text)
             elif step == "admin_top_balance_count":
                 self._show_top_balance(message, text)
+            elif step == "admin_broadcast_message":
+                self._preview_broadcast(message, text)
+            elif step == "admin_add_syriatel_code":
+                self._add_syriatel_code(message, text)
             elif step.startswith("admin_"):
                 self._handle_admin_message_action(message, step, text, temp_data)
             
@@ -96,6 +86,7 @@ class AdminService:
     
     # ===== دوال العرض =====
     
+    @admin_routes.route("admin_general_settings")
     def _show_general_settings(self, call: CallbackQuery):
         """عرض الإعدادات العامة"""
         kb = get_general_settings_keyboard()
@@ -111,6 +102,7 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
+    @admin_routes.route("admin_payment_settings")
     def _show_payment_settings(self, call: CallbackQuery):
         """عرض إعدادات الدفع"""
         kb = get_payment_settings_keyboard()
@@ -126,6 +118,74 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
+    @admin_routes.route("admin_syriatel_settings")
+    def _show_syriatel_codes(self, call: CallbackQuery, notice: str = None):
+        """عرض أكواد سيرياتيل وسعتها المتبقية"""
+        codes = SyriatelCodeModel.get_all()
+        stats = code_allocator.get_stats()
+        capacity = SYSTEM_CONSTANTS["CODE_CAPACITY"]
+        
+        msg = "📱 **أكواد سيرياتيل كاش**\n\n"
+        if codes:
+            for code in codes:
+                status = "✅" if code.is_active else "⏸️"
+                msg += f"{status} `{code.code_number}`: {code.current_amount:,}/{capacity:,} ({code.usage_count} طلب)\n"
+            msg += f"\n💰 المتاح للحجز: {stats['available']:,} ليرة"
+            if stats['active_holds']:
+                msg += f"\n⏳ محجوز لطلبات قيد الإدخال: {stats['held_amount']:,} ({stats['active_holds']})"
+        else:
+            msg += "لا توجد أكواد، الشحن يتم بدون توزيع على الأكواد"
+        
+        kb = get_syriatel_codes_keyboard(codes, len(codes) < SYSTEM_CONSTANTS["MAX_CODES"])
+        
+        call.bot.edit_message_text(
+            msg,
+            call.message.chat.id,
+            call.message.message_id,
+            reply_markup=kb,
+            parse_mode="Markdown"
+        )
+        call.bot.answer_callback_query(call.id, notice)
+    
+    @admin_routes.route("admin_syriatel_toggle_{code_id:int}")
+    def _toggle_syriatel_code(self, call: CallbackQuery, code_id: int):
+        """تفعيل/إيقاف كود سيرياتيل"""
+        code = SyriatelCodeModel.get(code_id)
+        if not code:
+            call.bot.answer_callback_query(call.id, "❌ الكود غير موجود")
+            return
+        
+        SyriatelCodeModel.set_active(code_id, not code.is_active)
+        code_allocator.reload()
+        
+        self._show_syriatel_codes(call, "⏸️ تم إيقاف الكود" if code.is_active else "✅ تم تفعيل الكود")
+    
+    @admin_routes.route("admin_syriatel_reset_{code_id:int}")
+    def _reset_syriatel_code(self, call: CallbackQuery, code_id: int):
+        """تصفير المبلغ المستلم على كود (بعد سحب الرصيد من الشريحة)"""
+        if not SyriatelCodeModel.reset_amount(code_id):
+            call.bot.answer_callback_query(call.id, "❌ الكود غير موجود")
+            return
+        
+        code_allocator.reload()
+        logger.info(f"🔄 تصفير كود سيرياتيل {code_id} بواسطة {call.from_user.id}")
+        
+        self._show_syriatel_codes(call, "🔄 تم تصفير الكود")
+    
+    @admin_routes.route("admin_syriatel_add")
+    def _prompt_syriatel_code(self, call: CallbackQuery):
+        """طلب رقم الكود الجديد"""
+        if SyriatelCodeModel.count() >= SYSTEM_CONSTANTS["MAX_CODES"]:
+            call.bot.answer_callback_query(call.id, f"❌ الحد الأقصى {SYSTEM_CONSTANTS['MAX_CODES']} كود")
+            return
+        
+        from handlers.sessions import set_session
+        set_session(call.from_user.id, "admin_add_syriatel_code")
+        
+        call.bot.send_message(call.from_user.id, "📱 **إضافة كود سيرياتيل**\n\nأدخل رقم الكود:", parse_mode="Markdown")
+        call.bot.answer_callback_query(call.id)
+    
+    @admin_routes.route("admin_withdraw_settings")
     def _show_withdraw_settings(self, call: CallbackQuery):
         """عرض إعدادات السحب"""
         kb = get_withdraw_settings_keyboard()
@@ -141,6 +201,7 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
+    @admin_routes.route("admin_users_management")
     def _show_users_management(self, call: CallbackQuery):
         """عرض إدارة المستخدمين"""
         kb = get_users_management_keyboard()
@@ -156,6 +217,7 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
+    @admin_routes.route("admin_reports")
     def _show_reports(self, call: CallbackQuery):
         """عرض التقارير"""
         kb = get_reports_keyboard()
@@ -171,6 +233,7 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
+    @admin_routes.route("admin_referral_settings")
     def _show_referral_settings(self, call: CallbackQuery):
         """عرض إعدادات الإحالات"""
         kb = get_referral_settings_keyboard()
@@ -186,6 +249,7 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
+    @admin_routes.route("admin_ichancy_settings")
     def _show_ichancy_settings(self, call: CallbackQuery):
         """عرض إعدادات Ichancy"""
         kb = get_ichancy_settings_keyboard()
@@ -201,19 +265,18 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
-    def _show_transactions(self, call: CallbackQuery):
-        """عرض المعاملات"""
-        from keyboards.user_keyboards import get_main_menu
-        
+    @admin_routes.route("admin_transactions", "admin_transactions_{after_id:int}")
+    def _show_transactions(self, call: CallbackQuery, after_id: int = None):
+        """عرض طابور المعاملات المعلقة (صفحة بعد after_id)"""
         msg = "📋 **المعاملات المعلقة**\n\n"
         
-        pending = self.payment_service.get_pending_transactions()
-        if not pending:
+        page = self.payment_service.get_review_page(after_id=after_id)
+        if not page["total"]:
             msg += "✅ لا توجد معاملات معلقة"
         else:
-            msg += f"⏳ **هناك {len(pending)} معاملة معلقة:**\n\n"
+            msg += f"⏳ **هناك {page['total']} معاملة معلقة:**\n\n"
             
-            for tx in pending[:5]:  # عرض أول 5 فقط
+            for tx in page["items"]:
                 msg += f"🆔 #{tx.id}\n"
                 msg += f"👤 المستخدم: `{tx.user_id}`\n"
                 msg += f"💰 المبلغ: {tx.amount:,} ليرة\n"
@@ -221,7 +284,66 @@ class AdminService:
                 msg += f"📅 التاريخ: {tx.created_at[:16]}\n"
                 msg += "─" * 20 + "\n"
         
-        kb = get_main_menu(call.from_user.id)
+        kb = get_review_queue_keyboard(page["total"] > 0, page["next_after_id"])
+        
+        call.bot.edit_message_text(
+            msg,
+            call.message.chat.id,
+            call.message.message_id,
+            reply_markup=kb,
+            parse_mode="Markdown"
+        )
+        call.bot.answer_callback_query(call.id)
+    
+    @admin_routes.route("admin_review_next")
+    def _review_next_transaction(self, call: CallbackQuery):
+        """حجز أقدم معاملة غير محجوزة وعرضها مع أزرار القبول/الرفض"""
+        tx = self.payment_service.claim_next_transaction(call.from_user.id)
+        if not tx:
+            call.bot.answer_callback_query(call.id, "✅ لا توجد معاملات متاحة للمراجعة")
+            return
+        
+        msg = f"🔎 **مراجعة المعاملة #{tx.id}**\n\n"
+        msg += f"👤 المستخدم: `{tx.user_id}`\n"
+        msg += f"💰 المبلغ: {tx.amount:,} ليرة\n"
+        msg += f"📝 النوع: {tx.type}\n"
+        if tx.payment_method:
+            msg += f"💳 الطريقة: {tx.payment_method}\n"
+        if tx.transaction_id:
+            msg += f"🧾 رقم العملية: `{tx.transaction_id}`\n"
+        if tx.account_number:
+            msg += f"📱 الحساب: `{tx.account_number}`\n"
+        msg += f"📅 التاريخ: {tx.created_at[:16]}\n\n"
+        msg += f"🔒 محجوزة لك لمدة {REVIEW_QUEUE['LEASE_SECONDS'] // 60} دقائق"
+        
+        call.bot.edit_message_text(
+            msg,
+            call.message.chat.id,
+            call.message.message_id,
+            reply_markup=get_review_keyboard(tx.id),
+            parse_mode="Markdown"
+        )
+        call.bot.answer_callback_query(call.id)
+    
+    @admin_routes.route("admin_bulk_approve_charges")
+    def _confirm_bulk_approve(self, call: CallbackQuery):
+        """تأكيد قبول كل طلبات الشحن المعلقة حتى آخر طلب ظاهر الآن"""
+        page = self.payment_service.get_review_page('charge', limit=REVIEW_QUEUE["BULK_LIMIT"])
+        if not page["items"]:
+            call.bot.answer_callback_query(call.id, "✅ لا توجد طلبات شحن معلقة")
+            return
+        
+        # الطلبات التي تصل بعد هذه الرسالة لا تدخل في الدفعة
+        up_to_id = max(tx.id for tx in page["items"])
+        total_amount = sum(tx.amount for tx in page["items"])
+        
+        msg = f"⚠️ **قبول {len(page['items'])} طلب شحن**\n\n"
+        msg += f"💰 المجموع: {total_amount:,} ليرة\n"
+        if page["total"] > len(page["items"]):
+            msg += f"📋 الباقي بعد هذه الدفعة: {page['total'] - len(page['items'])}\n"
+        msg += "\nهل أنت متأكد؟"
+        
+        kb = get_confirmation_keyboard(f"admin_bulk_approve_charges_{up_to_id}", "admin_transactions")
         
         call.bot.edit_message_text(
             msg,
@@ -232,6 +354,25 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
+    @admin_routes.route("admin_bulk_approve_charges_{up_to_id:int}")
+    def _bulk_approve_charges(self, call: CallbackQuery, up_to_id: int):
+        """قبول طلبات الشحن المعلقة دفعة واحدة"""
+        result = self.payment_service.process_transactions_bulk(
+            'approve', call.from_user.id,
+            transaction_type='charge', up_to_id=up_to_id
+        )
+        
+        msg = ("✅ " if result['success'] else "❌ ") + result['message']
+        
+        call.bot.edit_message_text(
+            msg,
+            call.message.chat.id,
+            call.message.message_id,
+            reply_markup=get_review_queue_keyboard(False)
+        )
+        call.bot.answer_callback_query(call.id, msg[:200])
+    
+    @admin_routes.route("admin_manage_admins")
     def _show_manage_admins(self, call: CallbackQuery):
         """عرض إدارة الأدمن"""
         user_id = call.from_user.id
@@ -255,6 +396,7 @@ class AdminService:
     
     # ===== دوال التبديل =====
     
+    @admin_routes.route("admin_toggle_*")
     def _toggle_setting(self, call: CallbackQuery):
         """تبديل إعداد"""
         user_id = call.from_user.id
@@ -303,6 +445,7 @@ class AdminService:
     
     # ===== دوال التعديل =====
     
+    @admin_routes.route("admin_edit_*")
     def _edit_setting(self, call: CallbackQuery):
         """تعديل إعداد"""
         user_id = call.from_user.id
@@ -436,6 +579,25 @@ class AdminService:
         from handlers.sessions import clear_session
         clear_session(user_id)
     
+    def _add_syriatel_code(self, message: Message, text: str):
+        """إضافة كود سيرياتيل"""
+        from handlers.sessions import clear_session
+        
+        code_number = text.replace(" ", "")
+        if not code_number.isdigit() or not 4 <= len(code_number) <= 15:
+            message.bot.reply_to(message, "❌ رقم الكود غير صحيح، أدخل أرقاماً فقط")
+            return
+        
+        if SyriatelCodeModel.count() >= SYSTEM_CONSTANTS["MAX_CODES"]:
+            message.bot.reply_to(message, f"❌ الحد الأقصى {SYSTEM_CONSTANTS['MAX_CODES']} كود")
+        elif SyriatelCodeModel.add(code_number, message.from_user.id):
+            code_allocator.reload()
+            message.bot.reply_to(message, f"✅ تم إضافة الكود {code_number}")
+        else:
+            message.bot.reply_to(message, "❌ الكود موجود مسبقاً أو حدث خطأ")
+        
+        clear_session(message.from_user.id)
+    
     def _remove_admin(self, message: Message, text: str):
         """حذف أدمن"""
         user_id = message.from_user.id
@@ -534,25 +696,7 @@ class AdminService:
         from handlers.sessions import clear_session
         clear_session(user_id)
     
-    def _handle_admin_action(self, call: CallbackQuery):
-        """معالجة إجراءات الأدمن الأخرى"""
-        data = call.data
-        
-        if data == "admin_users_count":
-            self._show_users_count(call)
-        elif data == "admin_distribute_referrals":
-            self._distribute_referrals(call)
-        elif data == "admin_reset_all_balances":
-            self._reset_all_balances(call)
-        elif data == "admin_list_admins":
-            self._list_admins(call)
-        elif data == "report_today":
-            self._show_today_report(call)
-        elif data == "report_deposit":
-            self._show_deposit_report(call)
-        elif data == "report_withdraw":
-            self._show_withdraw_report(call)
-    
+    @admin_routes.route("admin_users_count")
     def _show_users_count(self, call: CallbackQuery):
         """عرض عدد المستخدمين"""
         users = self.user_service.get_all_users(limit=5)
@@ -577,11 +721,13 @@ class AdminService:
         call.bot.send_message(call.from_user.id, msg, parse_mode="Markdown")
         call.bot.answer_callback_query(call.id, f"✅ العدد: {total}")
     
+    @admin_routes.route("admin_distribute_referrals")
     def _distribute_referrals(self, call: CallbackQuery):
         """توزيع عمولات الإحالات"""
         result = self.referral_service.distribute_commissions()
         call.bot.answer_callback_query(call.id, result['message'])
     
+    @admin_routes.route("admin_reset_all_balances")
     def _reset_all_balances(self, call: CallbackQuery):
         """تصفير جميع الأرصدة"""
         kb = get_confirmation_keyboard(
@@ -603,6 +749,7 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
+    @admin_routes.route("admin_list_admins")
     def _list_admins(self, call: CallbackQuery):
         """عرض قائمة الأدمن"""
         admins = AdminModel.get_all()
@@ -625,22 +772,54 @@ class AdminService:
         call.bot.send_message(call.from_user.id, msg, parse_mode="Markdown")
         call.bot.answer_callback_query(call.id, f"✅ عدد الأدمن: {len(admins)}")
     
-    def _show_today_report(self, call: CallbackQuery):
-        """عرض تقرير اليوم"""
-        report = self.payment_service.get_daily_report()
+    def _send_day_report(self, call: CallbackQuery, title: str, date_str: str):
+        """إرسال تقرير يوم من الإحصائيات المجمّعة"""
+        report = self.payment_service.get_daily_report(date_str)
         
-        msg = f"📊 **تقرير اليوم - {report['date']}**\n\n"
-        msg += f"👥 **المالية:**\n"
+        msg = f"📊 **{title} - {report['date']}**\n\n"
+        msg += f"👥 **المستخدمون:**\n"
+        msg += f"• 👤 جدد: {report['new_users']:,}\n"
+        msg += f"• 🎯 النشطين: {report['active_users']:,}\n\n"
+        msg += f"💰 **المالية:**\n"
         msg += f"• 💳 إجمالي الإيداع: {report['total_deposit']:,} ليرة\n"
         msg += f"• 💸 إجمالي السحب: {report['total_withdraw']:,} ليرة\n"
         msg += f"• 📈 صافي التدفق: {report['total_deposit'] - report['total_withdraw']:,} ليرة\n"
         msg += f"• 📋 عدد العمليات: {report['deposit_count'] + report['withdraw_count']}\n"
-        msg += f"• ⏳ المعلقة: {report['pending_count']}\n\n"
+        msg += f"• ⏳ المعلقة: {report['pending_count']}\n"
+        msg += f"• ❌ المرفوضة: {report['rejected_count']}\n\n"
+        msg += f"⚠️ **أخطاء النظام:** {report['system_errors']:,}\n"
         msg += f"🕒 **التاريخ:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
         
         call.bot.send_message(call.from_user.id, msg, parse_mode="Markdown")
         call.bot.answer_callback_query(call.id, "✅ تم إرسال التقرير")
     
+    @admin_routes.route("report_today")
+    def _show_today_report(self, call: CallbackQuery):
+        """عرض تقرير اليوم"""
+        self._send_day_report(call, "تقرير اليوم", datetime.now().strftime('%Y-%m-%d'))
+    
+    @admin_routes.route("report_yesterday")
+    def _show_yesterday_report(self, call: CallbackQuery):
+        """عرض تقرير الأمس"""
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        self._send_day_report(call, "تقرير الأمس", yesterday)
+    
+    @admin_routes.route("report_refresh")
+    def _refresh_reports(self, call: CallbackQuery):
+        """إعادة بناء الإحصائيات اليومية من المعاملات"""
+        try:
+            result = stats_rollup.rebuild()
+        except Exception as e:
+            logger.error(f"❌ خطأ في إعادة بناء الإحصائيات: {e}")
+            call.bot.answer_callback_query(call.id, "❌ فشل تحديث البيانات")
+            return
+        
+        call.bot.answer_callback_query(
+            call.id,
+            f"✅ تم تحديث إحصائيات آخر {DAILY_STATS['REBUILD_DAYS']} يوم ({result['transaction_rows']} سجل)"
+        )
+    
+    @admin_routes.route("report_deposit")
     def _show_deposit_report(self, call: CallbackQuery):
         """عرض تقرير الشحن"""
         from keyboards.admin_keyboards import get_reports_keyboard
@@ -666,6 +845,7 @@ class AdminService:
         )
         call.bot.answer_callback_query(call.id)
     
+    @admin_routes.route("report_withdraw")
     def _show_withdraw_report(self, call: CallbackQuery):
         """عرض تقرير السحب"""
         report = self.payment_service.get_daily_report()
@@ -674,17 +854,110 @@ class AdminService:
         msg += f"💰 **إجمالي المبلغ:** {report['total_withdraw']:,} ليرة\n"
         msg += f"📋 **عدد العمليات:** {report['withdraw_count']}\n"
         
-        # جلب المعاملات المعلقة للسحب
-        pending_withdrawals = self.payment_service.get_pending_transactions('withdraw')
+        # أول صفحة من طلبات السحب المعلقة
+        page = self.payment_service.get_review_page('withdraw')
         
-        if pending_withdrawals:
-            msg += f"\n⏳ **المعلقة ({len(pending_withdrawals)}):**\n"
-            for tx in pending_withdrawals[:5]:
+        if page["total"]:
+            msg += f"\n⏳ **المعلقة ({page['total']}):**\n"
+            for tx in page["items"]:
                 msg += f"• #{tx.id} - {tx.user_id} - {tx.amount:,} ليرة\n"
         
         call.bot.send_message(call.from_user.id, msg, parse_mode="Markdown")
         call.bot.answer_callback_query(call.id, "✅ تم إرسال التقرير")
     
+    @admin_routes.route("report_system")
+    def _show_system_report(self, call: CallbackQuery):
+        """عرض تقرير أداء النظام"""
+        slowest = metrics.slowest(10)
+        
+        msg = "📈 **أداء النظام**\n\n"
+        
+        if not slowest:
+            msg += "لا توجد بيانات بعد"
+        else:
+            msg += "⏱️ **أبطأ العمليات (p50 / p95 / p99):**\n"
+            for op in slowest:
+                msg += f"• `{op['operation']}`\n"
+                msg += f"  {op['p50_ms']} / {op['p95_ms']} / {op['p99_ms']} ms - {op['count']:,} استدعاء\n"
+        
+        msg += f"\n🕒 **التاريخ:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        
+        call.bot.send_message(call.from_user.id, msg, parse_mode="Markdown")
+        call.bot.answer_callback_query(call.id, "✅ تم إرسال التقرير")
+    
+    # ===== الإذاعة الجماعية =====
+    
+    @admin_routes.route("admin_broadcast")
+    def _prompt_broadcast(self, call: CallbackQuery):
+        """طلب نص الإذاعة"""
+        user_id = call.from_user.id
+        
+        from handlers.sessions import set_session
+        set_session(user_id, "admin_broadcast_message")
+        
+        msg = "📣 **رسالة للجميع**\n\n"
+        msg += f"سيتم الإرسال إلى {UserModel.count_active():,} مستخدم (عدا المحظورين).\n"
+        msg += "أرسل نص الرسالة:"
+        
+        call.bot.send_message(user_id, msg, parse_mode="Markdown")
+        call.bot.answer_callback_query(call.id)
+    
+    def _preview_broadcast(self, message: Message, text: str):
+        """معاينة الإذاعة قبل التأكيد"""
+        user_id = message.from_user.id
+        
+        from handlers.sessions import set_session
+        set_session(user_id, "admin_broadcast_confirm", {"text": text})
+        
+        kb = get_confirmation_keyboard(
+            "admin_broadcast_confirm",
+            "admin_back_to_panel",
+            "✅ إرسال للجميع",
+            "❌ إلغاء"
+        )
+        
+        message.bot.send_message(user_id, f"📣 معاينة الرسالة:\n\n{text}", reply_markup=kb)
+    
+    @admin_routes.route("admin_broadcast_confirm")
+    def _start_broadcast(self, call: CallbackQuery):
+        """بدء الإذاعة بعد التأكيد (رسالة التأكيد تصبح رسالة التقدم)"""
+        user_id = call.from_user.id
+        
+        from handlers.sessions import get_session, clear_session
+        session = get_session(user_id)
+        temp_data = (session or {}).get("temp_data") or {}
+        if not session or session.get("step") != "admin_broadcast_confirm" or not temp_data.get("text"):
+            call.bot.answer_callback_query(call.id, "❌ انتهت صلاحية المعاينة، أعد المحاولة")
+            return
+        
+        result = broadcast_service.start_broadcast(
+            temp_data["text"],
+            user_id,
+            call.message.chat.id,
+            call.message.message_id
+        )
+        clear_session(user_id)
+        
+        if not result['success']:
+            call.bot.answer_callback_query(call.id, f"❌ {result['message']}")
+            return
+        
+        call.bot.edit_message_text(
+            f"📣 **الإذاعة #{result['broadcast_id']}** - ⏳ بدأ الإرسال إلى {result['total']:,} مستخدم",
+            call.message.chat.id,
+            call.message.message_id,
+            parse_mode="Markdown"
+        )
+        call.bot.answer_callback_query(call.id, "✅ بدأت الإذاعة")
+    
+    @admin_routes.route("admin_broadcast_cancel_{broadcast_id:int}")
+    def _cancel_broadcast(self, call: CallbackQuery, broadcast_id: int):
+        """إلغاء إذاعة جارية"""
+        if broadcast_service.cancel_broadcast(broadcast_id):
+            call.bot.answer_callback_query(call.id, "⛔ سيتم إيقاف الإذاعة بعد الدفعة الحالية")
+        else:
+            call.bot.answer_callback_query(call.id, "❌ الإذاعة ليست قيد التنفيذ")
+    
     def _handle_admin_message_action(self, message: Message, step: str, text: str, temp_data: dict):
         """معالجة رسائل الأدمن الأخرى"""
         # يمكن إضافة المزيد من الإجراءات هنا
@@ -0,0 +1,212 @@
+"""
+خدمة الإذاعة الجماعية - إرسال عبر طابور الإرسال مع الاستئناف بعد إعادة التشغيل
+"""
+
+import threading
+import time
+from concurrent.futures import wait
+from typing import Dict, Any, Optional
+
+from telebot.apihelper import ApiTelegramException
+
+from core.config import BROADCAST
+from core.outbox import PRIORITY_BULK
+from core.metrics import metrics
+from core.logger import get_logger, performance_logger
+from models.broadcast import Broadcast, BroadcastModel
+from models.user import UserModel
+
+logger = get_logger(__name__)
+
+
+class BroadcastService:
+    """محرك الإذاعة (خيط لكل إذاعة نشطة)"""
+    
+    def __init__(self):
+        self.threads: Dict[int, threading.Thread] = {}
+        self.cancelled = set()
+        self.lock = threading.Lock()
+        self.sent_counter = metrics.counter("broadcast.sent")
+        self.blocked_counter = metrics.counter("broadcast.blocked")
+    
+    @performance_logger
+    def start_broadcast(self, text: str, admin_id: int, progress_chat_id: int = None,
+                        progress_message_id: int = None) -> Dict[str, Any]:
+        """بدء إذاعة جديدة"""
+        try:
+            if not text or not text.strip():
+                return {"success": False, "message": "نص الرسالة فارغ"}
+            
+            # الفحص والإنشاء والتشغيل تحت نفس القفل: طلبان متزامنان لا ينشئان إذاعتين
+            with self.lock:
+                if any(thread.is_alive() for thread in self.threads.values()):
+                    return {"success": False, "message": "توجد إذاعة قيد التنفيذ بالفعل"}
+                
+                total = UserModel.count_active()
+                broadcast = BroadcastModel.create(text, admin_id, total, progress_chat_id, progress_message_id)
+                if not broadcast:
+                    return {"success": False, "message": "خطأ في إنشاء الإذاعة"}
+                
+                self._spawn(broadcast)
+            return {"success": True, "broadcast_id": broadcast.id, "total": total}
+        except Exception as e:
+            logger.error(f"خطأ في بدء الإذاعة: {e}")
+            return {"success": False, "message": "حدث خطأ في النظام"}
+    
+    def cancel_broadcast(self, broadcast_id: int) -> bool:
+        """إلغاء إذاعة جارية (يتوقف بعد الدفعة الحالية) - False إذا لم تكن جارية"""
+        if not BroadcastModel.finish(broadcast_id, 'cancelled'):
+            return False
+        
+        with self.lock:
+            if broadcast_id in self.threads:
+                self.cancelled.add(broadcast_id)
+        return True
+    
+    def resume_pending(self) -> int:
+        """استئناف الإذاعات غير المكتملة من آخر نقطة محفوظة"""
+        try:
+            pending = BroadcastModel.get_running()
+            with self.lock:
+                for broadcast in pending:
+                    logger.info(f"🔁 استئناف الإذاعة #{broadcast.id} بعد المستخدم {broadcast.last_user_id}")
+                    self._spawn(broadcast)
+            return len(pending)
+        except Exception as e:
+            logger.error(f"خطأ في استئناف الإذاعات: {e}")
+            return 0
+    
+    def _spawn(self, broadcast: Broadcast):
+        """تشغيل الإذاعة في خيط منفصل (المستدعي يحمل self.lock)"""
+        thread = threading.Thread(
+            target=self._run,
+            args=(broadcast,),
+            daemon=True,
+            name=f"broadcast-{broadcast.id}"
+        )
+        self.threads[broadcast.id] = thread
+        thread.start()
+    
+    def _run(self, broadcast: Broadcast):
+        """حلقة الإرسال: دفعة -> انتظار النتائج -> حفظ نقطة الاستئناف"""
+        from handlers.commands import bot
+        
+        started = time.monotonic()
+        processed_at_start = broadcast.processed
+        last_progress = 0.0
+        
+        try:
+            while broadcast.id not in self.cancelled:
+                user_ids = UserModel.get_active_ids_page(broadcast.last_user_id, BROADCAST["BATCH_SIZE"])
+                if not user_ids:
+                    break
+                
+                # الطابور يحدد المعدل والتوازي، الأولوية أقل من ردود المستخدمين
+                futures = {
+                    bot.send_message(user_id, broadcast.text, priority=PRIORITY_BULK): user_id
+                    for user_id in user_ids
+                }
+                wait(futures)
+                
+                sent, blocked = 0, []
+                for future, user_id in futures.items():
+                    error = future.exception()
+                    if error is None:
+                        sent += 1
+                    elif isinstance(error, ApiTelegramException) and error.error_code == 403:
+                        blocked.append(user_id)
+                    else:
+                        broadcast.failed += 1
+                
+                broadcast.sent += sent
+                broadcast.blocked += len(blocked)
+                broadcast.last_user_id = user_ids[-1]
+                BroadcastModel.record_blocked(blocked, broadcast.id)
+                BroadcastModel.save_progress(broadcast)
+                self.sent_counter.inc(sent)
+                self.blocked_counter.inc(len(blocked))
+                
+                now = time.monotonic()
+                if now - last_progress >= BROADCAST["PROGRESS_INTERVAL_SECONDS"]:
+                    last_progress = now
+                    self._report_progress(bot, broadcast, now - started, processed_at_start)
+            
+            if broadcast.id not in self.cancelled:
+                BroadcastModel.finish(broadcast.id, 'completed')
+            self._report_progress(bot, broadcast, time.monotonic() - started, processed_at_start, finished=True)
+            logger.info(
+                f"✅ انتهت الإذاعة #{broadcast.id}: {broadcast.sent} مرسلة، "
+                f"{broadcast.blocked} حظروا البوت، {broadcast.failed} فشلت"
+            )
+        except Exception as e:
+            # تبقى 'running' ليتم استئنافها عند إعادة التشغيل
+            logger.error(f"❌ خطأ في الإذاعة #{broadcast.id}: {e}")
+        finally:
+            with self.lock:
+                self.threads.pop(broadcast.id, None)
+                self.cancelled.discard(broadcast.id)
+    
+    def _report_progress(self, bot, broadcast: Broadcast, elapsed: float,
+                         processed_at_start: int, finished: bool = False):
+        """تحديث رسالة التقدم عند الأدمن (رسالة/ثانية والوقت المتبقي)"""
+        if not broadcast.progress_chat_id or not broadcast.progress_message_id:
+            return
+        
+        from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+        
+        rate = (broadcast.processed - processed_at_start) / elapsed if elapsed > 0 else 0
+        remaining = max(broadcast.total - broadcast.processed, 0)
+        
+        if finished:
+            status = "⛔ ملغاة" if broadcast.id in self.cancelled else "✅ مكتملة"
+        else:
+            status = "⏳ قيد الإرسال"
+        
+        msg = f"📣 **الإذاعة #{broadcast.id}** - {status}\n\n"
+        msg += f"📊 التقدم: {broadcast.processed:,} / {broadcast.total:,}\n"
+        msg += f"✅ مرسلة: {broadcast.sent:,}\n"
+        msg += f"🚫 حظروا البوت: {broadcast.blocked:,}\n"
+        msg += f"❌ فشلت: {broadcast.failed:,}\n"
+        msg += f"⚡ السرعة: {rate:.1f} رسالة/ثانية\n"
+        if not finished and rate > 0:
+            msg += f"🕒 الوقت المتبقي: {self._format_eta(remaining / rate)}\n"
+        
+        kb = None
+        if not finished:
+            kb = InlineKeyboardMarkup()
+            kb.add(InlineKeyboardButton(
+                "⛔ إلغاء الإذاعة", callback_data=f"admin_broadcast_cancel_{broadcast.id}"
+            ))
+        
+        bot.edit_message_text(
+            msg,
+            broadcast.progress_chat_id,
+            broadcast.progress_message_id,
+            reply_markup=kb,
+            parse_mode="Markdown"
+        )
+    
+    @staticmethod
+    def _format_eta(seconds: float) -> str:
+        """تنسيق الوقت المتبقي"""
+        seconds = int(seconds)
+        if seconds < 60:
+            return f"{seconds} ثانية"
+        if seconds < 3600:
+            return f"{seconds // 60} دقيقة {seconds % 60} ثانية"
+        return f"{seconds // 3600} ساعة {seconds % 3600 // 60} دقيقة"
+    
+    def get_status(self, broadcast_id: int) -> Optional[Dict[str, Any]]:
+        """حالة إذاعة"""
+        broadcast = BroadcastModel.get(broadcast_id)
+        if not broadcast:
+            return None
+        
+        data = broadcast.to_dict()
+        data["processed"] = broadcast.processed
+        data["active"] = broadcast_id in self.threads
+        return data
+
+
+# نسخة عامة (مشتركة بين جميع نسخ AdminService)
+broadcast_service = BroadcastService()
@@ -0,0 +1,240 @@
+"""
+توزيع طلبات شحن سيرياتيل كاش على الأكواد حسب السعة المتبقية - بدون مسح للجدول
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from core.config import SYSTEM_CONSTANTS, SYRIATEL_CODES
+from core.logger import get_logger
+from core.metrics import metrics
+from models.syriatel_code import SyriatelCodeModel
+
+logger = get_logger(__name__)
+
+
+class SyriatelCodeAllocator:
+    """كومة أولوية (أكبر سعة متبقية أولاً) للأكواد المفعلة مع حجوزات مؤقتة في الذاكرة
+
+    المتبقي = السعة - المبلغ المستلم (من قاعدة البيانات) - المحجوز لطلبات لم تكتمل.
+    الإدخالات القديمة في الكومة تُهمل عند وصولها للقمة (رقم نسخة لكل كود).
+    """
+    
+    def __init__(self, capacity: int = SYSTEM_CONSTANTS["CODE_CAPACITY"],
+                 hold_seconds: int = SYRIATEL_CODES["HOLD_SECONDS"]):
+        self.capacity = capacity
+        self.hold_seconds = hold_seconds
+        self.codes: Dict[int, dict] = {}
+        self.heap: List[tuple] = []
+        self.versions: Dict[int, int] = {}
+        self.holds: Dict[int, tuple] = {}
+        self.confirming: Dict[int, tuple] = {}
+        self.expiries: List[tuple] = []
+        self.pending_usage: Dict[int, list] = {}
+        self.hold_ids = itertools.count(1)
+        self.loaded = False
+        self.lock = threading.RLock()
+        self.stats = {"reserved": 0, "confirmed": 0, "expired": 0, "no_capacity": 0, "overflow": 0}
+    
+    # ===== الكومة =====
+    
+    def _remaining(self, code: dict) -> int:
+        return self.capacity - code["current"] - code["held"]
+    
+    def _push(self, code_id: int):
+        """إدخال الحالة الحالية للكود (الإدخال السابق يصبح قديماً)"""
+        code = self.codes.get(code_id)
+        version = self.versions.get(code_id, 0) + 1
+        self.versions[code_id] = version
+        if code is None:
+            return
+        heapq.heappush(self.heap, (-self._remaining(code), code["usage"], code_id, version))
+        
+        # إعادة بناء عند تراكم الإدخالات القديمة
+        if len(self.heap) > 4 * len(self.codes) + 16:
+            self._rebuild_heap()
+    
+    def _rebuild_heap(self):
+        self.heap = [
+            (-self._remaining(code), code["usage"], code_id, self.versions.setdefault(code_id, 0))
+            for code_id, code in self.codes.items()
+        ]
+        heapq.heapify(self.heap)
+    
+    def _top(self) -> Optional[tuple]:
+        """أفضل كود حالياً بعد إسقاط الإدخالات القديمة"""
+        while self.heap:
+            entry = self.heap[0]
+            code_id, version = entry[2], entry[3]
+            if code_id in self.codes and self.versions.get(code_id) == version:
+                return entry
+            heapq.heappop(self.heap)
+        return None
+    
+    def _expire_holds(self, now: float):
+        """إلغاء الحجوزات التي انتهت مدتها (المستخدم لم يكمل الطلب)"""
+        while self.expiries and self.expiries[0][0] <= now:
+            _, hold_id = heapq.heappop(self.expiries)
+            if self._drop_hold(hold_id):
+                self.stats["expired"] += 1
+    
+    def _drop_hold(self, hold_id: int) -> Optional[tuple]:
+        hold = self.holds.pop(hold_id, None)
+        if hold is None:
+            return None
+        code_id, amount, _ = hold
+        code = self.codes.get(code_id)
+        if code is not None:
+            code["held"] -= amount
+            self._push(code_id)
+        return hold
+    
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.reload()
+    
+    # ===== الواجهة =====
+    
+    def reload(self) -> int:
+        """مزامنة الأكواد المفعلة ومبالغها من قاعدة البيانات (مع الإبقاء على الحجوزات)"""
+        try:
+            with self.lock:
+                held: Dict[int, int] = {}
+                for code_id, amount, _ in itertools.chain(self.holds.values(), self.confirming.values()):
+                    held[code_id] = held.get(code_id, 0) + amount
+                
+                self.codes = {
+                    code.id: {
+                        "number": code.code_number,
+                        "current": code.current_amount,
+                        "held": held.get(code.id, 0),
+                        "usage": code.usage_count + self.pending_usage.get(code.id, [0])[0]
+                    }
+                    for code in SyriatelCodeModel.get_all(active_only=True)
+                }
+                self._rebuild_heap()
+                self.loaded = True
+                return len(self.codes)
+        except Exception as e:
+            logger.error(f"خطأ في تحميل أكواد سيرياتيل: {e}")
+            return 0
+    
+    def reserve(self, amount: int) -> Optional[Dict]:
+        """حجز سعة على الكود صاحب أكبر سعة متبقية - None إذا لا يوجد كود يتسع للمبلغ"""
+        with self.lock:
+            self._ensure_loaded()
+            self._expire_holds(time.time())
+            
+            top = self._top()
+            if top is None or -top[0] < amount:
+                self.stats["no_capacity"] += 1
+                return None
+            
+            code_id = top[2]
+            code = self.codes[code_id]
+            code["held"] += amount
+            self._push(code_id)
+            
+            hold_id = next(self.hold_ids)
+            expires_at = time.time() + self.hold_seconds
+            self.holds[hold_id] = (code_id, amount, expires_at)
+            heapq.heappush(self.expiries, (expires_at, hold_id))
+            self.stats["reserved"] += 1
+            
+            return {"hold_id": hold_id, "code_id": code_id, "code_number": code["number"]}
+    
+    def confirm(self, hold_id: int, code_id: int, amount: int) -> bool:
+        """تثبيت الحجز بعد إنشاء طلب الشحن (المبلغ يُسجل على الكود في قاعدة البيانات)
+
+        الحجز المنتهي لا يمنع التثبيت: المستخدم حوّل للكود الذي عُرض عليه. الكتابة في قاعدة
+        البيانات خارج القفل، والحجز يبقى محسوباً على الكود حتى تنتهي فلا تُعطى سعته لطلب آخر.
+        """
+        with self.lock:
+            hold = self.holds.pop(hold_id, None)
+            if hold is not None:
+                self.confirming[hold_id] = hold
+        
+        current = SyriatelCodeModel.add_amount(code_id, amount)
+        
+        with self.lock:
+            hold = self.confirming.pop(hold_id, None)
+            if hold is not None:
+                held_code = self.codes.get(hold[0])
+                if held_code is not None:
+                    held_code["held"] -= hold[1]
+                    self._push(hold[0])
+            
+            if current is None:
+                self.stats["overflow"] += 1
+                metrics.counter("syriatel_codes.overflow").inc()
+                logger.warning(f"⚠️ كود سيرياتيل {code_id} لا يتسع لمبلغ {amount:,} (تجاوز السعة)")
+                return False
+            
+            usage = self.pending_usage.setdefault(code_id, [0, None])
+            usage[0] += 1
+            usage[1] = datetime.now().isoformat()
+            
+            code = self.codes.get(code_id)
+            if code is not None:
+                code["current"] = current
+                code["usage"] += 1
+                self._push(code_id)
+            
+            self.stats["confirmed"] += 1
+            return True
+    
+    def cancel(self, hold_id: int):
+        """إلغاء حجز لم يكتمل طلبه"""
+        with self.lock:
+            self._drop_hold(hold_id)
+    
+    def max_available(self) -> int:
+        """أكبر مبلغ يمكن حجزه حالياً"""
+        with self.lock:
+            self._ensure_loaded()
+            self._expire_holds(time.time())
+            top = self._top()
+            return max(0, -top[0]) if top else 0
+    
+    def has_codes(self) -> bool:
+        """هل يوجد كود مفعل"""
+        with self.lock:
+            self._ensure_loaded()
+            return bool(self.codes)
+    
+    def flush_usage(self) -> int:
+        """كتابة عدادات الاستخدام المتراكمة دفعة واحدة"""
+        with self.lock:
+            pending, self.pending_usage = self.pending_usage, {}
+        if not pending:
+            return 0
+        
+        batch = [(count, last_used, code_id) for code_id, (count, last_used) in pending.items()]
+        if not SyriatelCodeModel.record_usage(batch):
+            # إعادة الدفعة للمحاولة التالية
+            with self.lock:
+                for code_id, (count, last_used) in pending.items():
+                    usage = self.pending_usage.setdefault(code_id, [0, last_used])
+                    usage[0] += count
+            return 0
+        return len(batch)
+    
+    def get_stats(self) -> Dict:
+        """إحصائيات الموزع"""
+        with self.lock:
+            return {
+                **self.stats,
+                "codes": len(self.codes),
+                "active_holds": len(self.holds),
+                "held_amount": sum(code["held"] for code in self.codes.values()),
+                "available": sum(max(0, self._remaining(code)) for code in self.codes.values())
+            }
+
+
+# نسخة عامة
+code_allocator = SyriatelCodeAllocator()
+
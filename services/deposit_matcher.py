@@ -0,0 +1,175 @@
+"""
+المطابقة التلقائية لطلبات الشحن مع إشعارات التحويل الواردة
+"""
+
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from core.config import DEPOSIT_MATCHING, PAYMENT_METHODS, CHANNELS
+from core.logger import get_logger, performance_logger
+from core.metrics import metrics
+from core.outbox import PRIORITY_CHANNEL
+from models.transaction import Transaction, TransactionModel
+from models.payment_notification import PaymentNotification, PaymentNotificationModel
+from services.payment_service import PaymentService
+
+logger = get_logger(__name__)
+
+# زمن من طلب الشحن حتى إضافة الرصيد (ميلي ثانية): ثوانٍ إلى ساعة
+LATENCY_BUCKETS_MS = [500, 1000, 2500, 5000, 10000, 30000, 60000, 300000, 900000, 3600000]
+
+
+class DepositMatcher:
+    """مطابقة (طريقة الدفع، رقم العملية) بين الإشعارات وطلبات الشحن - المطابق تماماً يُقبل تلقائياً
+
+    كلا الجانبين مفهرس فريدياً على (طريقة الدفع، رقم العملية)، فالمطابقة استعلام واحد
+    أياً كان الأسبق: الإشعار (ينتظر الطلب) أو الطلب (ينتظر الإشعار).
+    """
+    
+    def __init__(self):
+        self.payment_service = PaymentService()
+        self.latency = metrics.histogram(
+            "deposit_matching.request_to_credit", "زمن الشحن التلقائي", LATENCY_BUCKETS_MS
+        )
+    
+    @staticmethod
+    def parse(data: Dict[str, Any], source: str = None) -> Optional[PaymentNotification]:
+        """تحويل سجل المصدر إلى إشعار (None إذا كان غير صالح)"""
+        try:
+            payment_method = str(data.get('payment_method') or '').strip()
+            reference = "".join(str(data.get('reference') or '').split())
+            amount = float(data.get('amount'))
+        except (TypeError, ValueError, AttributeError):
+            return None
+        
+        if payment_method not in PAYMENT_METHODS or not reference or amount <= 0 or amount != int(amount):
+            return None
+        
+        return PaymentNotification(
+            payment_method=payment_method,
+            reference=reference,
+            amount=int(amount),
+            sender=str(data['sender']) if data.get('sender') else None,
+            receiver="".join(str(data['receiver']).split()) if data.get('receiver') else None,
+            source=source
+        )
+    
+    @performance_logger
+    def ingest(self, data: Dict[str, Any], source: str = None) -> Dict[str, Any]:
+        """تسجيل إشعار ومطابقته مع طلب الشحن إن وُجد"""
+        notification = self.parse(data, source)
+        if not notification:
+            metrics.counter("deposit_matching.invalid").inc()
+            return {"status": "invalid"}
+        
+        notification.id = PaymentNotificationModel.create(notification)
+        if not notification.id:
+            metrics.counter("deposit_matching.duplicate").inc()
+            return {"status": "duplicate"}
+        
+        transaction = TransactionModel.get_charge_by_reference(notification.payment_method, notification.reference)
+        if not transaction:
+            # المستخدم لم يرسل الطلب بعد: المطابقة عند إنشائه
+            metrics.counter("deposit_matching.waiting").inc()
+            return {"status": "unmatched"}
+        
+        return self._match(notification, transaction, notify_user=True)
+    
+    def match_transaction(self, transaction: Transaction) -> Dict[str, Any]:
+        """مطابقة طلب شحن جديد مع إشعار وصل قبله"""
+        if not DEPOSIT_MATCHING["ENABLED"]:
+            return {"status": "none"}
+        
+        notification = PaymentNotificationModel.get_by_reference(transaction.payment_method, transaction.transaction_id)
+        if not notification or notification.status != 'unmatched':
+            return {"status": "none"}
+        
+        # المستخدم يستلم النتيجة في رد طلبه مباشرة
+        return self._match(notification, transaction, notify_user=False)
+    
+    def _mismatch_reason(self, notification: PaymentNotification, transaction: Transaction) -> Optional[str]:
+        """سبب تحويل المطابقة للأدمن (None = مطابقة تامة)"""
+        if transaction.status != 'pending':
+            return f"الطلب #{transaction.id} معالج مسبقاً ({transaction.status})"
+        if transaction.payment_method not in DEPOSIT_MATCHING["AUTO_APPROVE_METHODS"]:
+            return "طريقة الدفع تحتاج مراجعة يدوية"
+        if notification.amount != transaction.amount:
+            return f"المبلغ المحوّل {notification.amount:,} ≠ مبلغ الطلب {transaction.amount:,}"
+        if notification.receiver and transaction.account_number and notification.receiver != transaction.account_number:
+            return f"التحويل إلى {notification.receiver} بدل {transaction.account_number}"
+        return None
+    
+    def _match(self, notification: PaymentNotification, transaction: Transaction,
+               notify_user: bool) -> Dict[str, Any]:
+        if transaction.status == 'approved':
+            # الأدمن قبله قبل وصول الإشعار
+            PaymentNotificationModel.resolve(notification.id, 'matched', transaction.id, "مقبول مسبقاً")
+            return {"status": "approved", "transaction_id": transaction.id, "by_admin": True}
+        
+        reason = self._mismatch_reason(notification, transaction)
+        if reason:
+            return self._send_to_review(notification, transaction, reason)
+        
+        # الإشعار يُستهلك أولاً: إشعاران متزامنان لا يقبلان نفس الطلب مرتين
+        if not PaymentNotificationModel.resolve(notification.id, 'matched', transaction.id):
+            return {"status": "none"}
+        
+        result = self.payment_service.process_transaction(transaction.id, 'approve')
+        if not result['success']:
+            current = TransactionModel.get(transaction.id)
+            if current and current.status == 'approved':
+                # أدمن قبله في نفس اللحظة
+                return {"status": "approved", "transaction_id": transaction.id, "by_admin": True}
+            return self._send_to_review(notification, transaction, result['message'], from_status='matched')
+        
+        try:
+            created = datetime.fromisoformat(transaction.created_at)
+            self.latency.observe((datetime.now() - created).total_seconds() * 1000)
+        except (TypeError, ValueError):
+            pass
+        metrics.counter("deposit_matching.approved").inc()
+        logger.info(
+            f"✅ قبول تلقائي لطلب الشحن #{transaction.id} ({transaction.amount:,} {transaction.payment_method}) "
+            f"من إشعار {notification.source or ''}"
+        )
+        
+        if notify_user:
+            self.payment_service._notify_transaction_results(
+                [(transaction.id, transaction.user_id, transaction.type, transaction.amount)], 'approve'
+            )
+        
+        return {"status": "approved", "transaction_id": transaction.id}
+    
+    def _send_to_review(self, notification: PaymentNotification, transaction: Transaction,
+                        reason: str, from_status: str = 'unmatched') -> Dict[str, Any]:
+        """تحويل الحالة للأدمن (الطلب يبقى في طابور المراجعة)"""
+        if PaymentNotificationModel.resolve(notification.id, 'review', transaction.id, reason, from_status):
+            metrics.counter("deposit_matching.review").inc()
+            logger.warning(f"⚠️ مطابقة تحتاج مراجعة: الطلب #{transaction.id} - {reason}")
+            
+            msg = f"⚠️ **مطابقة شحن تحتاج مراجعة**\n\n"
+            msg += f"🧾 الطلب: #{transaction.id} (المستخدم `{transaction.user_id}`)\n"
+            msg += f"🔑 رقم العملية: `{notification.reference}`\n"
+            msg += f"💰 الطلب: {transaction.amount:,} | الإشعار: {notification.amount:,}\n"
+            if notification.sender:
+                msg += f"👤 المرسل: {notification.sender}\n"
+            msg += f"\n📌 {reason}"
+            
+            from handlers.commands import bot
+            try:
+                bot.send_message(CHANNELS["URGENT_REQUESTS"], msg, parse_mode="Markdown", priority=PRIORITY_CHANNEL)
+            except Exception as e:
+                logger.error(f"خطأ في إرسال تنبيه المطابقة للطلب #{transaction.id}: {e}")
+        
+        return {"status": "review", "transaction_id": transaction.id, "reason": reason}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """حالة الإشعارات وزمن القبول التلقائي"""
+        return {
+            "notifications": PaymentNotificationModel.count_by_status(),
+            "latency": self.latency.summary()
+        }
+
+
+# نسخة عامة
+deposit_matcher = DepositMatcher()
@@ -12,6 +12,7 @@ from core.security import input_validator
 from core.logger import get_logger, performance_logger
 from models.gift import GiftCode, GiftTransaction, GiftModel
 from models.user import UserModel
+from models.ledger import LedgerModel
 from models.transaction import TransactionModel
 
 logger = get_logger(__name__)
@@ -79,7 +80,7 @@ class GiftService:
                 from services.user_service import UserService
                 user_service = UserService()
                 
-                result = user_service.update_balance(user_id, gift_code.amount, 'add')
+                result = user_service.update_balance(user_id, gift_code.amount, 'add', kind='gift_code', reference=code_str)
                 if result['success']:
                     # تسجيل المعاملة
                     transaction = TransactionModel()
@@ -146,17 +147,13 @@ class GiftService:
                 deduction = int(amount * percentage / 100)
                 net_amount = amount - deduction
             
-            # خصم من المرسل
-            sender_result = user_service.update_balance(sender_id, amount, 'subtract')
-            if not sender_result['success']:
-                return sender_result
-            
-            # إضافة للمستلم
-            receiver_result = user_service.update_balance(receiver_id, net_amount, 'add')
-            if not receiver_result['success']:
-                # إرجاع الرصيد في حالة الخطأ
-                user_service.update_balance(sender_id, amount, 'add')
-                return receiver_result
+            # خصم من المرسل وإضافة للمستلم في معاملة واحدة
+            balances = LedgerModel.transfer(
+                sender_id, receiver_id, amount, net_amount,
+                kind_out='gift_sent', kind_in='gift_received'
+            )
+            if balances is None:
+                return {"success": False, "message": "رصيدك غير كافي"}
             
             # تسجيل معاملة الإهداء
             gift_transaction = GiftTransaction(
@@ -189,8 +186,8 @@ class GiftService:
                 "message": f"✅ تم إرسال الهدية بنجاح!\nالمستلم سيحصل على {net_amount:,} ليرة (بعد خصم {deduction:,} ليرة)",
                 "net_amount": net_amount,
                 "deduction": deduction,
-                "sender_balance": sender_result['new_balance'],
-                "receiver_balance": receiver_result['new_balance']
+                "sender_balance": balances[0],
+                "receiver_balance": balances[1]
             }
         except Exception as e:
             logger.error(f"خطأ في send_gift: {e}")
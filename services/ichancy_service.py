@@ -2,12 +2,14 @@
 خدمات نظام Ichancy - سرعة فائقة
 """
 
-from typing import Optional, Dict, Any, List
+from typing import Callable, Optional, Dict, Any, List, Tuple, Iterator
+import threading
 import time
 
 from core.database import db
 from core.cache import cache
 from core.security import password_manager, token_generator, input_validator
+from core.identifiers import username_registry
 from core.config import ICHANCY_CONFIG
 from core.logger import get_logger, performance_logger
 from models.ichancy import IchancyAccount, IchancyModel
@@ -21,12 +23,18 @@ class IchancyService:
     
     def __init__(self):
         self.cache = cache
+        self.creating = set()
+        self.lock = threading.Lock()
     
     @performance_logger
-    def create_account(self, user_id: int, base_username: str = None) -> Dict[str, Any]:
-        """إنشاء حساب Ichancy"""
+    def create_account(self, user_id: int, on_created: Callable[[Dict[str, Any]], None],
+                       base_username: str = None) -> Dict[str, Any]:
+        """بدء إنشاء حساب Ichancy - النتيجة النهائية تصل إلى on_created بعد التشفير
+
+        الرد الفوري إما رفض (حساب موجود، البوول مشغول) أو pending، ولا ينتظر المعالج bcrypt.
+        """
         try:
-            # التحقق من وجود حساب مسبق
+            # التحقق من وجود حساب مسبق أو طلب قيد التنفيذ
             existing_account = IchancyModel.get(user_id)
             if existing_account:
                 return {
@@ -34,37 +42,69 @@ class IchancyService:
                     "message": "لديك حساب Ichancy بالفعل"
                 }
             
+            with self.lock:
+                if user_id in self.creating:
+                    return {"success": False, "message": "⏳ جاري إنشاء حسابك..."}
+                self.creating.add(user_id)
+            
             # توليد اسم المستخدم
             if not base_username or not input_validator.validate_username(base_username):
                 base_username = "User"
             
-            username = token_generator.generate_ichancy_username(base_username)
-            
-            # التحقق من التكرار
-            while IchancyModel.get_by_username(username):
-                username = token_generator.generate_ichancy_username(base_username)
+            # حجز اسم غير مستخدم من فلتر العضوية (بدون استعلامات تكرار)
+            username = username_registry.allocate(base_username)
             
             # توليد كلمة مرور قوية
             password = password_manager.generate_strong_password(
                 ICHANCY_CONFIG["PASSWORD_LENGTH"]
             )
             
-            # إنشاء الحساب
-            account = IchancyModel.create(user_id, username, password)
-            if not account:
-                return {"success": False, "message": "خطأ في إنشاء الحساب"}
+            def _hashed(future):
+                # تحرير الاسم فقط إذا فشل التشفير أو الحفظ، والنتيجة تُرسل مرة واحدة خارج المحاولة
+                try:
+                    result = self._finish_create(user_id, username, password, future.result())
+                except Exception as e:
+                    logger.error(f"خطأ في إكمال إنشاء حساب Ichancy للمستخدم {user_id}: {e}")
+                    username_registry.release(username)
+                    result = {"success": False, "message": "خطأ في إنشاء الحساب"}
+                finally:
+                    with self.lock:
+                        self.creating.discard(user_id)
+                
+                try:
+                    on_created(result)
+                except Exception as e:
+                    logger.error(f"خطأ في إبلاغ المستخدم {user_id} بنتيجة إنشاء حساب Ichancy: {e}")
             
-            return {
-                "success": True,
-                "message": "تم إنشاء حساب Ichancy بنجاح",
-                "username": username,
-                "password": password,
-                "account": account.to_dict()
-            }
+            if not password_manager.hash_password_async(password, _hashed):
+                username_registry.release(username)
+                with self.lock:
+                    self.creating.discard(user_id)
+                return {"success": False, "message": "⏳ الخدمة مشغولة، حاول بعد قليل"}
+            
+            return {"success": True, "pending": True}
         except Exception as e:
+            with self.lock:
+                self.creating.discard(user_id)
             logger.error(f"خطأ في create_account: {e}")
             return {"success": False, "message": "خطأ داخلي"}
     
+    def _finish_create(self, user_id: int, username: str, password: str,
+                       hashed_password: str) -> Dict[str, Any]:
+        """حفظ الحساب بعد انتهاء التشفير"""
+        account = IchancyModel.create(user_id, username, hashed_password)
+        if not account:
+            username_registry.release(username)
+            return {"success": False, "message": "خطأ في إنشاء الحساب"}
+        
+        return {
+            "success": True,
+            "message": "تم إنشاء حساب Ichancy بنجاح",
+            "username": username,
+            "password": password,
+            "account": account.to_dict()
+        }
+    
     @performance_logger
     def get_account_info(self, user_id: int) -> Optional[Dict[str, Any]]:
         """جلب معلومات حساب Ichancy"""
@@ -128,7 +168,7 @@ class IchancyService:
                 return {"success": False, "message": "الرصيد غير كافي في البوت"}
             
             # خصم من البوت
-            bot_result = user_service.update_balance(user_id, amount, 'subtract')
+            bot_result = user_service.update_balance(user_id, amount, 'subtract', kind='ichancy_deposit')
             if not bot_result['success']:
                 return bot_result
             
@@ -136,7 +176,7 @@ class IchancyService:
             ichancy_result = self.update_balance(user_id, amount, 'add')
             if not ichancy_result['success']:
                 # إرجاع الرصيد في حالة الخطأ
-                user_service.update_balance(user_id, amount, 'add')
+                user_service.update_balance(user_id, amount, 'add', kind='ichancy_refund')
                 return ichancy_result
             
             return {
@@ -161,7 +201,7 @@ class IchancyService:
             # إضافة إلى البوت
             from services.user_service import UserService
             user_service = UserService()
-            bot_result = user_service.update_balance(user_id, amount, 'add')
+            bot_result = user_service.update_balance(user_id, amount, 'add', kind='ichancy_withdraw')
             
             if not bot_result['success']:
                 # إرجاع الرصيد في حالة الخطأ
@@ -184,6 +224,21 @@ class IchancyService:
         accounts = IchancyModel.get_all(limit)
         return [account.to_dict() for account in accounts]
     
+    @performance_logger
+    def get_accounts_page(self, limit: int = 50, cursor: Tuple[str, int] = None) -> Dict[str, Any]:
+        """جلب صفحة من حسابات Ichancy (للوحة الأدمن)"""
+        accounts, next_cursor = IchancyModel.get_page(limit, cursor)
+        return {
+            "accounts": [account.to_dict() for account in accounts],
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+    
+    def stream_accounts(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """المرور على جميع الحسابات (للتصدير)"""
+        for account in IchancyModel.iter_all(batch_size):
+            yield account.to_dict()
+    
     @performance_logger
     def count_accounts(self) -> int:
         """عد حسابات Ichancy"""
@@ -195,14 +250,17 @@ class IchancyService:
         return IchancyModel.delete(user_id)
     
     @performance_logger
-    def verify_login(self, username: str, password: str) -> Optional[int]:
-        """التحقق من تسجيل الدخول"""
+    def verify_login(self, username: str, password: str,
+                     on_result: Callable[[Optional[int]], None]) -> bool:
+        """التحقق من تسجيل الدخول - on_result(user_id أو None) بعد التحقق في بوول التشفير"""
         account = IchancyModel.get_by_username(username)
         if not account:
-            return None
+            on_result(None)
+            return True
         
-        if account.verify_password(password):
-            account.update_login()
-            return account.user_id
+        def _checked(valid: bool):
+            if valid:
+                account.update_login()
+            on_result(account.user_id if valid else None)
         
-        return None
\ No newline at end of file
+        return account.verify_password(password, _checked)
@@ -0,0 +1,219 @@
+"""
+مصادر إشعارات التحويل: ملف JSON lines، مجلد ملفات JSON، ونقطة HTTP محلية
+"""
+
+import hmac
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from core.config import DEPOSIT_MATCHING
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# أقصى حجم لطلب HTTP واحد
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class FileFeed:
+    """ملف يُضاف إليه سجل JSON في كل سطر - يُقرأ من آخر موضع محفوظ
+
+    الموضع يُحفظ بعد معالجة السجلات (إعادة القراءة بعد انقطاع آمنة لأن
+    الإشعار المكرر لا يُسجل مرتين).
+    """
+    
+    name = "file"
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.offset_path = f"{path}.offset"
+        self.offset = self._load_offset()
+    
+    def _load_offset(self) -> int:
+        try:
+            with open(self.offset_path) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+    
+    def _save_offset(self):
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(self.offset))
+        os.replace(tmp_path, self.offset_path)
+    
+    def poll(self, handle: Callable[[Dict], Dict]) -> int:
+        """معالجة الأسطر الكاملة الجديدة - يرجع عدد السجلات"""
+        if not os.path.exists(self.path):
+            return 0
+        
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            # الملف استُبدل أو قُص
+            logger.info(f"ملف الإشعارات {self.path} أصغر من الموضع المحفوظ، القراءة من البداية")
+            self.offset = 0
+        if size == self.offset:
+            return 0
+        
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        
+        # السطر الأخير قد يكون قيد الكتابة
+        end = data.rfind(b'\n') + 1
+        count = 0
+        for line in data[:end].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"سطر غير صالح في {self.path}: {line[:100]!r}")
+                continue
+            handle(record)
+            count += 1
+        
+        if end:
+            self.offset += end
+            self._save_offset()
+        return count
+
+
+class SpoolFeed:
+    """مجلد ملفات *.json (إشعار أو قائمة إشعارات لكل ملف) - تُنقل بعد المعالجة
+
+    الكاتب ينشئ الملف باسم مؤقت ثم يعيد تسميته إلى .json حتى لا يُقرأ ناقصاً.
+    """
+    
+    name = "spool"
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.processed_dir = os.path.join(directory, "processed")
+        self.failed_dir = os.path.join(directory, "failed")
+    
+    def poll(self, handle: Callable[[Dict], Dict]) -> int:
+        """معالجة الملفات الموجودة بترتيب أسمائها - يرجع عدد السجلات"""
+        if not os.path.isdir(self.directory):
+            return 0
+        
+        count = 0
+        for name in sorted(n for n in os.listdir(self.directory) if n.endswith('.json')):
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    payload = json.load(f)
+                records = payload if isinstance(payload, list) else [payload]
+                for record in records:
+                    handle(record)
+                count += len(records)
+                target = self.processed_dir
+            except Exception as e:
+                logger.error(f"خطأ في ملف الإشعارات {name}: {e}")
+                target = self.failed_dir
+            
+            os.makedirs(target, exist_ok=True)
+            os.replace(path, os.path.join(target, name))
+        return count
+
+
+class _NotificationRequestHandler(BaseHTTPRequestHandler):
+    """POST /notifications: إشعار JSON أو قائمة إشعارات"""
+    
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        if path != "/notifications":
+            self._send(404, {"error": "not found"})
+            return
+        
+        # الخادم لا يعمل بدون رمز، والفحص هنا لا يتخطى رمزاً فارغاً
+        token = self.server.token
+        if not token or not hmac.compare_digest(self.headers.get("X-Feed-Token", ""), token):
+            self._send(401, {"error": "unauthorized"})
+            return
+        
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length <= 0 or length > MAX_BODY_BYTES:
+                self._send(413 if length > 0 else 400, {"error": "invalid body size"})
+                return
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._send(400, {"error": "invalid json"})
+            return
+        
+        try:
+            records = payload if isinstance(payload, list) else [payload]
+            results = [self.server.ingest(record) for record in records]
+            self._send(200, {"results": results})
+        except Exception as e:
+            logger.error(f"خطأ في نقطة الإشعارات: {e}")
+            self._send(500, {"error": "internal error"})
+    
+    def _send(self, status: int, body: Dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        """تعطيل سجل الطلبات الافتراضي"""
+        pass
+
+
+class NotificationServer:
+    """خادم HTTP محلي لاستقبال الإشعارات في خيط منفصل"""
+    
+    def __init__(self, host: str, port: int, handle: Callable[[Dict], Dict], token: str):
+        self.host = host
+        self.port = port
+        self.handle = handle
+        self.token = token
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+    
+    def start(self) -> bool:
+        """تشغيل الخادم (يرفض التشغيل بدون رمز: أي عملية محلية كانت ستقبل شحنات)"""
+        if not self.token:
+            logger.error("❌ نقطة إشعارات الدفع تحتاج DEPOSIT_FEED_TOKEN، لم يتم تشغيلها")
+            return False
+        
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), _NotificationRequestHandler)
+            self.httpd.daemon_threads = True
+            self.httpd.ingest = self.handle
+            self.httpd.token = self.token
+            self.thread = threading.Thread(
+                target=self.httpd.serve_forever,
+                daemon=True,
+                name="notification-server"
+            )
+            self.thread.start()
+            logger.info(f"✅ نقطة إشعارات الدفع تعمل على http://{self.host}:{self.port}/notifications")
+            return True
+        except Exception as e:
+            logger.error(f"❌ فشل تشغيل نقطة إشعارات الدفع: {e}")
+            return False
+    
+    def stop(self):
+        """إيقاف الخادم"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def configured_feeds() -> List:
+    """المصادر المحددة في الإعدادات"""
+    feeds = []
+    if DEPOSIT_MATCHING["FEED_FILE"]:
+        feeds.append(FileFeed(DEPOSIT_MATCHING["FEED_FILE"]))
+    if DEPOSIT_MATCHING["SPOOL_DIR"]:
+        feeds.append(SpoolFeed(DEPOSIT_MATCHING["SPOOL_DIR"]))
+    return feeds
@@ -4,15 +4,24 @@
 
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
+import json
 import time
 
 from core.database import db
 from core.cache import cache
-from core.config import PAYMENT_METHODS, SYSTEM_CONSTANTS
+from core.config import PAYMENT_METHODS, SYSTEM_CONSTANTS, REVIEW_QUEUE
 from core.security import input_validator
 from core.logger import get_logger, performance_logger
+from core.outbox import PRIORITY_CHANNEL
+from core.identifiers import payment_references
+from core.metrics import metrics
 from models.user import UserModel
 from models.transaction import Transaction, TransactionModel
+from models.review import ReviewLeaseModel
+from models.ledger import LedgerModel
+from models.syriatel_code import SyriatelCodeModel
+from services.code_allocator import code_allocator
+from services.stats_rollup import stats_rollup
 
 logger = get_logger(__name__)
 
@@ -76,7 +85,7 @@ class PaymentService:
                 "is_active": bool(result['is_active']),
                 "pause_message": result['pause_message']
             }
-            self.cache.set_setting(cache_key, settings, ttl=60)
+            self.cache.set_setting(cache_key, settings, ttl=60, publish=False)
             return settings
         
         return None
@@ -138,7 +147,7 @@ class PaymentService:
                 "min_amount": result['min_amount'],
                 "max_amount": result['max_amount']
             }
-            self.cache.set_setting(cache_key, limits, ttl=60)
+            self.cache.set_setting(cache_key, limits, ttl=60, publish=False)
             return limits
         
         return None
@@ -185,10 +194,45 @@ class PaymentService:
         
         return {"valid": True, "message": "المبلغ صالح"}
     
+    @performance_logger
+    def reserve_deposit_code(self, payment_method: str, amount: int,
+                             previous_hold: Dict = None) -> Dict[str, Any]:
+        """حجز كود سيرياتيل يتسع للمبلغ (الطرق الأخرى لا تحتاج كوداً)"""
+        if previous_hold:
+            code_allocator.cancel(previous_hold['hold_id'])
+        
+        # بدون أكواد مضافة يبقى الشحن كما كان (رقم ثابت خارج البوت)
+        if payment_method != 'syriatel_cash' or not code_allocator.has_codes():
+            return {"success": True, "hold": None}
+        
+        hold = code_allocator.reserve(amount)
+        if not hold:
+            available = code_allocator.max_available()
+            logger.warning(f"⚠️ لا يوجد كود سيرياتيل يتسع لمبلغ {amount:,} (أكبر سعة متاحة {available:,})")
+            if available:
+                message = f"❌ لا يمكن استقبال هذا المبلغ حالياً، الحد الأقصى المتاح: {available:,} ليرة"
+            else:
+                message = "❌ أكواد سيرياتيل ممتلئة حالياً، حاول لاحقاً"
+            return {"success": False, "message": message}
+        
+        return {"success": True, "hold": hold}
+    
+    def _is_duplicate_reference(self, payment_method: str, reference: str) -> bool:
+        """التحقق من تكرار رقم العملية (استعلام فقط عندما يشتبه الفلتر)"""
+        if not payment_references.might_exist(payment_method, reference):
+            return False
+        
+        if TransactionModel.reference_exists(payment_method, reference):
+            metrics.counter("payments.duplicate_references").inc()
+            logger.warning(f"⚠️ رقم عملية مكرر ({payment_method}): {reference}")
+            return True
+        return False
+    
     @performance_logger
     def create_deposit_request(self, user_id: int, amount: int, 
-                               payment_method: str, transaction_id: str) -> Dict[str, Any]:
-        """إنشاء طلب شحن"""
+                               payment_method: str, transaction_id: str,
+                               code_hold: Dict = None) -> Dict[str, Any]:
+        """إنشاء طلب شحن (مع تثبيت حجز كود سيرياتيل إن وجد)"""
         try:
             # التحقق من إعدادات الدفع
             settings = self.get_payment_settings(payment_method)
@@ -203,6 +247,13 @@ class PaymentService:
             if not validation['valid']:
                 return {"success": False, "message": validation['message']}
             
+            # رقم العملية لا يُقبل مرتين (الفلتر يستبعد أغلب الأرقام الجديدة بدون استعلام)
+            transaction_id = "".join(transaction_id.split())
+            if self._is_duplicate_reference(payment_method, transaction_id):
+                if code_hold:
+                    code_allocator.cancel(code_hold['hold_id'])
+                return {"success": False, "message": "❌ رقم العملية مستخدم في طلب سابق"}
+            
             # سعر الصرف للدولار
             final_amount = amount
             exchange_rate = 13000  # يمكن جعله متغيراً
@@ -217,13 +268,37 @@ class PaymentService:
                 amount=final_amount,
                 payment_method=payment_method,
                 transaction_id=transaction_id,
+                account_number=code_hold['code_number'] if code_hold else None,
                 status='pending'
             )
             
             tx_id = TransactionModel.create(transaction)
             if not tx_id:
+                if code_hold:
+                    code_allocator.cancel(code_hold['hold_id'])
+                # رقم مستخدم (من عملية أخرى أو طلب متزامن): جدول الأرقام الدائم يرفض الإدخال
+                if TransactionModel.reference_exists(payment_method, transaction_id):
+                    return {"success": False, "message": "❌ رقم العملية مستخدم في طلب سابق"}
                 return {"success": False, "message": "خطأ في إنشاء المعاملة"}
             
+            payment_references.add(payment_method, transaction_id)
+            
+            if code_hold and not code_allocator.confirm(code_hold['hold_id'], code_hold['code_id'], final_amount):
+                # المبلغ لم يُسجل على الكود: الرفض لاحقاً يجب ألا يُنقص سعته، والأدمن يرى الكود في الملاحظات
+                TransactionModel.detach_code(
+                    tx_id, f"⚠️ تجاوز سعة كود سيرياتيل {code_hold['code_number']}، لم يُسجل المبلغ على الكود"
+                )
+            
+            # إشعار التحويل وصل قبل الطلب: قبول فوري بدون انتظار الأدمن
+            from services.deposit_matcher import deposit_matcher
+            transaction.id = tx_id
+            match = deposit_matcher.match_transaction(transaction)
+            
+            if match['status'] == 'approved':
+                message = f"✅ تم التحقق من التحويل وإضافة {final_amount:,} ليرة إلى رصيدك"
+            else:
+                message = "تم إرسال طلب الشحن للمراجعة"
+            
             # رقم الطلب الشهري
             month = datetime.now().strftime('%Y%m')
             order_number = f"{month}{tx_id:04d}"
@@ -233,7 +308,8 @@ class PaymentService:
                 "transaction_id": tx_id,
                 "order_number": order_number,
                 "amount": final_amount,
-                "message": "تم إرسال طلب الشحن للمراجعة"
+                "auto_approved": match['status'] == 'approved',
+                "message": message
             }
         except Exception as e:
             logger.error(f"خطأ في create_deposit_request: {e}")
@@ -266,7 +342,7 @@ class PaymentService:
                 net_amount = amount - deduction
             
             # خصم المبلغ من الرصيد
-            result = user_service.update_balance(user_id, amount, 'subtract')
+            result = user_service.update_balance(user_id, amount, 'subtract', kind='withdraw')
             if not result['success']:
                 return result
             
@@ -284,7 +360,7 @@ class PaymentService:
             tx_id = TransactionModel.create(transaction)
             if not tx_id:
                 # إرجاع الرصيد في حالة الخطأ
-                user_service.update_balance(user_id, amount, 'add')
+                user_service.update_balance(user_id, amount, 'add', kind='withdraw_refund')
                 return {"success": False, "message": "خطأ في إنشاء المعاملة"}
             
             return {
@@ -312,34 +388,57 @@ class PaymentService:
             if transaction.status != 'pending':
                 return {"success": False, "message": f"المعاملة تم معالجتها مسبقاً ({transaction.status})"}
             
-            from services.user_service import UserService
-            user_service = UserService()
+            # معاملة محجوزة لأدمن آخر لا تعالج حتى ينتهي حجزه
+            if admin_id:
+                holder = ReviewLeaseModel.get_holder(transaction_id)
+                if holder and holder != admin_id:
+                    return {"success": False, "message": f"🔒 المعاملة قيد المراجعة من الأدمن {holder}"}
             
             if action == 'approve':
                 new_status = 'approved'
                 notes = f"تمت الموافقة بواسطة {admin_id}" if admin_id else "تمت الموافقة تلقائياً"
-                
-                if transaction.type == 'charge':
-                    # إضافة الرصيد للمستخدم
-                    user_service.update_balance(transaction.user_id, transaction.amount, 'add')
-                    
-                elif transaction.type == 'withdraw':
-                    # للسحب، الرصيد تم خصمه مسبقاً
-                    pass
-            
             elif action == 'reject':
                 new_status = 'rejected'
                 notes = f"تم الرفض بواسطة {admin_id}" if admin_id else "تم الرفض تلقائياً"
-                
-                if transaction.type == 'withdraw':
-                    # إرجاع الرصيد للمستخدم
-                    user_service.update_balance(transaction.user_id, transaction.amount, 'add')
-            
             else:
                 return {"success": False, "message": "إجراء غير معروف"}
             
-            # تحديث حالة المعاملة
-            TransactionModel.update_status(transaction_id, new_status, notes)
+            credit_kind = None
+            if action == 'approve' and transaction.type == 'charge':
+                # إضافة الرصيد للمستخدم (للسحب الرصيد تم خصمه مسبقاً)
+                credit_kind = 'deposit'
+            elif action == 'reject' and transaction.type == 'withdraw':
+                # إرجاع الرصيد للمستخدم
+                credit_kind = 'withdraw_refund'
+            release_code = (
+                action == 'reject' and transaction.type == 'charge'
+                and transaction.payment_method == 'syriatel_cash' and transaction.account_number
+            )
+            
+            # الحالة والقيد وحجز المراجعة وسعة الكود في معاملة واحدة: طلبان متزامنان لا ينجح
+            # إلا أحدهما، وفشل القيد يعيد المعاملة معلقة بدل قبولها بدون رصيد
+            with db.transaction() as conn:
+                if not TransactionModel._transition_status(conn, transaction_id, 'pending', new_status, notes):
+                    return {"success": False, "message": "المعاملة تم معالجتها مسبقاً"}
+                
+                if credit_kind and LedgerModel._apply(
+                    conn, transaction.user_id, transaction.amount, credit_kind, str(transaction_id)
+                ) is None:
+                    conn.rollback()
+                    logger.error(f"فشل قيد {credit_kind} للمعاملة #{transaction_id}، تم التراجع")
+                    return {"success": False, "message": "خطأ في تحديث رصيد المستخدم، لم تتغير المعاملة"}
+                
+                ReviewLeaseModel._release(conn, transaction_id)
+                
+                if release_code:
+                    # إرجاع سعة الكود (الشحن المرفوض لم يُستلم عليه)
+                    SyriatelCodeModel._release_many(conn, json.dumps([transaction_id]))
+            
+            logger.info(f"تم تحديث حالة المعاملة #{transaction_id} إلى {new_status}")
+            if credit_kind:
+                self.cache.delete_user(transaction.user_id)
+            if release_code:
+                code_allocator.reload()
             
             return {
                 "success": True,
@@ -352,14 +451,171 @@ class PaymentService:
             return {"success": False, "message": "خطأ داخلي"}
     
     @performance_logger
-    def get_daily_report(self, date_str: str = None) -> Dict[str, Any]:
-        """تقرير يومي للمعاملات"""
-        if not date_str:
-            date_str = datetime.now().strftime('%Y-%m-%d')
+    def process_transactions_bulk(self, action: str, admin_id: int = None,
+                                  transaction_ids: List[int] = None, transaction_type: str = None,
+                                  up_to_id: int = None, limit: int = None) -> Dict[str, Any]:
+        """قبول/رفض مجموعة معاملات في معاملة قاعدة بيانات واحدة
+
+        إما قائمة أرقام، أو فلتر (النوع + حتى رقم معاملة معين، بترتيب الطابور)
+        """
+        if action == 'approve':
+            new_status = 'approved'
+            notes = f"تمت الموافقة بواسطة {admin_id} (دفعة)" if admin_id else "تمت الموافقة تلقائياً"
+            credit_types = {'charge': 'deposit'}
+        elif action == 'reject':
+            new_status = 'rejected'
+            notes = f"تم الرفض بواسطة {admin_id} (دفعة)" if admin_id else "تم الرفض تلقائياً"
+            credit_types = {'withdraw': 'withdraw_refund'}
+        else:
+            return {"success": False, "message": "إجراء غير معروف"}
         
-        return TransactionModel.get_daily_transactions(date_str)
+        if not transaction_ids and not transaction_type:
+            return {"success": False, "message": "حدد المعاملات أو نوعها"}
+        
+        if transaction_ids:
+            targets = "SELECT value FROM json_each(?)"
+            target_params = (json.dumps([int(tx_id) for tx_id in transaction_ids]),)
+        else:
+            targets = """
+                SELECT id FROM transactions INDEXED BY idx_transactions_pending_type
+                WHERE status = 'pending' AND type = ? AND id <= ?
+                ORDER BY created_at ASC, id ASC
+                LIMIT ?
+            """
+            target_params = (transaction_type, up_to_id or 2 ** 63 - 1, limit or REVIEW_QUEUE["BULK_LIMIT"])
+        
+        try:
+            with db.transaction() as conn:
+                # المحجوزة لأدمن آخر تبقى له
+                rows = conn.execute(
+                    f"""
+                        UPDATE transactions
+                        SET status = ?, notes = COALESCE(?, notes)
+                        WHERE id IN ({targets})
+                          AND status = 'pending'
+                          AND id NOT IN (
+                              SELECT transaction_id FROM review_leases
+                              WHERE admin_id != ? AND expires_at >= ?
+                          )
+                        RETURNING id, user_id, type, amount
+                    """,
+                    (new_status, notes, *target_params, admin_id or 0, time.time())
+                ).fetchall()
+                rows.sort(key=lambda row: row[0])
+                
+                LedgerModel._credit_many(conn, [
+                    (user_id, amount, credit_types[tx_type], str(tx_id))
+                    for tx_id, user_id, tx_type, amount in rows
+                    if tx_type in credit_types
+                ])
+                
+                processed_ids = json.dumps([row[0] for row in rows])
+                conn.execute(
+                    "DELETE FROM review_leases WHERE transaction_id IN (SELECT value FROM json_each(?))",
+                    (processed_ids,)
+                )
+                
+                released_codes = 0
+                if action == 'reject':
+                    released_codes = SyriatelCodeModel._release_many(conn, processed_ids)
+        except Exception as e:
+            logger.error(f"خطأ في process_transactions_bulk: {e}")
+            return {"success": False, "message": "خطأ داخلي، لم تتغير أي معاملة"}
+        
+        if released_codes:
+            code_allocator.reload()
+        
+        for user_id in {row[1] for row in rows}:
+            self.cache.delete_user(user_id)
+        
+        results = [
+            {"transaction_id": tx_id, "success": True, "new_status": new_status}
+            for tx_id, _, _, _ in rows
+        ]
+        
+        # سبب تخطي الأرقام المطلوبة التي لم تتغير
+        if transaction_ids:
+            done = {row[0] for row in rows}
+            for tx_id in transaction_ids:
+                if tx_id in done:
+                    continue
+                transaction = TransactionModel.get(tx_id)
+                if not transaction:
+                    reason = "المعاملة غير موجودة"
+                elif transaction.status != 'pending':
+                    reason = f"تمت معالجتها مسبقاً ({transaction.status})"
+                else:
+                    reason = f"🔒 قيد المراجعة من الأدمن {ReviewLeaseModel.get_holder(tx_id)}"
+                results.append({"transaction_id": tx_id, "success": False, "message": reason})
+        
+        self._notify_transaction_results(rows, action)
+        
+        total_amount = sum(row[3] for row in rows)
+        logger.info(f"دفعة {new_status}: {len(rows)} معاملة بمجموع {total_amount:,} بواسطة {admin_id}")
+        
+        return {
+            "success": True,
+            "processed": len(rows),
+            "total_amount": total_amount,
+            "results": results,
+            "message": f"تم {new_status} {len(rows)} معاملة بمجموع {total_amount:,} ليرة"
+        }
+    
+    def _notify_transaction_results(self, rows: List[tuple], action: str):
+        """إشعارات المستخدمين في طابور الإرسال (بعد ردود المستخدمين وقبل الإذاعة)"""
+        from handlers.commands import bot
+        
+        for tx_id, user_id, tx_type, amount in rows:
+            if action == 'approve':
+                if tx_type == 'charge':
+                    text = f"✅ تم قبول طلب الشحن #{tx_id}\n💰 تمت إضافة {amount:,} ليرة إلى رصيدك"
+                else:
+                    text = f"✅ تم تنفيذ طلب السحب #{tx_id} بمبلغ {amount:,} ليرة"
+            else:
+                if tx_type == 'withdraw':
+                    text = f"❌ تم رفض طلب السحب #{tx_id}\n💰 تمت إعادة {amount:,} ليرة إلى رصيدك"
+                else:
+                    text = f"❌ تم رفض طلب الشحن #{tx_id}"
+            
+            try:
+                bot.send_message(user_id, text, priority=PRIORITY_CHANNEL)
+            except Exception as e:
+                logger.error(f"خطأ في إشعار المستخدم {user_id} بالمعاملة #{tx_id}: {e}")
+    
+    @performance_logger
+    def get_daily_report(self, date_str: str = None) -> Dict[str, Any]:
+        """تقرير يومي للمعاملات (قراءة العدادات المجمّعة بدل مسح المعاملات)"""
+        return stats_rollup.get_report(date_str)
     
     @performance_logger
     def get_pending_transactions(self, transaction_type: str = None) -> List[Transaction]:
         """جلب المعاملات المعلقة"""
-        return TransactionModel.get_pending_transactions(transaction_type)
\ No newline at end of file
+        return TransactionModel.get_pending_transactions(transaction_type)
+    
+    @performance_logger
+    def get_review_page(self, transaction_type: str = None, after_id: int = None,
+                        limit: int = None) -> Dict[str, Any]:
+        """صفحة من طابور المراجعة مع العدد الكلي ومؤشر الصفحة التالية"""
+        limit = limit or REVIEW_QUEUE["PAGE_SIZE"]
+        
+        # عنصر إضافي لمعرفة وجود صفحة تالية
+        items = TransactionModel.get_pending_page(transaction_type, after_id, limit + 1)
+        has_more = len(items) > limit
+        items = items[:limit]
+        
+        return {
+            "items": items,
+            "total": TransactionModel.count_pending(transaction_type),
+            "next_after_id": items[-1].id if has_more else None
+        }
+    
+    @performance_logger
+    def claim_next_transaction(self, admin_id: int, transaction_type: str = None) -> Optional[Transaction]:
+        """حجز أقدم معاملة معلقة غير محجوزة للأدمن"""
+        transaction_id = ReviewLeaseModel.claim_next(admin_id, REVIEW_QUEUE["LEASE_SECONDS"], transaction_type)
+        return TransactionModel.get(transaction_id) if transaction_id else None
+    
+    @performance_logger
+    def claim_transaction(self, transaction_id: int, admin_id: int) -> bool:
+        """حجز معاملة محددة (False إذا كانت محجوزة لأدمن آخر)"""
+        return ReviewLeaseModel.claim(transaction_id, admin_id, REVIEW_QUEUE["LEASE_SECONDS"])
\ No newline at end of file
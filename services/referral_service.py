@@ -46,7 +46,7 @@ class ReferralService:
         
         settings = ReferralModel.get_settings()
         if settings:
-            self.cache.set_setting(cache_key, settings.to_dict(), ttl=60)
+            self.cache.set_setting(cache_key, settings.to_dict(), ttl=60, publish=False)
         
         return settings
     
@@ -203,7 +203,7 @@ class ReferralService:
                 # إضافة الرصيد للمحيل
                 from services.user_service import UserService
                 user_service = UserService()
-                user_service.update_balance(referrer_id, total_award, 'add')
+                user_service.update_balance(referrer_id, total_award, 'add', kind='referral')
                 
                 # تسجيل المعاملة
                 transaction = TransactionModel()
@@ -242,7 +242,7 @@ class ReferralService:
                 total_commission = commission['total_commission']
                 
                 # إضافة الرصيد
-                result = user_service.update_balance(referrer_id, total_commission, 'add')
+                result = user_service.update_balance(referrer_id, total_commission, 'add', kind='referral')
                 if result['success']:
                     total_distributed += total_commission
                     distributed_users.append({
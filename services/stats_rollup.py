@@ -0,0 +1,84 @@
+"""
+تجميع الإحصائيات اليومية: ما لا تلتقطه الـ triggers يُجمع في الذاكرة ويُضاف كل دقيقة
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Set
+
+from core.config import DAILY_STATS
+from core.logger import get_logger
+from core.metrics import metrics
+from models.daily_stats import DailyStatsModel
+
+logger = get_logger(__name__)
+
+
+class DailyStatsRollup:
+    """سجل تغييرات صغير للنشاط والأخطاء يُطوى في daily_stats دورياً
+
+    نشاط المستخدم يُحدَّث في الكاش فقط عند كل رسالة؛ هنا يُجمع من تفاعل اليوم لأول مرة
+    ويُكتب last_active لهم دفعة واحدة، والـ trigger يزيد النشطين مرة لكل مستخدم في اليوم.
+    """
+    
+    def __init__(self):
+        self.day = None
+        self.seen: Set[int] = set()
+        self.pending: Set[int] = set()
+        self.errors_folded = 0
+        self.lock = threading.Lock()
+    
+    def touch(self, user_id: int):
+        """تسجيل تفاعل مستخدم (مرة واحدة في اليوم تكفي)"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self.lock:
+            if today != self.day:
+                self.day = today
+                self.seen = set()
+            if user_id not in self.seen:
+                self.seen.add(user_id)
+                self.pending.add(user_id)
+    
+    def fold(self) -> Dict[str, int]:
+        """كتابة النشاط والأخطاء المتراكمة منذ آخر دفعة"""
+        now = datetime.now()
+        with self.lock:
+            pending, self.pending = self.pending, set()
+        
+        if pending and not DailyStatsModel.touch_users(pending, now.isoformat()):
+            with self.lock:
+                self.pending |= pending
+            pending = set()
+        
+        # أخطاء العمليات والمهام فقط: ردود Telegram (403 من حظر البوت أثناء الإذاعة مثلاً)
+        # تُعد في telegram.<method>.errors ولا تعني خطأ في النظام
+        errors = metrics.total(".errors", exclude="telegram.")
+        delta = errors - self.errors_folded
+        if delta > 0 and DailyStatsModel.add_errors(now.strftime('%Y-%m-%d'), delta):
+            self.errors_folded = errors
+        
+        return {"active": len(pending), "errors": max(delta, 0)}
+    
+    def get_report(self, date_str: str = None) -> Dict[str, Any]:
+        """تقرير يوم من العدادات المجمّعة"""
+        return DailyStatsModel.get(date_str or datetime.now().strftime('%Y-%m-%d'))
+    
+    def rebuild(self, days: Optional[int] = DAILY_STATS["REBUILD_DAYS"]) -> Dict[str, int]:
+        """إعادة بناء آخر days يوم (None = كل التاريخ)"""
+        since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d') if days else None
+        return DailyStatsModel.rebuild(since)
+    
+    def ensure_built(self) -> bool:
+        """بناء كامل عند أول تشغيل (قبل وجود الـ triggers لم يُسجل شيء)"""
+        try:
+            if not DailyStatsModel.is_empty():
+                return False
+            self.rebuild(None)
+            return True
+        except Exception as e:
+            logger.error(f"❌ خطأ في بناء الإحصائيات اليومية: {e}")
+            return False
+
+
+# نسخة عامة
+stats_rollup = DailyStatsRollup()
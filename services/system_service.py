@@ -70,7 +70,7 @@ class SystemService:
         
         if result:
             value = result['value']
-            self.cache.set_setting(cache_key, value, ttl=60)
+            self.cache.set_setting(cache_key, value, ttl=60, publish=False)
             return value
         
         return default
@@ -14,6 +14,7 @@ from models.user import User, UserModel
 from models.ichancy import IchancyModel
 from models.referral import ReferralModel
 from models.admin import AdminModel
+from services.stats_rollup import stats_rollup
 
 logger = get_logger(__name__)
 
@@ -37,6 +38,7 @@ class UserService:
         user = UserModel.get(user_id)
         if user:
             user.update_activity()
+            stats_rollup.touch(user_id)
             return user
         
         # إنشاء مستخدم جديد
@@ -56,8 +58,9 @@ class UserService:
         return user.balance if user else 0
     
     @performance_logger
-    def update_balance(self, user_id: int, amount: int, operation: str = 'add') -> Dict[str, Any]:
-        """تحديث رصيد المستخدم"""
+    def update_balance(self, user_id: int, amount: int, operation: str = 'add',
+                       kind: str = None, reference: str = None) -> Dict[str, Any]:
+        """تحديث رصيد المستخدم (kind نوع القيد في دفتر القيود، reference رقم العملية المرتبطة)"""
         try:
             if amount <= 0:
                 return {"success": False, "message": "المبلغ يجب أن يكون أكبر من صفر"}
@@ -66,25 +69,22 @@ class UserService:
             if not user:
                 return {"success": False, "message": "المستخدم غير موجود"}
             
-            if operation == 'subtract' and user.balance < amount:
-                return {"success": False, "message": "الرصيد غير كافي"}
+            # التحقق من كفاية الرصيد يتم ذرياً داخل الـ UPDATE وليس من الرصيد المقروء هنا
+            new_balance = UserModel.update_balance(user_id, amount, operation, kind, reference)
+            if new_balance is None:
+                if operation == 'subtract':
+                    return {"success": False, "message": "الرصيد غير كافي"}
+                return {"success": False, "message": "خطأ في تحديث الرصيد"}
             
-            if UserModel.update_balance(user_id, amount, operation):
-                # إبطال الكاش
-                self.cache.delete_user(user_id)
-                
-                # جلب الرصيد الجديد
-                user = UserModel.get(user_id)
-                
-                return {
-                    "success": True,
-                    "old_balance": user.balance - amount if operation == 'add' else user.balance + amount,
-                    "new_balance": user.balance,
-                    "operation": operation,
-                    "amount": amount
-                }
+            self.cache.delete_user(user_id)
             
-            return {"success": False, "message": "خطأ في تحديث الرصيد"}
+            return {
+                "success": True,
+                "old_balance": new_balance - amount if operation == 'add' else new_balance + amount,
+                "new_balance": new_balance,
+                "operation": operation,
+                "amount": amount
+            }
         except Exception as e:
             logger.error(f"خطأ في update_balance: {e}")
             return {"success": False, "message": "خطأ داخلي"}
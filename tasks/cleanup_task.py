@@ -8,6 +8,7 @@ from handlers.sessions import cleanup_expired_sessions
 from services.gift_service import GiftService
 from core.security import rate_limiter
 from core.cache import cache
+from models.review import ReviewLeaseModel
 
 logger = get_logger(__name__)
 
@@ -33,6 +34,9 @@ def cleanup_system():
         cache_expired = cache.auto_cleanup()
         cleaned_items += cache_expired
         
+        # 5. حجوزات المراجعة المنتهية
+        cleaned_items += ReviewLeaseModel.cleanup_expired()
+        
         if cleaned_items > 0:
             logger.info(f"🧹 تم تنظيف {cleaned_items} عنصر من النظام")
         
@@ -0,0 +1,74 @@
+"""
+مهمة قراءة إشعارات التحويل ومطابقتها مع طلبات الشحن
+"""
+
+from typing import Optional
+
+from core.config import DEPOSIT_MATCHING
+from core.logger import get_logger
+from services.deposit_matcher import deposit_matcher
+from services.notification_feed import NotificationServer, configured_feeds
+
+logger = get_logger(__name__)
+
+feeds = configured_feeds()
+
+
+def _ingest(record: dict, source: str) -> dict:
+    """تمرير سجل للمطابقة (خطأ في سجل لا يوقف الباقي)"""
+    try:
+        return deposit_matcher.ingest(record, source)
+    except Exception as e:
+        logger.error(f"❌ خطأ في مطابقة إشعار من {source}: {e}")
+        return {"status": "error"}
+
+
+def poll_notification_feeds() -> int:
+    """قراءة الجديد من الملف والمجلد"""
+    total = 0
+    for feed in feeds:
+        try:
+            total += feed.poll(lambda record: _ingest(record, feed.name))
+        except Exception as e:
+            logger.error(f"❌ خطأ في قراءة مصدر الإشعارات {feed.name}: {e}")
+    
+    if total:
+        logger.info(f"📥 تمت معالجة {total} إشعار دفع")
+    return total
+
+
+def setup_deposit_matching_task(scheduler):
+    """إعداد قراءة المصادر المجدولة"""
+    try:
+        if not DEPOSIT_MATCHING["ENABLED"]:
+            logger.info("⏸️ المطابقة التلقائية للشحن معطلة")
+            return
+        
+        if not feeds:
+            return
+        
+        scheduler.add_job(
+            poll_notification_feeds,
+            'interval',
+            seconds=DEPOSIT_MATCHING["POLL_INTERVAL_SECONDS"],
+            id='deposit_notification_feeds',
+            name='قراءة إشعارات الدفع'
+        )
+        
+        logger.info(f"✅ تم جدولة قراءة إشعارات الدفع كل {DEPOSIT_MATCHING['POLL_INTERVAL_SECONDS']} ث")
+        
+    except Exception as e:
+        logger.error(f"❌ خطأ في إعداد مهمة المطابقة التلقائية: {e}")
+
+
+def start_notification_server() -> Optional[NotificationServer]:
+    """تشغيل نقطة HTTP للإشعارات إذا كانت مفعلة"""
+    if not DEPOSIT_MATCHING["ENABLED"] or not DEPOSIT_MATCHING["HTTP_ENABLED"]:
+        return None
+    
+    server = NotificationServer(
+        DEPOSIT_MATCHING["HTTP_HOST"], DEPOSIT_MATCHING["HTTP_PORT"],
+        lambda record: _ingest(record, "http"),
+        DEPOSIT_MATCHING["HTTP_TOKEN"]
+    )
+    return server if server.start() else None
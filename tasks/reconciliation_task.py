@@ -0,0 +1,133 @@
+"""
+مهمة مطابقة الأرصدة الليلية
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from core.config import RECONCILIATION, CHANNELS, DB_PATH, BASE_DIR
+from core.logger import get_logger
+from core.metrics import metrics
+
+logger = get_logger(__name__)
+
+CHECK_LABELS = {
+    "balance": "الرصيد ≠ دفتر القيود",
+    "total_deposit": "إجمالي الإيداع ≠ قيود الإيداع",
+    "total_withdraw": "إجمالي السحب ≠ قيود السحب والاسترداد",
+    "gifts_sent": "الهدايا المرسلة ≠ قيود الإهداء",
+    "gifts_received": "الهدايا المستلمة ≠ قيود الإهداء"
+}
+
+
+def run_reconciliation(db_path: str = DB_PATH, chunk_size: int = None,
+                       workers: int = None, max_samples: int = None) -> dict:
+    """مطابقة كل المستخدمين على نطاقات متوازية - يرجع تقريراً مختصراً"""
+    chunk_size = chunk_size or RECONCILIATION["CHUNK_SIZE"]
+    workers = workers or RECONCILIATION["WORKERS"] or os.cpu_count() or 1
+    max_samples = max_samples if max_samples is not None else RECONCILIATION["MAX_SAMPLES"]
+    
+    start = time.perf_counter()
+    # عملية مستقلة لا تستورد إلا core.reconciliation: عمليات البوول (spawn) لا تعيد تهيئة البوت
+    completed = subprocess.run(
+        [
+            sys.executable, "-m", "core.reconciliation", db_path,
+            "--chunk-size", str(chunk_size),
+            "--workers", str(workers),
+            "--max-samples", str(max_samples)
+        ],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"فشلت عملية المطابقة ({completed.returncode}): {completed.stderr.strip()[-500:]}")
+    report = json.loads(completed.stdout)
+    
+    elapsed = time.perf_counter() - start
+    report["workers"] = workers
+    report["seconds"] = round(elapsed, 2)
+    report["users_per_second"] = round(report["users"] / elapsed) if elapsed else 0
+    report["rows_per_second"] = round(report["rows"] / elapsed) if elapsed else 0
+    
+    metrics.gauge("reconciliation.rows_per_second").set(report["rows_per_second"])
+    metrics.gauge("reconciliation.discrepancies").set(sum(report["discrepancies"].values()))
+    return report
+
+
+def format_report(report: dict) -> str:
+    """رسالة التقرير المختصرة"""
+    total = sum(report["discrepancies"].values())
+    
+    msg = f"🧮 **مطابقة الأرصدة**\n\n"
+    msg += f"• 👥 المستخدمون: {report['users']:,} ({report['chunks']} نطاق)\n"
+    msg += f"• 📋 السجلات: {report['rows']:,}\n"
+    msg += f"• ⏱️ المدة: {report['seconds']} ث ({report['rows_per_second']:,} سجل/ث)\n\n"
+    
+    if not total:
+        msg += "✅ لا توجد فروقات"
+        return msg
+    
+    msg += f"⚠️ **الفروقات: {total:,}**\n"
+    for name, count in report["discrepancies"].items():
+        if count:
+            msg += f"• {CHECK_LABELS[name]}: {count:,} (صافي {report['drift'][name]:+,})\n"
+    
+    if report["samples"]:
+        msg += "\n**عينة:**\n"
+        for sample in report["samples"]:
+            msg += f"`{sample['user_id']}` {sample['check']}: {sample['stored']:,} ≠ {sample['expected']:,}\n"
+    
+    return msg
+
+
+def reconcile_balances():
+    """تشغيل المطابقة وإرسال التقرير"""
+    try:
+        report = run_reconciliation()
+        msg = format_report(report)
+        total = sum(report["discrepancies"].values())
+        
+        log = logger.warning if total else logger.info
+        log(
+            f"🧮 مطابقة {report['users']:,} مستخدم: {total:,} فرق "
+            f"في {report['seconds']} ث ({report['rows_per_second']:,} سجل/ث)"
+        )
+        
+        if RECONCILIATION["SEND_TO_CHANNEL"]:
+            from handlers.commands import bot
+            try:
+                bot.send_message(CHANNELS["ADMIN_LOGS"], msg, parse_mode="Markdown")
+            except Exception as e:
+                logger.error(f"❌ خطأ في إرسال تقرير المطابقة: {e}")
+        
+        return report
+        
+    except Exception as e:
+        logger.error(f"❌ خطأ في مطابقة الأرصدة: {e}")
+        return None
+
+
+def setup_reconciliation_task(scheduler):
+    """إعداد مهمة المطابقة المجدولة"""
+    try:
+        if not RECONCILIATION["ENABLED"]:
+            logger.info("⏸️ مطابقة الأرصدة معطلة")
+            return
+        
+        hour, minute = map(int, RECONCILIATION["TIME"].split(':'))
+        scheduler.add_job(
+            reconcile_balances,
+            'cron',
+            hour=hour,
+            minute=minute,
+            id='balance_reconciliation',
+            name='مطابقة الأرصدة'
+        )
+        
+        logger.info(f"✅ تم جدولة مطابقة الأرصدة للساعة: {RECONCILIATION['TIME']}")
+        
+    except Exception as e:
+        logger.error(f"❌ خطأ في إعداد مهمة المطابقة: {e}")
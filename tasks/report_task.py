@@ -7,6 +7,7 @@ from core.config import REPORT_CONFIG, CHANNELS
 from core.logger import get_logger
 from services.payment_service import PaymentService
 from services.user_service import UserService
+from services.stats_rollup import stats_rollup
 
 logger = get_logger(__name__)
 
@@ -20,7 +21,8 @@ def generate_daily_report():
         # تاريخ اليوم
         today = datetime.now().strftime('%Y-%m-%d')
         
-        # جلب تقرير اليوم
+        # جلب تقرير اليوم (بعد إضافة آخر نشاط وأخطاء)
+        stats_rollup.fold()
         report = payment_service.get_daily_report(today)
         
         # إحصائيات المستخدمين
@@ -39,7 +41,9 @@ def generate_daily_report():
         msg += f"• 💸 إجمالي السحب: {report['total_withdraw']:,} ليرة\n"
         msg += f"• 📈 صافي التدفق: {report['total_deposit'] - report['total_withdraw']:,} ليرة\n"
         msg += f"• 📋 المعاملات: {report['deposit_count'] + report['withdraw_count']}\n"
-        msg += f"• ⏳ المعلقة: {report['pending_count']}\n\n"
+        msg += f"• ⏳ المعلقة: {report['pending_count']}\n"
+        msg += f"• ❌ المرفوضة: {report['rejected_count']}\n"
+        msg += f"• ⚠️ أخطاء النظام: {report['system_errors']:,}\n\n"
         
         # إحصائيات الإحالات
         from services.referral_service import ReferralService
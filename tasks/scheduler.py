@@ -5,10 +5,33 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+import time
 from core.logger import get_logger
+from core.metrics import metrics
 
 logger = get_logger(__name__)
 
+# وقت إرسال كل مهمة (max_instances=1 لذا يكفي معرف المهمة)
+_job_started = {}
+
+
+def _track_job_duration(event):
+    """تسجيل مدة تنفيذ المهام المجدولة في هيستوغرام job.<id>"""
+    operation = f"job.{event.job_id}"
+    
+    if event.code == EVENT_JOB_SUBMITTED:
+        _job_started[event.job_id] = time.perf_counter()
+        metrics.counter(f"{operation}.calls").inc()
+        return
+    
+    started = _job_started.pop(event.job_id, None)
+    if started is not None:
+        metrics.histogram(operation).observe((time.perf_counter() - started) * 1000)
+    
+    if event.code == EVENT_JOB_ERROR:
+        metrics.counter(f"{operation}.errors").inc()
+
 
 def setup_scheduler():
     """إعداد وتكوين المجدول"""
@@ -36,6 +59,12 @@ def setup_scheduler():
             timezone='Asia/Damascus'
         )
         
+        # قياس مدة المهام
+        scheduler.add_listener(
+            _track_job_duration,
+            EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR
+        )
+        
         # بدء المجدول
         scheduler.start()
         